@@ -1,32 +1,14 @@
-import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from uuid import UUID
 
-import psycopg2
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path="/usr/src/app/.env")
 
-
-def conn_filtered():
-    return psycopg2.connect(
-        host=os.getenv("POSTGRES_HOST"),
-        port=os.getenv("POSTGRES_PORT"),
-        database="filtered_db",
-        user="filtered_db",
-        password=os.getenv("POSTGRES_DEFAULT_USER_PASSWORD"),
-    )
-
-
-def conn_raw():
-    return psycopg2.connect(
-        host=os.getenv("POSTGRES_HOST"),
-        port=os.getenv("POSTGRES_PORT"),
-        database="raw_db",
-        user="raw_db",
-        password=os.getenv("POSTGRES_DEFAULT_USER_PASSWORD"),
-    )
+from app_flows.utils.db_pool import close_all_pools, filtered_db_connection, pool_stats, raw_db_connection
+from app_flows.utils.llm_metrics import aggregate_llm_calls
 
 
 app = FastAPI(title="News AI API", version="0.1.0")
@@ -43,14 +25,45 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+def shutdown():
+    close_all_pools()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
+@app.get("/stats/db-pool")
+def db_pool_stats():
+    return pool_stats()
+
+
+@app.get("/stats/llm")
+def llm_call_stats(
+    hours: float = Query(24, gt=0, le=24 * 90),
+    flow_run_id: Optional[UUID] = None,
+):
+    rows = aggregate_llm_calls(
+        flow_run_id=str(flow_run_id) if flow_run_id else None,
+        hours=None if flow_run_id else hours,
+    )
+    costs = [row["cost_usd"] for row in rows if row["cost_usd"] is not None]
+    return {
+        "hours": None if flow_run_id else hours,
+        "flow_run_id": flow_run_id,
+        "calls": sum(row["calls"] for row in rows),
+        "prompt_tokens": sum(row["prompt_tokens"] for row in rows),
+        "completion_tokens": sum(row["completion_tokens"] for row in rows),
+        "cost_usd": round(sum(costs), 6) if costs else None,
+        "by_model": rows,
+    }
+
+
 @app.get("/articles")
 def list_articles(limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
-    with conn_filtered() as cf:
+    with filtered_db_connection() as cf:
         with cf.cursor() as c:
             c.execute(
                 """
@@ -69,7 +82,7 @@ def list_articles(limit: int = Query(20, ge=1, le=100), offset: int = Query(0, g
     raw_ids = [r[1] for r in rows if r[1] is not None]
     raw_map: Dict[int, Dict[str, Any]] = {}
     if raw_ids:
-        with conn_raw() as cr:
+        with raw_db_connection() as cr:
             with cr.cursor() as c2:
                 c2.execute(
                     """
@@ -104,7 +117,7 @@ def list_articles(limit: int = Query(20, ge=1, le=100), offset: int = Query(0, g
 
 @app.get("/articles/{id}")
 def get_article(id: int):
-    with conn_filtered() as cf:
+    with filtered_db_connection() as cf:
         with cf.cursor() as c:
             c.execute(
                 """
@@ -120,7 +133,7 @@ def get_article(id: int):
     id_, rid, title_tr, summary, processed_at, model, categories, image_url = row
     raw_extra = {}
     if rid:
-        with conn_raw() as cr:
+        with raw_db_connection() as cr:
             with cr.cursor() as c2:
                 c2.execute(
                     "SELECT source_url, published_at, title, image_url FROM raw_articles WHERE id=%s",
@@ -0,0 +1,111 @@
+"""
+Continuous, event-driven AI processing worker.
+
+Runs until stopped. On startup it drains the unprocessed backlog, then it
+LISTENs for raw_articles inserts (see utils/notifications.py) and starts an
+ai_processing_flow run within seconds of new articles being stored, instead
+of waiting for the next scheduled pipeline run. A periodic poll picks up
+anything a missed notification or an expired lease left behind.
+
+Several workers (and the scheduled pipeline) can run at once: articles are
+claimed with SKIP LOCKED leases, so no article is processed twice.
+
+    python -m app_flows.ai_stream_worker
+"""
+import os
+import signal
+import sys
+import time
+
+# Use relative paths instead of hardcoded Docker paths
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+sys.path.insert(0, project_root)
+
+from dotenv import load_dotenv
+load_dotenv(dotenv_path=os.path.join(project_root, ".env"))
+
+import psycopg2
+
+from app_flows.flows.ai_processing_flow import ai_processing_flow
+from app_flows.utils.article_leases import count_claimable_articles
+from app_flows.utils.notifications import NotificationListener
+
+
+AI_STREAM_BATCH_SIZE = int(os.getenv("AI_STREAM_BATCH_SIZE", "20"))
+# Collect notifications for this long before starting a run, so one collection pass becomes one batch
+AI_STREAM_DEBOUNCE_SECONDS = float(os.getenv("AI_STREAM_DEBOUNCE_SECONDS", "2"))
+# Look for unprocessed articles this often even without notifications
+AI_STREAM_POLL_SECONDS = float(os.getenv("AI_STREAM_POLL_SECONDS", "300"))
+AI_STREAM_RECONNECT_SECONDS = float(os.getenv("AI_STREAM_RECONNECT_SECONDS", "5"))
+
+
+def drain_backlog(batch_size: int = AI_STREAM_BATCH_SIZE) -> int:
+    """
+    Run ai_processing_flow until nothing claimable is left, or a run leaves
+    the queue unchanged (e.g. claiming fails; the next poll retries).
+
+    Articles that fail back off or are parked when released, so a batch that
+    failed completely still lets the next one move on to newer articles.
+
+    Returns:
+        Number of articles processed
+    """
+    total = 0
+    claimable = count_claimable_articles()
+    while claimable > 0:
+        processed = ai_processing_flow(limit=batch_size)
+        total += processed
+        remaining = count_claimable_articles()
+        if processed == 0 and remaining >= claimable:
+            break
+        claimable = remaining
+    return total
+
+
+def run_worker(
+    batch_size: int = AI_STREAM_BATCH_SIZE,
+    debounce_seconds: float = AI_STREAM_DEBOUNCE_SECONDS,
+    poll_seconds: float = AI_STREAM_POLL_SECONDS,
+) -> None:
+    """Listen for new raw articles and process them until interrupted"""
+    listener = NotificationListener()
+    print(f"🚀 AI stream worker started (batch size {batch_size}, poll every {poll_seconds:.0f}s)")
+
+    while True:
+        try:
+            # LISTEN before draining, so articles stored while the backlog drains still wake us up
+            listener.connect()
+            processed = drain_backlog(batch_size)
+            if processed:
+                print(f"✅ Drained backlog: {processed} articles processed")
+
+            while True:
+                announced = listener.wait(poll_seconds)
+                if announced:
+                    # Let the rest of a collection burst arrive, then process it in one go
+                    time.sleep(debounce_seconds)
+                    announced += listener.drain()
+                    print(f"📨 {announced} new articles announced")
+                processed = drain_backlog(batch_size)
+                if processed:
+                    print(f"✅ Processed {processed} articles")
+
+        except psycopg2.OperationalError as e:
+            print(f"⚠️  Database connection lost, reconnecting in {AI_STREAM_RECONNECT_SECONDS:.0f}s: {e}")
+        except Exception as e:
+            print(f"❌ AI stream worker error, restarting in {AI_STREAM_RECONNECT_SECONDS:.0f}s: {e}")
+        time.sleep(AI_STREAM_RECONNECT_SECONDS)
+
+
+def _stop(signum, frame) -> None:
+    # Raise in the main loop so a running flow releases its article leases on the way out
+    raise KeyboardInterrupt
+
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        run_worker()
+    except KeyboardInterrupt:
+        print("👋 AI stream worker stopped")
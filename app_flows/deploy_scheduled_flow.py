@@ -1,5 +1,10 @@
 """
-Deploy the complete news pipeline with a schedule to run every 15 minutes.
+Deploy the complete news pipeline with a schedule (every 5 minutes by default).
+
+The schedule is only the tick at which due feeds are checked; each feed's own
+polling interval is managed by the feed registry (see feed_registry_tasks).
+A feed is never polled more often than the tick, so PIPELINE_INTERVAL_MINUTES
+should not exceed FEED_MIN_POLL_SECONDS, or busy feeds can't speed up.
 """
 import os
 import sys
@@ -18,6 +23,8 @@ from prefect.client.schemas.schedules import IntervalSchedule
 from datetime import timedelta
 from app_flows.flows.complete_news_pipeline_flow import complete_news_pipeline_flow
 
+PIPELINE_INTERVAL_MINUTES = int(os.getenv("PIPELINE_INTERVAL_MINUTES", "5"))
+
 async def delete_existing_deployment():
     """Delete existing deployment if it exists."""
     try:
@@ -52,11 +59,11 @@ def deploy_scheduled_flow():
         deployment = Deployment.build_from_flow(
             flow=complete_news_pipeline_flow,
             name="scheduled-news-pipeline",
-            schedules=[IntervalSchedule(interval=timedelta(minutes=15))],
+            schedules=[IntervalSchedule(interval=timedelta(minutes=PIPELINE_INTERVAL_MINUTES))],
             work_queue_name="default",  # Use work queue for agents
             storage=storage,  # Tell agent where code is located
             is_schedule_active=True,
-            description="Automatically collects and processes news articles every 15 minutes",
+            description=f"Automatically collects and processes news articles every {PIPELINE_INTERVAL_MINUTES} minutes",
             path="/usr/src/app",  # Explicit working directory
             entrypoint="app_flows/flows/complete_news_pipeline_flow.py:complete_news_pipeline_flow",
         )
@@ -64,7 +71,7 @@ def deploy_scheduled_flow():
         # Apply the deployment
         deployment_id = deployment.apply()
         print(f"✅ Deployment created with ID: {deployment_id}")
-        print(f"📅 Schedule: Every 15 minutes")
+        print(f"📅 Schedule: Every {PIPELINE_INTERVAL_MINUTES} minutes")
         print(f"🚀 Code location: {project_root} (via volume mount)")
         print(f"🚀 The pipeline will now run automatically!")
 
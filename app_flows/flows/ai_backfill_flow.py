@@ -0,0 +1,175 @@
+"""
+Resumable reprocessing of already-processed articles (e.g. after a model or prompt change).
+"""
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(dotenv_path="/usr/src/app/.env")
+
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from prefect import flow, get_run_logger
+
+# Import tasks (using absolute imports for Prefect deployments)
+from app_flows.flows.ai_processing_flow import AI_COMBINED_MODE
+from app_flows.tasks.ai_engine_tasks import process_articles_concurrently_task
+from app_flows.tasks.backfill_tasks import (
+    BACKFILL_BATCH_SIZE,
+    backfill_params,
+    complete_backfill_task,
+    load_backfill_checkpoint_task,
+    save_backfill_batch_task,
+    select_backfill_batch_task,
+)
+from app_flows.tasks.llm_metrics_tasks import report_llm_call_metrics_task
+from app_flows.utils.article_leases import count_leased_articles
+from app_flows.utils.rate_limiter import OPENROUTER_RPM, OPENROUTER_TPM, get_rate_limiter
+
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "16"))
+# Share of OPENROUTER_RPM / OPENROUTER_TPM a backfill may use; the rest stays free for the live pipeline
+BACKFILL_RATE_SHARE = float(os.getenv("BACKFILL_RATE_SHARE", "0.5"))
+# While live AI work holds article leases, check again after this long instead of starting a batch
+BACKFILL_YIELD_SECONDS = float(os.getenv("BACKFILL_YIELD_SECONDS", "30"))
+
+
+def _wait_for_live_work(logger) -> None:
+    """Hold the next batch back while scheduled or streaming AI runs have articles leased"""
+    waited = 0.0
+    while True:
+        try:
+            leased = count_leased_articles()
+        except Exception as e:
+            logger.warning(f"Could not check for live AI work: {e}")
+            return
+        if not leased:
+            if waited:
+                logger.info(f"Live AI work finished, resuming backfill after {waited:.0f}s")
+            return
+        if not waited:
+            logger.info(f"{leased} articles are being processed live, pausing backfill")
+        time.sleep(BACKFILL_YIELD_SECONDS)
+        waited += BACKFILL_YIELD_SECONDS
+
+
+@flow(name="ai-backfill-flow")
+def ai_backfill_flow(
+    name: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    categories: Optional[List[str]] = None,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    concurrency: int = BACKFILL_CONCURRENCY,
+    combined: bool = AI_COMBINED_MODE,
+    max_batches: Optional[int] = None,
+):
+    """
+    Reprocess historical articles with the current model chain and prompts.
+
+    This flow:
+    1. Starts the backfill ``name`` or resumes it from its checkpoint
+    2. Pages through processed articles (optionally only those stored between
+       ``since`` and ``until``, or with any of ``categories``)
+    3. Reruns each page through the concurrent AI engine, bypassing the LLM
+       cache (new responses are still cached), on BACKFILL_RATE_SHARE of the
+       OpenRouter rate limits and pausing while live AI runs hold leases
+    4. Saves the previous output to filtered_article_versions, writes the new
+       one and advances the checkpoint in the same transaction
+
+    Run it in its own process (a separate flow run or the command line): the
+    reduced rate limits apply to the whole process while the backfill runs,
+    and the previous limits are restored when it stops.
+
+    Args:
+        name: Backfill name; running the same name again resumes it
+        since: Only articles stored at or after this time
+        until: Only articles stored before this time
+        categories: Only articles with at least one of these categories
+        batch_size: Articles per page (and per checkpoint)
+        concurrency: Articles in flight at once in the AI engine
+        combined: Use a single summarize+categorize request per article
+        max_batches: Stop after this many pages (the backfill stays resumable)
+
+    Returns:
+        Backfill counts (articles done and failed, in total)
+    """
+    logger = get_run_logger()
+    logger.info(f"Starting AI backfill flow '{name}'")
+
+    checkpoint = load_backfill_checkpoint_task(name, backfill_params(since, until, categories))
+    if checkpoint["status"] == "completed":
+        logger.info(f"Backfill '{name}' is already completed")
+        return {"articles_done": checkpoint["articles_done"], "articles_failed": checkpoint["articles_failed"]}
+
+    totals = {"articles_done": checkpoint["articles_done"], "articles_failed": checkpoint["articles_failed"]}
+    batches = 0
+    completed = False
+
+    # Run on a share of the process-wide limits, and give the full limits back afterwards
+    limiter = get_rate_limiter()
+    previous_limits = (limiter.requests_per_minute, limiter.tokens_per_minute)
+    limiter.set_limits(OPENROUTER_RPM * BACKFILL_RATE_SHARE, OPENROUTER_TPM * BACKFILL_RATE_SHARE)
+    try:
+        while max_batches is None or batches < max_batches:
+            last_raw_id, articles = select_backfill_batch_task(checkpoint, batch_size)
+            if last_raw_id is None:
+                totals = complete_backfill_task(name)
+                completed = True
+                break
+
+            results = {}
+            if articles:
+                _wait_for_live_work(logger)
+                # Bypass the LLM cache: it would hand back the previous model's (or prompt's) output
+                results = process_articles_concurrently_task(
+                    articles, combined=combined, concurrency=concurrency, use_cache=False
+                )
+
+            failed = len(articles) - len(results)
+            rewritten = save_backfill_batch_task(name, results, last_raw_id, failed=failed)
+            totals["articles_done"] += rewritten
+            totals["articles_failed"] += len(articles) - rewritten
+            checkpoint["last_raw_article_id"] = last_raw_id
+            batches += 1
+    finally:
+        limiter.set_limits(*previous_limits)
+
+    if completed:
+        logger.info(f"Backfill '{name}' completed: {totals}")
+    else:
+        logger.info(f"Backfill '{name}' paused after {batches} batches ({totals}); run it again to resume")
+
+    # Latency, tokens and cost of the backfill's LLM calls (also attached as a Prefect artifact)
+    try:
+        report_llm_call_metrics_task()
+    except Exception as e:
+        logger.error(f"Failed to report LLM call metrics: {e}")
+
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reprocess already-processed articles with the current model and prompts")
+    parser.add_argument("name", help="Backfill name (rerun the same name to resume)")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Only articles stored at or after this ISO date")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="Only articles stored before this ISO date")
+    parser.add_argument("--categories", default=None, help="Comma-separated categories (any match)")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=BACKFILL_CONCURRENCY)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    result = ai_backfill_flow(
+        args.name,
+        since=args.since,
+        until=args.until,
+        categories=[c.strip() for c in args.categories.split(",")] if args.categories else None,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        max_batches=args.max_batches,
+    )
+    print(f"AI backfill flow completed with result: {result}")
@@ -0,0 +1,89 @@
+"""
+Time-budgeted AI processing of the unprocessed backlog.
+"""
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(dotenv_path="/usr/src/app/.env")
+
+import time
+
+from prefect import flow, get_run_logger
+
+# Import flows and helpers (using absolute imports for Prefect deployments)
+from app_flows.flows.ai_processing_flow import ai_processing_flow
+from app_flows.utils.article_leases import count_claimable_articles
+from app_flows.utils.batch_planner import AI_RUN_BUDGET_SECONDS, get_throughput_estimator, plan_batch_size
+from app_flows.utils.db_pool import advisory_lock
+
+# Advisory lock that keeps overlapping scheduled runs from draining the backlog at the same time
+AI_BACKLOG_LOCK = "ai-backlog-flow"
+
+
+@flow(name="ai-backlog-flow")
+def ai_backlog_flow(budget_seconds: float = AI_RUN_BUDGET_SECONDS):
+    """
+    Drain the unprocessed backlog within a wall-clock budget.
+
+    This flow:
+    1. Takes the ai-backlog-flow advisory lock (skips the run if an earlier
+       scheduled run still holds it)
+    2. Sizes each batch from the claimable backlog (processed_at IS NULL, not
+       leased, backing off or parked), the time left and the measured seconds
+       per article
+    3. Runs ai_processing_flow batch after batch until the backlog is empty,
+       the budget is spent or a batch leaves the queue unchanged (articles
+       that fail back off and are parked after AI_MAX_ATTEMPTS, so they don't
+       hold up newer ones)
+
+    Args:
+        budget_seconds: Wall-clock seconds this run may spend on AI processing
+
+    Returns:
+        Number of articles successfully processed
+    """
+    logger = get_run_logger()
+    started = time.monotonic()
+    estimator = get_throughput_estimator()
+    total_processed = 0
+
+    with advisory_lock(AI_BACKLOG_LOCK) as acquired:
+        if not acquired:
+            logger.info("Another AI backlog run is still in progress, skipping")
+            return 0
+
+        while True:
+            remaining = budget_seconds - (time.monotonic() - started)
+            backlog = count_claimable_articles()
+            batch_size = plan_batch_size(backlog, remaining, estimator.seconds_per_article)
+            if batch_size == 0:
+                if backlog:
+                    logger.info(f"Time budget spent, {backlog} articles left for the next run")
+                break
+
+            logger.info(
+                f"Backlog {backlog} articles, {remaining:.0f}s left at "
+                f"{estimator.seconds_per_article:.2f}s/article: processing {batch_size}"
+            )
+            batch_started = time.monotonic()
+            processed = ai_processing_flow(limit=batch_size)
+            estimator.record_batch(processed, time.monotonic() - batch_started)
+            total_processed += processed
+
+            # Failed articles back off (or are parked) on release, so the next batch moves on to
+            # newer ones. Stop only if nothing left the queue, e.g. when claiming itself fails
+            if processed == 0 and count_claimable_articles() >= backlog:
+                logger.warning("Batch made no progress, stopping")
+                break
+
+    logger.info(
+        f"AI backlog flow completed: {total_processed} articles processed in "
+        f"{time.monotonic() - started:.0f}s ({estimator.seconds_per_article:.2f}s/article)"
+    )
+    return total_processed
+
+
+if __name__ == "__main__":
+    # For local testing
+    result = ai_backlog_flow()
+    print(f"AI backlog flow completed with result: {result}")
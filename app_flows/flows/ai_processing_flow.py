@@ -8,25 +8,70 @@ load_dotenv(dotenv_path="/usr/src/app/.env")
 
 from prefect import flow, get_run_logger
 import os
+from typing import Any, Dict, List
 
 # Import tasks (using absolute imports for Prefect deployments)
-from app_flows.tasks.llm_tasks import summarize_article_task, keep_original_title_task, categorize_article_task
-from app_flows.tasks.filtered_db_tasks import get_unprocessed_articles_task, save_filtered_article_task
+from app_flows.tasks.llm_tasks import (
+    summarize_article_task,
+    keep_original_title_task,
+    categorize_article_task,
+    summarize_and_categorize_task,
+)
+from app_flows.tasks.ai_engine_tasks import AI_MAX_CONCURRENCY, process_articles_concurrently_task
+from app_flows.tasks.filtered_db_tasks import (
+    FILTERED_WRITE_BATCH_SIZE,
+    get_unprocessed_articles_task,
+    reconcile_saved_articles_task,
+    release_article_leases_task,
+    save_filtered_articles_task,
+)
+from app_flows.tasks.dedup_tasks import find_near_duplicates_task, link_duplicate_articles_task
+from app_flows.tasks.llm_metrics_tasks import report_llm_call_metrics_task
+from app_flows.utils.article_leases import LeaseHeartbeat, new_worker_id
+from app_flows.utils.db_pool import raw_db_connection
+from app_flows.utils.llm_cache import get_llm_cache
+from app_flows.utils.model_router import get_model_router
+from app_flows.utils.category_classifier import get_category_classifier
+
+# Summarize and categorize with one request per article instead of two
+AI_COMBINED_MODE = os.getenv("AI_COMBINED_MODE", "true").lower() in ("1", "true", "yes")
+
+
+def _flush_saves(pending_rows: List[Dict[str, Any]], logger) -> List[int]:
+    """Write buffered results in one batch; returns the raw ids that were saved"""
+    if not pending_rows:
+        return []
+    batch = list(pending_rows)
+    pending_rows.clear()
+    try:
+        save_filtered_articles_task(batch)
+    except Exception as e:
+        logger.error(f"Failed to save {len(batch)} processed articles: {e}")
+        return []
+    return [row["raw_article_id"] for row in batch]
 
 
 @flow(name="ai-processing-flow", retries=1)
-def ai_processing_flow(limit: int = 20):
+def ai_processing_flow(limit: int = 20, combined: bool = AI_COMBINED_MODE, concurrency: int = AI_MAX_CONCURRENCY):
     """
     Main flow for processing raw English news articles with AI.
 
     This flow:
-    1. Fetches unprocessed articles from raw_db
-    2. Summarizes articles in English using OpenRouter AI
-    3. Keeps original English titles
-    4. Saves processed results to filtered_db
+    1. Claims unprocessed articles from raw_db (SKIP LOCKED leases, so
+       several workers can run side by side without duplicating work)
+    2. Links near-duplicates of already-summarized stories instead of re-summarizing them
+    3. Summarizes and categorizes articles in English using OpenRouter AI
+       (routed to the fastest healthy model in OPENROUTER_MODELS)
+    4. Keeps original English titles
+    5. Saves processed results in batches (filtered_db upsert + raw_db processed marker)
+    6. Reports latency, tokens and cost of the run's LLM calls
 
     Args:
         limit: Maximum number of articles to process in this run
+        combined: Use a single summarize+categorize request per article
+            (falls back to separate calls if the JSON response is unusable)
+        concurrency: Articles in flight at once in the async AI engine
+            (1 processes articles one at a time with Prefect tasks)
 
     Returns:
         Number of articles successfully processed
@@ -34,73 +79,154 @@ def ai_processing_flow(limit: int = 20):
     logger = get_run_logger()
     logger.info("Starting AI processing flow")
 
-    # Get unprocessed articles
-    unprocessed_articles = get_unprocessed_articles_task(limit=limit)
+    # Claim unprocessed articles (leased to this run, skipped by concurrent workers)
+    worker_id = new_worker_id()
+    unprocessed_articles = get_unprocessed_articles_task(limit=limit, worker_id=worker_id)
+
+    # A save interrupted between its two commits only needs its processed marker
+    if unprocessed_articles:
+        already_saved = set(reconcile_saved_articles_task([raw_id for raw_id, _, _ in unprocessed_articles]))
+        unprocessed_articles = [article for article in unprocessed_articles if article[0] not in already_saved]
 
     if not unprocessed_articles:
         logger.info("No unprocessed articles found")
         return 0
 
-    processed_count = 0
+    raw_ids = [raw_id for raw_id, _, _ in unprocessed_articles]
+    processed_ids = set()
+    # Results are buffered and written FILTERED_WRITE_BATCH_SIZE at a time
+    pending_rows: List[Dict[str, Any]] = []
 
-    # Process each article
-    for raw_id, title, body_html in unprocessed_articles:
-        try:
-            logger.info(f"Processing article {raw_id}: {title[:50]}...")
-
-            # Submit AI tasks in parallel for better performance
-            summary_task = summarize_article_task.submit(body_html, target_lang="en")
-            title_task = keep_original_title_task.submit(title)
-
-            # Wait for results
-            summary = summary_task.result()
-            original_title = title_task.result()
-
-            # Save to filtered database
-            if summary:  # Only save if we have a summary
-                categories_task = categorize_article_task.submit(summary)
-                categories = categories_task.result()
-
-                # Get image_url from raw article
-                image_url = None
-                try:
-                    # Connect to raw_db to get image_url
-                    import psycopg2
-                    raw_conn = psycopg2.connect(
-                        host=os.getenv("POSTGRES_HOST"),
-                        port=os.getenv("POSTGRES_PORT"),
-                        database="raw_db",
-                        user="raw_db",
-                        password=os.getenv("POSTGRES_DEFAULT_USER_PASSWORD")
-                    )
-                    with raw_conn.cursor() as cursor:
-                        cursor.execute("SELECT image_url FROM raw_articles WHERE id = %s", (raw_id,))
-                        result = cursor.fetchone()
-                        if result:
-                            image_url = result[0]
-                    raw_conn.close()
-                except Exception as e:
-                    logger.warning(f"Could not fetch image_url for article {raw_id}: {e}")
-
-                save_filtered_article_task.submit(
-                    raw_article_id=raw_id,
-                    content_summary=summary,
-                    title_translated=original_title,
-                    image_url=image_url,
-                    ai_model_used=os.getenv("OPENROUTER_MODEL"),
-                    categories=categories
-                )
-                processed_count += 1
-                logger.info(f"Successfully processed article {raw_id}")
-            else:
-                logger.warning(f"Skipping article {raw_id} - no summary generated")
+    # Keep the claimed articles leased to this run while it works on them
+    heartbeat = LeaseHeartbeat(raw_ids, worker_id).start()
+    try:
+        # Syndicated copies of the same story only need one LLM pass
+        duplicates = find_near_duplicates_task(raw_ids)
 
-        except Exception as e:
-            logger.error(f"Failed to process article {raw_id}: {e}")
-            continue
+        candidates = [article for article in unprocessed_articles if article[0] not in duplicates]
 
-    logger.info(f"AI processing flow completed: {processed_count} articles processed")
-    return processed_count
+        # Image URLs for the whole batch in one query
+        image_urls = {}
+        try:
+            with raw_db_connection() as raw_conn:
+                with raw_conn.cursor() as cursor:
+                    cursor.execute("SELECT id, image_url FROM raw_articles WHERE id = ANY(%s)", (raw_ids,))
+                    image_urls = dict(cursor.fetchall())
+        except Exception as e:
+            logger.warning(f"Could not fetch image URLs: {e}")
+
+        # Run the LLM calls for the whole batch concurrently, bounded by the provider's rate limits
+        engine_results = None
+        if concurrency > 1 and candidates:
+            engine_results = process_articles_concurrently_task(
+                [(raw_id, clean_text) for raw_id, _, clean_text in candidates],
+                combined=combined,
+                concurrency=concurrency,
+            )
+
+        # Process each article
+        for raw_id, title, clean_text in candidates:
+            try:
+                logger.info(f"Processing article {raw_id}: {title[:50]}...")
+
+                if engine_results is not None:
+                    if raw_id not in engine_results:
+                        logger.warning(f"Skipping article {raw_id} - AI engine failed")
+                        continue
+                    summary, categories, categories_source, model_used = engine_results[raw_id]
+                    original_title = keep_original_title_task(title)
+                else:
+                    # Submit AI tasks in parallel for better performance
+                    if combined:
+                        summary_task = summarize_and_categorize_task.submit(clean_text)
+                    else:
+                        summary_task = summarize_article_task.submit(clean_text, target_lang="en")
+                    title_task = keep_original_title_task.submit(title)
+
+                    # Wait for results
+                    if combined:
+                        summary, categories, model_used = summary_task.result()
+                    else:
+                        summary, model_used = summary_task.result()
+                        categories = None
+                    categories_source = "llm"
+                    original_title = title_task.result()
+
+                # Save to filtered database
+                if summary:  # Only save if we have a summary
+                    if categories is None:
+                        # Local classifier first; only low-confidence summaries cost an LLM call
+                        classifier = get_category_classifier()
+                        categories = classifier.predict(summary) if classifier is not None else None
+                        if categories is not None:
+                            categories_source = "local"
+                            logger.info(f"Categorized article {raw_id} locally: {categories}")
+                        else:
+                            categories_task = categorize_article_task.submit(summary)
+                            categories = categories_task.result()
+
+                    pending_rows.append({
+                        "raw_article_id": raw_id,
+                        "content_summary": summary,
+                        "title_translated": original_title,
+                        "image_url": image_urls.get(raw_id),
+                        "ai_model_used": model_used,
+                        "categories": categories,
+                        "categories_source": categories_source,
+                    })
+                    logger.info(f"Successfully processed article {raw_id}")
+                    if len(pending_rows) >= FILTERED_WRITE_BATCH_SIZE:
+                        processed_ids.update(_flush_saves(pending_rows, logger))
+                else:
+                    logger.warning(f"Skipping article {raw_id} - no summary generated")
+
+            except Exception as e:
+                logger.error(f"Failed to process article {raw_id}: {e}")
+                continue
+
+        processed_ids.update(_flush_saves(pending_rows, logger))
+
+        # Link duplicates whose original is summarized (earlier runs, or this batch if it succeeded)
+        batch_ids = set(raw_ids)
+        links = {
+            duplicate_id: original_id
+            for duplicate_id, original_id in duplicates.items()
+            if original_id in processed_ids or original_id not in batch_ids
+        }
+        if links:
+            try:
+                link_duplicate_articles_task(links)
+            except Exception as e:
+                logger.error(f"Failed to link near-duplicate articles: {e}")
+    finally:
+        # Whatever is still buffered after an error is written before the leases go
+        processed_ids.update(_flush_saves(pending_rows, logger))
+        heartbeat.stop()
+        # Articles this run did not finish are retried by a later run after a backoff (or parked)
+        try:
+            release_article_leases_task(raw_ids, worker_id)
+        except Exception as e:
+            logger.error(f"Failed to release article leases (they expire after AI_LEASE_SECONDS): {e}")
+
+    cache_stats = get_llm_cache().stats()
+    logger.info(
+        f"LLM cache: {cache_stats['memory_hits'] + cache_stats['db_hits']} hits, {cache_stats['misses']} misses "
+        f"(hit rate {cache_stats['hit_rate']:.0%})"
+    )
+    for model, health in get_model_router().stats().items():
+        logger.info(
+            f"Model {model}: {health['calls']} calls, latency {health['latency_seconds']}s, "
+            f"error rate {health['error_rate']:.0%}, circuit {health['circuit']}"
+        )
+
+    # Latency, tokens and cost of this run's LLM calls (also attached as a Prefect artifact)
+    try:
+        report_llm_call_metrics_task()
+    except Exception as e:
+        logger.error(f"Failed to report LLM call metrics: {e}")
+
+    logger.info(f"AI processing flow completed: {len(processed_ids)} articles processed")
+    return len(processed_ids)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+"""
+Offline retraining of the local category classifier from filtered_db history.
+"""
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(dotenv_path="/usr/src/app/.env")
+
+from prefect import flow, get_run_logger
+
+# Import tasks (using absolute imports for Prefect deployments)
+from app_flows.tasks.category_classifier_tasks import (
+    CATEGORY_TRAINING_MAX_ROWS,
+    load_category_training_data_task,
+    train_category_classifier_task,
+)
+
+
+@flow(name="category-classifier-training-flow")
+def category_classifier_training_flow(max_rows: int = CATEGORY_TRAINING_MAX_ROWS):
+    """
+    Retrain the local category classifier.
+
+    This flow:
+    1. Loads recent LLM-labelled summaries from filtered_db
+    2. Trains the TF-IDF + logistic regression model and evaluates it on a held-out slice
+    3. Saves it to CATEGORY_MODEL_PATH, where running AI flows pick it up,
+       unless it misses the minimum precision or coverage
+
+    Args:
+        max_rows: Maximum number of labelled summaries to train on
+
+    Returns:
+        Training report
+    """
+    logger = get_run_logger()
+    logger.info("Starting category classifier training flow")
+
+    rows = load_category_training_data_task(limit=max_rows)
+    report = train_category_classifier_task(rows)
+
+    logger.info(f"Category classifier training completed: {report}")
+    return report
+
+
+if __name__ == "__main__":
+    # For local testing
+    result = category_classifier_training_flow()
+    print(f"Category classifier training completed with result: {result}")
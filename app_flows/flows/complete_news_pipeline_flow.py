@@ -13,7 +13,8 @@ import sys
 import os
 sys.path.insert(0, '/usr/src/app')
 from app_flows.flows.news_collection_flow import news_collection_flow
-from app_flows.flows.ai_processing_flow import ai_processing_flow
+from app_flows.flows.ai_backlog_flow import ai_backlog_flow
+from app_flows.flows.raw_storage_maintenance_flow import raw_storage_maintenance_flow
 
 
 @flow(name="complete-news-pipeline", retries=1)
@@ -21,8 +22,11 @@ def complete_news_pipeline_flow():
     """
     Complete news processing pipeline that:
     1. Collects fresh English news articles from RSS feeds
-    2. Processes them with AI for English summarization
+    2. Processes the unprocessed backlog with AI for English summarization,
+       within the AI_RUN_BUDGET_SECONDS time budget (older and previously
+       failed articles included, even when nothing new was collected)
     3. Saves results to filtered database
+    4. Keeps raw_db tiered (partitions ahead, old bodies archived)
 
     This flow orchestrates the entire news AI pipeline.
 
@@ -36,13 +40,16 @@ def complete_news_pipeline_flow():
     logger.info("📡 Phase 1: Collecting news articles...")
     articles_collected = news_collection_flow()
 
-    if articles_collected == 0:
-        logger.info("No new articles collected, skipping AI processing")
-        return (0, 0)
-
-    # Step 2: Process with AI
+    # Step 2: Process with AI (the whole backlog, not just this collection pass)
     logger.info("🤖 Phase 2: Processing articles with AI...")
-    articles_processed = ai_processing_flow(limit=articles_collected)
+    articles_processed = ai_backlog_flow()
+
+    # Step 3: Storage maintenance (a failure here must not fail the pipeline)
+    logger.info("🗄️ Phase 3: Raw storage maintenance...")
+    try:
+        raw_storage_maintenance_flow()
+    except Exception as e:
+        logger.error(f"Raw storage maintenance failed: {e}")
 
     logger.info(f"✅ Pipeline completed: {articles_collected} collected, {articles_processed} processed")
     return (articles_collected, articles_processed)
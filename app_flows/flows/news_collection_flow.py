@@ -9,11 +9,15 @@ load_dotenv(dotenv_path="/usr/src/app/.env")
 from prefect import flow, get_run_logger
 
 # Use absolute imports for Prefect deployments
-from app_flows.tasks.rss_tasks import fetch_rss_feed_task
+from app_flows.tasks.rss_tasks import collect_rss_feed_task, fetch_rss_feed_task, record_feed_state
 from app_flows.tasks.database_tasks import save_articles_to_database_task
+from app_flows.tasks.feed_registry_tasks import get_due_feeds_task, record_feed_polls_task
+from app_flows.utils.fetch_scheduler import get_fetch_scheduler
+from app_flows.utils.page_cache import get_page_cache
 
 
-# Define RSS feeds to monitor
+# RSS feeds to monitor. These seed the raw_db.feeds registry (new entries are
+# registered on the next run) and are polled directly if the registry is down.
 RSS_FEEDS = [
     {
         "url": "https://rss.nytimes.com/services/xml/rss/nyt/World.xml",
@@ -36,19 +40,22 @@ RSS_FEEDS = [
 
 
 @flow(name="news-collection-flow", retries=1)
-def news_collection_flow():
+def news_collection_flow(streaming: bool = True):
     """
     Main flow for collecting news articles from RSS feeds.
 
     This flow:
-    1. Fetches articles from multiple RSS feeds in parallel
-    2. Saves new articles to the raw_db database (deduplicating by fingerprint)
-    3. Logs the results
+    1. Picks the feeds that are due from the feed registry
+    2. Fetches articles from those RSS feeds in parallel
+    3. Saves new articles to the raw_db database (deduplicating by fingerprint)
+    4. Reschedules each feed based on how many new items it produced
 
-    Future scheduling: Add schedule parameter for automatic runs:
-    @flow(name="news-collection-flow",
-          retries=1,
-          schedule=IntervalSchedule(interval=timedelta(hours=1)))
+    In streaming mode (default) each feed task writes its articles in small
+    batches as their full text arrives, instead of collecting every feed into
+    memory and saving them all at the end.
+
+    Args:
+        streaming: Write articles per feed in small batches as they arrive
 
     Returns:
         Number of new articles saved
@@ -56,17 +63,71 @@ def news_collection_flow():
     logger = get_run_logger()
     logger.info("Starting news collection flow")
 
-    # Fetch articles from all RSS feeds in parallel
-    rss_tasks = []
-    for feed in RSS_FEEDS:
-        task = fetch_rss_feed_task(feed["url"], feed["name"])
-        rss_tasks.append(task)
-
-    # Wait for all RSS fetching to complete
-    logger.info(f"Fetching articles from {len(RSS_FEEDS)} RSS feeds")
-
-    # Save all articles to database (this will deduplicate automatically)
-    saved_count = save_articles_to_database_task(rss_tasks)
+    use_registry = True
+    try:
+        feeds = get_due_feeds_task(seed_feeds=RSS_FEEDS)
+    except Exception as e:
+        logger.warning(f"Feed registry unavailable, polling all configured feeds: {e}")
+        feeds = RSS_FEEDS
+        use_registry = False
+
+    if not feeds:
+        logger.info("No feeds due for polling")
+        return 0
+
+    logger.info(f"Fetching articles from {len(feeds)} RSS feeds")
+
+    polls = []
+    if streaming:
+        # Each feed streams into the database on its own; one failing feed doesn't stop the others
+        futures = [collect_rss_feed_task.submit(feed["url"], feed["name"]) for feed in feeds]
+        saved_count = 0
+        for feed, future in zip(feeds, futures):
+            result = future.result(raise_on_failure=False)
+            if isinstance(result, Exception):
+                logger.error(f"Collection failed for feed {feed['name']}: {result}")
+                polls.append({"url": feed["url"], "new_items": 0, "failed": True})
+                continue
+            saved_count += result
+            polls.append({"url": feed["url"], "new_items": result, "failed": False})
+    else:
+        # Fetch articles from all RSS feeds
+        rss_tasks = []
+        feed_states = []
+        for feed in feeds:
+            articles, feed_state = fetch_rss_feed_task(feed["url"], feed["name"])
+            rss_tasks.append(articles)
+            if feed_state is not None:
+                feed_states.append((feed["url"], feed_state))
+            # Already-stored entries are filtered out during fetching, so this counts new items
+            polls.append({"url": feed["url"], "new_items": len(articles), "failed": False})
+
+        # Save all articles to database (this will deduplicate automatically)
+        saved_count = save_articles_to_database_task(rss_tasks)
+
+        # Only now that the articles are stored may the next poll skip these feed versions
+        for feed_url, feed_state in feed_states:
+            record_feed_state(logger, feed_url, feed_state, changed=True)
+
+    if use_registry:
+        try:
+            record_feed_polls_task(polls)
+        except Exception as e:
+            logger.warning(f"Could not update feed schedules: {e}")
+
+    cache_stats = get_page_cache().stats()
+    logger.info(
+        f"Page cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+        f"(hit rate {cache_stats['hit_rate']:.0%}), {cache_stats['evictions']} evictions"
+    )
+
+    for host, stats in get_fetch_scheduler().report().items():
+        logger.info(
+            f"Host {host}: {stats['requests']} requests, {stats['successes']} ok, "
+            f"{stats['throttled']} throttled, {stats['server_errors']} 5xx, {stats['other_errors']} errors, "
+            f"{stats['skipped']} skipped, avg latency {stats['avg_latency_ms']} ms, "
+            f"concurrency {stats['concurrency']}, delay {stats['delay_seconds']}s"
+        )
 
     logger.info(f"News collection flow completed: {saved_count} new articles saved")
     return saved_count
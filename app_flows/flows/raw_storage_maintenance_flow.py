@@ -0,0 +1,48 @@
+"""
+Storage tiering maintenance for raw_db: partitions ahead and cold body archive.
+"""
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(dotenv_path="/usr/src/app/.env")
+
+from prefect import flow, get_run_logger
+
+# Import tasks (using absolute imports for Prefect deployments)
+from app_flows.tasks.storage_tasks import (
+    RAW_BODY_RETENTION_DAYS,
+    archive_raw_bodies_task,
+    ensure_raw_partitions_task,
+)
+
+
+@flow(name="raw-storage-maintenance-flow")
+def raw_storage_maintenance_flow(retention_days: int = RAW_BODY_RETENTION_DAYS):
+    """
+    Keep raw_articles tiered.
+
+    This flow:
+    1. Creates the monthly raw_articles partitions for the coming months
+    2. Moves bodies of processed articles older than ``retention_days`` into
+       the compressed raw_article_archive table
+
+    Args:
+        retention_days: Age after which processed bodies are archived
+
+    Returns:
+        Archive counts (articles, original and compressed bytes)
+    """
+    logger = get_run_logger()
+    logger.info("Starting raw storage maintenance flow")
+
+    ensure_raw_partitions_task()
+    archived = archive_raw_bodies_task(retention_days=retention_days)
+
+    logger.info(f"Raw storage maintenance completed: {archived}")
+    return archived
+
+
+if __name__ == "__main__":
+    # For local testing
+    result = raw_storage_maintenance_flow()
+    print(f"Raw storage maintenance completed with result: {result}")
@@ -0,0 +1,180 @@
+"""
+Concurrent AI processing engine.
+
+Summarizes and categorizes a whole batch of articles with many requests in
+flight at once (AsyncOpenAI, capped by AI_MAX_CONCURRENCY), while the shared
+token-bucket limiter keeps the batch inside OpenRouter's requests-per-minute
+and tokens-per-minute limits. Throughput is then bounded by the provider's
+rate limit instead of by one round-trip per article.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from openai import AsyncOpenAI
+from prefect import task, get_run_logger
+
+from app_flows.tasks.llm_tasks import (
+    _category_request,
+    _chat_completion_async,
+    _combined_request,
+    _parse_categories,
+    _parse_combined,
+    _reduce_request,
+    _summarize_chunks_async,
+    _summary_request,
+    new_async_client,
+)
+from app_flows.utils.category_classifier import get_category_classifier
+from app_flows.utils.rate_limiter import get_rate_limiter
+from app_flows.utils.token_budget import plan_summary_input
+
+
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+# Per-article attempts (on top of the OpenAI client's own 429/5xx retries)
+AI_ENGINE_ATTEMPTS = int(os.getenv("AI_ENGINE_ATTEMPTS", "3"))
+AI_ENGINE_RETRY_DELAY_SECONDS = float(os.getenv("AI_ENGINE_RETRY_DELAY_SECONDS", "10"))
+
+
+async def _process_article(
+    clean_text: str, combined: bool, async_client: AsyncOpenAI, logger, use_cache: bool = True
+) -> Tuple[Optional[str], Optional[List[str]], Optional[str]]:
+    """
+    Summary (and, in combined mode, categories) for one article, using the
+    same prompts and fallbacks as the sync tasks, plus the model that wrote
+    the summary. Categories are None when they still have to be assigned
+    separately.
+    """
+    if len(clean_text or "") < 50:
+        return None, [], None
+
+    # Long articles are summarized chunk by chunk in parallel, then reduced
+    chunks = plan_summary_input(clean_text)
+    partials = await _summarize_chunks_async(chunks, async_client, use_cache) if len(chunks) > 1 else None
+
+    if combined:
+        request = _reduce_request(partials, combined=True) if partials else _combined_request(clean_text)
+        try:
+            raw_output, model = await _chat_completion_async(request, async_client, use_cache)
+            parsed = _parse_combined(raw_output)
+        except Exception as e:
+            logger.warning(f"Combined request failed, falling back to separate calls: {e}")
+            parsed = None
+        if parsed is not None:
+            return parsed[0], parsed[1], model
+
+    request = _reduce_request(partials) if partials else _summary_request(clean_text)
+    summary, model = await _chat_completion_async(request, async_client, use_cache)
+    if len(summary) <= 20:
+        return None, [], None
+    return summary, None, model
+
+
+async def _categorize(summary: str, async_client: AsyncOpenAI, logger, use_cache: bool = True) -> List[str]:
+    try:
+        raw_output, _ = await _chat_completion_async(_category_request(summary), async_client, use_cache)
+        return _parse_categories(raw_output)
+    except Exception as e:
+        logger.error(f"Failed to categorize article: {e}")
+        return []
+
+
+async def _run_engine(
+    articles: List[Tuple[int, str]], combined: bool, concurrency: int, logger, use_cache: bool = True
+) -> Dict[int, Tuple[Optional[str], List[str], Optional[str], Optional[str]]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    summaries: Dict[int, Tuple[Optional[str], Optional[List[str]], Optional[str]]] = {}
+    results: Dict[int, Tuple[Optional[str], List[str], Optional[str], Optional[str]]] = {}
+
+    async with new_async_client() as async_client:
+
+        async def worker(raw_id: int, clean_text: str) -> None:
+            async with semaphore:
+                for attempt in range(1, AI_ENGINE_ATTEMPTS + 1):
+                    try:
+                        summaries[raw_id] = await _process_article(clean_text, combined, async_client, logger, use_cache)
+                        return
+                    except Exception as e:
+                        if attempt == AI_ENGINE_ATTEMPTS:
+                            logger.error(f"Failed to process article {raw_id} after {attempt} attempts: {e}")
+                            return
+                        logger.warning(f"Article {raw_id} attempt {attempt} failed, retrying: {e}")
+                        await asyncio.sleep(AI_ENGINE_RETRY_DELAY_SECONDS * attempt)
+
+        await asyncio.gather(*(worker(raw_id, clean_text) for raw_id, clean_text in articles))
+
+        # Categorize the remaining summaries locally in one batch; only low-confidence ones go to the LLM
+        pending = []
+        for raw_id, (summary, categories, model) in summaries.items():
+            if categories is not None:
+                results[raw_id] = (summary, categories, "llm" if summary else None, model)
+            else:
+                pending.append((raw_id, summary, model))
+
+        classifier = get_category_classifier()
+        if classifier is not None and pending:
+            predictions = classifier.predict_batch([summary for _, summary, _ in pending])
+            for (raw_id, summary, model), predicted in zip(pending, predictions):
+                if predicted is not None:
+                    results[raw_id] = (summary, predicted, "local", model)
+            pending = [item for item in pending if item[0] not in results]
+            logger.info(
+                f"Category classifier: {len(predictions) - len(pending)}/{len(predictions)} "
+                f"summaries categorized locally, {len(pending)} sent to the LLM"
+            )
+
+        async def categorize_worker(raw_id: int, summary: str, model: str) -> None:
+            async with semaphore:
+                results[raw_id] = (summary, await _categorize(summary, async_client, logger, use_cache), "llm", model)
+
+        await asyncio.gather(*(categorize_worker(*item) for item in pending))
+
+    return results
+
+
+@task
+def process_articles_concurrently_task(
+    articles: List[Tuple[int, str]],
+    combined: bool = True,
+    concurrency: int = AI_MAX_CONCURRENCY,
+    use_cache: bool = True,
+) -> Dict[int, Tuple[Optional[str], List[str], Optional[str], Optional[str]]]:
+    """
+    Summarize and categorize a batch of articles concurrently.
+
+    Summaries that still need categories (separate-call mode, or a combined
+    response that could not be parsed) go through the local category
+    classifier in one batch; only low-confidence ones cost an LLM call.
+
+    Args:
+        articles: (raw_article_id, clean_text) pairs
+        combined: Use one summarize+categorize request per article
+        concurrency: Maximum number of articles in flight
+        use_cache: Reuse cached LLM responses. Backfills pass False so every
+            article is rerun on the current model chain; the fresh responses
+            are still written to the cache
+
+    Returns:
+        Dict mapping raw_article_id to (summary or None, categories,
+        categories source: 'llm' or 'local', model that wrote the summary).
+        Articles that still failed after AI_ENGINE_ATTEMPTS are left out.
+    """
+    logger = get_run_logger()
+    if not articles:
+        return {}
+
+    concurrency = max(1, concurrency)
+    logger.info(f"AI engine: processing {len(articles)} articles with up to {concurrency} in flight")
+
+    started = time.monotonic()
+    results = asyncio.run(_run_engine(articles, combined, concurrency, logger, use_cache))
+    elapsed = time.monotonic() - started
+
+    limiter_stats = get_rate_limiter().stats()
+    logger.info(
+        f"AI engine: {len(results)}/{len(articles)} articles in {elapsed:.1f}s "
+        f"({len(results) / elapsed * 60 if elapsed > 0 else 0:.1f}/min, "
+        f"rate limiter waited {limiter_stats['waited_seconds']}s in total)"
+    )
+    return results
@@ -0,0 +1,232 @@
+"""
+Backfill (reprocessing) tasks for articles that were already processed.
+
+A backfill walks filtered_articles in raw_article_id order, reruns the
+selected articles through the summarize/categorize path and rewrites their
+AI output, keeping the previous output in filtered_article_versions. Its
+position is stored in filtered_db.backfill_checkpoints in the same
+transaction as each batch's results, so a crashed backfill resumes where
+the last committed batch ended.
+"""
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import Json, execute_values
+from prefect import task, get_run_logger
+
+from app_flows.utils.body_archive import load_archived_bodies
+from app_flows.utils.db_pool import filtered_db_connection, raw_db_connection
+from app_flows.utils.text_cleaning import clean_html
+
+
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "100"))
+
+_VERSIONED_COLUMNS = (
+    "raw_article_id",
+    "title_translated",
+    "content_summary",
+    "content_translated",
+    "image_url",
+    "sentiment_score",
+    "categories",
+    "ai_model_used",
+    "categories_source",
+    "processed_at",
+)
+
+
+def backfill_params(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    categories: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Selection parameters as stored in backfill_checkpoints.params"""
+    return {
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+        "categories": sorted(categories) if categories else None,
+    }
+
+
+@task(retries=2, retry_delay_seconds=5)
+def load_backfill_checkpoint_task(name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Start a backfill, or load the checkpoint of an earlier run with the same name.
+
+    A resumed backfill keeps its stored selection; different ``params`` are
+    ignored with a warning, so a resume never skips or mixes articles.
+
+    Returns:
+        Checkpoint row (name, params, last_raw_article_id, articles_done,
+        articles_failed, status)
+    """
+    logger = get_run_logger()
+    with filtered_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO backfill_checkpoints (name, params)
+                VALUES (%s, %s)
+                ON CONFLICT (name) DO NOTHING
+            """, (name, Json(params)))
+            cursor.execute("""
+                SELECT name, params, last_raw_article_id, articles_done, articles_failed, status
+                FROM backfill_checkpoints WHERE name = %s
+            """, (name,))
+            row = cursor.fetchone()
+        conn.commit()
+
+    checkpoint = dict(zip(("name", "params", "last_raw_article_id", "articles_done", "articles_failed", "status"), row))
+    if checkpoint["last_raw_article_id"]:
+        logger.info(
+            f"Resuming backfill '{name}' after raw_article_id {checkpoint['last_raw_article_id']} "
+            f"({checkpoint['articles_done']} done, {checkpoint['articles_failed']} failed, {checkpoint['status']})"
+        )
+        if checkpoint["params"] != params:
+            logger.warning(f"Backfill '{name}' keeps its stored selection {checkpoint['params']}, not {params}")
+    return checkpoint
+
+
+@task(retries=2, retry_delay_seconds=5)
+def select_backfill_batch_task(
+    checkpoint: Dict[str, Any],
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> Tuple[Optional[int], List[Tuple[int, str]]]:
+    """
+    Read the next page of already-processed articles after the checkpoint
+    and load the text of those that match the selection.
+
+    Categories are matched in filtered_db; since/until apply to the raw
+    article's created_at (so only the matching raw_articles partitions are
+    read). Articles without clean_text are cleaned from body_html, or from the
+    compressed archive if the body has been archived.
+
+    Returns:
+        Tuple of (last raw_article_id of the page, or None when the backfill
+        is complete; (raw_article_id, clean_text) pairs to reprocess)
+    """
+    logger = get_run_logger()
+    params = checkpoint["params"]
+
+    with filtered_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT raw_article_id FROM filtered_articles
+                WHERE raw_article_id > %s
+                  AND processing_status = 'completed'
+                  AND (%s::text[] IS NULL OR categories && %s::text[])
+                ORDER BY raw_article_id
+                LIMIT %s
+            """, (checkpoint["last_raw_article_id"], params["categories"], params["categories"], batch_size))
+            page = [row[0] for row in cursor.fetchall()]
+
+    if not page:
+        return None, []
+
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, clean_text, CASE WHEN clean_text IS NULL THEN body_html END
+                FROM raw_articles
+                WHERE id = ANY(%s)
+                  AND created_at >= COALESCE(%s::timestamptz, '-infinity')
+                  AND created_at < COALESCE(%s::timestamptz, 'infinity')
+                ORDER BY id
+            """, (page, params["since"], params["until"]))
+            rows = cursor.fetchall()
+            missing = [raw_id for raw_id, clean_text, body_html in rows if clean_text is None and body_html is None]
+            archived = load_archived_bodies(cursor, missing)
+
+    articles = []
+    for raw_id, clean_text, body_html in rows:
+        if clean_text is None:
+            body_html = body_html if body_html is not None else archived.get(raw_id)
+            if body_html is None:
+                logger.warning(f"Backfill: no text for article {raw_id}, skipping")
+                continue
+            clean_text = clean_html(body_html).text
+        articles.append((raw_id, clean_text))
+
+    return page[-1], articles
+
+
+@task(retries=2, retry_delay_seconds=5)
+def save_backfill_batch_task(
+    name: str,
+    results: Dict[int, Tuple[Optional[str], List[str], Optional[str], Optional[str]]],
+    last_raw_article_id: int,
+    failed: int,
+) -> int:
+    """
+    Write a batch's new AI output and advance the checkpoint, in one
+    filtered_db transaction.
+
+    The current filtered_articles rows are copied to filtered_article_versions
+    first, then their summary, categories, category source and model are
+    replaced. A retry after a failed commit redoes the whole batch.
+
+    Args:
+        name: Backfill name
+        results: AI engine results by raw_article_id (summary, categories,
+            categories source, model); articles without a summary are left as they are
+        last_raw_article_id: Last id of the page (the new checkpoint)
+        failed: Articles of the page that could not be reprocessed
+
+    Returns:
+        Number of articles rewritten
+    """
+    logger = get_run_logger()
+    rows = [
+        (raw_id, summary, categories, categories_source, model)
+        for raw_id, (summary, categories, categories_source, model) in results.items()
+        if summary
+    ]
+    failed += len(results) - len(rows)
+    columns = ", ".join(_VERSIONED_COLUMNS)
+
+    with filtered_db_connection() as conn:
+        with conn.cursor() as cursor:
+            if rows:
+                cursor.execute(f"""
+                    INSERT INTO filtered_article_versions ({columns}, backfill_name)
+                    SELECT {columns}, %s FROM filtered_articles
+                    WHERE raw_article_id = ANY(%s)
+                """, (name, [row[0] for row in rows]))
+                execute_values(cursor, """
+                    UPDATE filtered_articles AS fa
+                    SET content_summary = v.content_summary,
+                        categories = v.categories,
+                        categories_source = v.categories_source,
+                        ai_model_used = v.ai_model_used,
+                        processed_at = NOW()
+                    FROM (VALUES %s) AS v(raw_article_id, content_summary, categories, categories_source, ai_model_used)
+                    WHERE fa.raw_article_id = v.raw_article_id
+                """, rows, template="(%s, %s, %s::text[], %s, %s)", page_size=len(rows))
+            cursor.execute("""
+                UPDATE backfill_checkpoints
+                SET last_raw_article_id = GREATEST(last_raw_article_id, %s),
+                    articles_done = articles_done + %s,
+                    articles_failed = articles_failed + %s,
+                    updated_at = NOW()
+                WHERE name = %s
+            """, (last_raw_article_id, len(rows), failed, name))
+        conn.commit()
+
+    logger.info(f"Backfill '{name}': rewrote {len(rows)} articles ({failed} failed) up to raw_article_id {last_raw_article_id}")
+    return len(rows)
+
+
+@task(retries=2, retry_delay_seconds=5)
+def complete_backfill_task(name: str) -> Dict[str, Any]:
+    """Mark a backfill completed; returns its final counts"""
+    with filtered_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE backfill_checkpoints
+                SET status = 'completed', completed_at = COALESCE(completed_at, NOW()), updated_at = NOW()
+                WHERE name = %s
+                RETURNING articles_done, articles_failed
+            """, (name,))
+            done, failed = cursor.fetchone()
+        conn.commit()
+    return {"articles_done": done, "articles_failed": failed}
@@ -0,0 +1,109 @@
+"""
+Training tasks for the local category classifier (utils/category_classifier.py).
+
+The classifier learns from summaries whose categories were assigned by the
+LLM (filtered_articles.categories_source is 'llm' or NULL for rows stored
+before the classifier existed), so its own predictions never feed back into
+its training data.
+"""
+import os
+import random
+from typing import Any, Dict, List, Tuple
+
+from prefect import task, get_run_logger
+
+from app_flows.tasks.llm_tasks import AVAILABLE_CATEGORIES
+from app_flows.utils.category_classifier import CATEGORY_MODEL_PATH, CategoryClassifier
+from app_flows.utils.db_pool import filtered_db_connection
+
+
+CATEGORY_TRAINING_MAX_ROWS = int(os.getenv("CATEGORY_TRAINING_MAX_ROWS", "20000"))
+# Don't replace the model unless there is at least this much labelled history
+CATEGORY_TRAINING_MIN_ROWS = int(os.getenv("CATEGORY_TRAINING_MIN_ROWS", "200"))
+# Only replace the model if the new one reaches these on the held-out rows
+CATEGORY_MODEL_MIN_PRECISION = float(os.getenv("CATEGORY_MODEL_MIN_PRECISION", "0.8"))
+CATEGORY_MODEL_MIN_COVERAGE = float(os.getenv("CATEGORY_MODEL_MIN_COVERAGE", "0.2"))
+# Share of rows held out to report coverage/precision of the new model
+_HOLDOUT_FRACTION = 0.1
+
+
+@task(retries=1)
+def load_category_training_data_task(limit: int = CATEGORY_TRAINING_MAX_ROWS) -> List[Tuple[str, List[str]]]:
+    """
+    Load the most recent LLM-labelled summaries from filtered_db.
+
+    Args:
+        limit: Maximum number of rows to load
+
+    Returns:
+        List of (summary, categories) pairs
+    """
+    logger = get_run_logger()
+
+    with filtered_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT content_summary, categories
+                FROM filtered_articles
+                WHERE content_summary IS NOT NULL
+                  AND cardinality(categories) > 0
+                  AND COALESCE(categories_source, 'llm') = 'llm'
+                ORDER BY processed_at DESC
+                LIMIT %s
+            """, (limit,))
+            rows = [(summary, list(categories)) for summary, categories in cursor.fetchall()]
+
+    logger.info(f"Loaded {len(rows)} labelled summaries for category classifier training")
+    return rows
+
+
+@task
+def train_category_classifier_task(
+    rows: List[Tuple[str, List[str]]], model_path: str = CATEGORY_MODEL_PATH
+) -> Dict[str, Any]:
+    """
+    Train the classifier, evaluate it on a held-out slice and save it if its
+    top-label precision and coverage reach CATEGORY_MODEL_MIN_PRECISION and
+    CATEGORY_MODEL_MIN_COVERAGE (otherwise the current model file is kept).
+
+    Args:
+        rows: (summary, categories) pairs
+        model_path: Where to write the model
+
+    Returns:
+        Training report (rows, coverage and top-label precision on held-out
+        rows, whether the model was saved)
+    """
+    logger = get_run_logger()
+
+    if len(rows) < CATEGORY_TRAINING_MIN_ROWS:
+        logger.warning(
+            f"Only {len(rows)} labelled summaries (need {CATEGORY_TRAINING_MIN_ROWS}), keeping the current model"
+        )
+        return {"rows": len(rows), "saved": False}
+
+    rows = list(rows)
+    random.Random(13).shuffle(rows)
+    holdout_size = max(1, int(len(rows) * _HOLDOUT_FRACTION))
+    holdout, training = rows[:holdout_size], rows[holdout_size:]
+
+    model = CategoryClassifier.train(training, AVAILABLE_CATEGORIES)
+    report = model.evaluate(holdout)
+    logger.info(
+        f"Trained category classifier on {len(training)} summaries: answers {report['coverage']:.0%} "
+        f"of held-out summaries locally with {report['top_label_precision']:.0%} top-label precision"
+    )
+
+    if (
+        report["top_label_precision"] < CATEGORY_MODEL_MIN_PRECISION
+        or report["coverage"] < CATEGORY_MODEL_MIN_COVERAGE
+    ):
+        logger.warning(
+            f"New model is below the minimum precision {CATEGORY_MODEL_MIN_PRECISION:.0%} / coverage "
+            f"{CATEGORY_MODEL_MIN_COVERAGE:.0%}, keeping the current model"
+        )
+        return {"rows": len(rows), "saved": False, **report}
+
+    model.metadata.update(report)
+    model.save(model_path)
+    return {"rows": len(rows), "saved": True, **report}
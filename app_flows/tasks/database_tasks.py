@@ -2,26 +2,268 @@
 Database operations tasks for Prefect workflows.
 """
 import os
-from typing import List, Dict, Optional
+import threading
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 
 import psycopg2
+from psycopg2.extras import execute_values
 from prefect import task, get_run_logger
 
+from app_flows.utils.db_pool import raw_db_connection
+from app_flows.utils.simhash import SIMHASH_BANDS, simhash, simhash_bands, to_signed64
+from app_flows.utils.text_cleaning import clean_html
 
-def get_db_connection():
-    """Create connection to raw_db database"""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOST"),
-            port=os.getenv("POSTGRES_PORT"),
-            database="raw_db",
-            user="raw_db",  # Use the raw_db user created by init script
-            password=os.getenv("POSTGRES_DEFAULT_USER_PASSWORD")
+
+# Rows per INSERT statement when saving raw articles
+ARTICLE_INSERT_BATCH_SIZE = int(os.getenv("ARTICLE_INSERT_BATCH_SIZE", "200"))
+
+ARTICLE_COLUMNS = (
+    "fingerprint", "source_url", "title", "body_html", "clean_text", "word_count", "image_url", "published_at",
+    "simhash", "simhash_band0", "simhash_band1", "simhash_band2", "simhash_band3",
+)
+
+# raw_articles is partitioned, so fingerprint uniqueness lives in raw_article_fingerprints:
+# only rows whose fingerprint is claimed there (i.e. new ones) are inserted
+ARTICLE_INSERT_SQL = f"""
+    WITH incoming ({", ".join(ARTICLE_COLUMNS)}) AS (VALUES %s),
+    new_fingerprints AS (
+        INSERT INTO raw_article_fingerprints (fingerprint)
+        SELECT fingerprint FROM incoming
+        ON CONFLICT (fingerprint) DO NOTHING
+        RETURNING fingerprint
+    )
+    INSERT INTO raw_articles ({", ".join(ARTICLE_COLUMNS)})
+    SELECT incoming.* FROM incoming JOIN new_fingerprints USING (fingerprint)
+    RETURNING fingerprint
+"""
+# VALUES in a CTE are not typed by the target table, so non-text columns are cast
+ARTICLE_INSERT_TEMPLATE = (
+    "(%s, %s, %s, %s, %s, %s::integer, %s, %s::timestamptz, "
+    "%s::bigint, %s::integer, %s::integer, %s::integer, %s::integer)"
+)
+
+# How many days of recent fingerprints to preload into the in-process index
+FINGERPRINT_INDEX_WARM_DAYS = int(os.getenv("FINGERPRINT_INDEX_WARM_DAYS", "7"))
+
+
+class FingerprintIndex:
+    """
+    Membership index over stored fingerprints (raw_article_fingerprints).
+
+    Keeps a warm in-process set of recently stored fingerprints and falls back
+    to one bulk query against raw_db for anything it has not seen yet, so
+    callers can drop already-stored entries before doing any network work.
+    """
+
+    def __init__(self, warm_days: int = FINGERPRINT_INDEX_WARM_DAYS):
+        self.warm_days = warm_days
+        self._known: Set[str] = set()
+        self._warmed = False
+        self._lock = threading.Lock()
+
+    def _warm(self, cursor) -> None:
+        cursor.execute(
+            "SELECT fingerprint FROM raw_article_fingerprints WHERE created_at >= NOW() - make_interval(days => %s)",
+            (self.warm_days,),
         )
-        return conn
-    except Exception as e:
-        print(f"❌ Raw DB connection error: {e}")
+        self._known.update(row[0] for row in cursor.fetchall())
+        self._warmed = True
+
+    def add(self, fingerprints: Iterable[str]) -> None:
+        """Record fingerprints that are now stored in raw_articles."""
+        with self._lock:
+            self._known.update(fingerprints)
+
+    def filter_new(self, fingerprints: Iterable[str]) -> Set[str]:
+        """
+        Return the subset of fingerprints not yet stored in raw_articles.
+
+        If raw_db is unreachable every unknown fingerprint is treated as new;
+        the insert path still deduplicates, so this only costs extra downloads.
+        """
+        with self._lock:
+            candidates = set(fingerprints) - self._known
+            warmed = self._warmed
+        if not candidates and warmed:
+            return set()
+
+        try:
+            with raw_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    with self._lock:
+                        if not self._warmed:
+                            self._warm(cursor)
+                        candidates -= self._known
+                    if not candidates:
+                        return set()
+                    cursor.execute(
+                        "SELECT fingerprint FROM raw_article_fingerprints WHERE fingerprint = ANY(%s)",
+                        (list(candidates),),
+                    )
+                    stored = {row[0] for row in cursor.fetchall()}
+        except Exception as e:
+            print(f"⚠️  Fingerprint lookup failed, treating all unseen articles as new: {e}")
+            return candidates
+
+        self.add(stored)
+        return candidates - stored
+
+
+_fingerprint_index: Optional[FingerprintIndex] = None
+_fingerprint_index_lock = threading.Lock()
+
+
+def get_fingerprint_index() -> FingerprintIndex:
+    """Return the process-wide fingerprint index"""
+    global _fingerprint_index
+    with _fingerprint_index_lock:
+        if _fingerprint_index is None:
+            _fingerprint_index = FingerprintIndex()
+        return _fingerprint_index
+
+
+def get_feed_state(feed_url: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Load the conditional-GET state stored for a feed.
+
+    Returns:
+        Dict with etag, last_modified and content_hash, or None if the feed
+        has never been polled
+    """
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT etag, last_modified, content_hash FROM feed_state WHERE feed_url = %s",
+                (feed_url,),
+            )
+            row = cursor.fetchone()
+
+    if row is None:
         return None
+    return {"etag": row[0], "last_modified": row[1], "content_hash": row[2]}
+
+
+def save_feed_state(
+    feed_url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    content_hash: Optional[str],
+    changed: bool = True,
+) -> None:
+    """Upsert a feed's validators and content hash after a poll."""
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO feed_state (feed_url, etag, last_modified, content_hash, last_checked_at, last_changed_at)
+                VALUES (%s, %s, %s, %s, NOW(), NOW())
+                ON CONFLICT (feed_url) DO UPDATE SET
+                    etag = EXCLUDED.etag,
+                    last_modified = EXCLUDED.last_modified,
+                    content_hash = EXCLUDED.content_hash,
+                    last_checked_at = NOW(),
+                    last_changed_at = CASE WHEN %s THEN NOW() ELSE feed_state.last_changed_at END
+            """, (feed_url, etag, last_modified, content_hash, changed))
+        conn.commit()
+
+
+def _article_row(article: Dict[str, Optional[str]]) -> tuple:
+    # Articles parsed by rss_tasks are already cleaned; clean anything else here, once
+    if article.get('clean_text') is None:
+        document = clean_html(article['body_html'])
+        article['clean_text'], article['word_count'] = document.text, document.word_count
+    # Near-duplicate signature over title + body; None for texts too short to fingerprint
+    signature = simhash(f"{article['title'] or ''} {article['clean_text']}")
+    if signature is None:
+        signature_columns = (None,) * (1 + SIMHASH_BANDS)
+    else:
+        signature_columns = (to_signed64(signature), *simhash_bands(signature))
+    return (
+        article['fingerprint'],
+        article['source_url'],
+        article['title'],
+        article['body_html'],
+        article['clean_text'],
+        article['word_count'],
+        article['image_url'],
+        article['published_at'],
+        *signature_columns,
+    )
+
+
+def bulk_insert_articles(
+    conn,
+    articles: List[Dict[str, Optional[str]]],
+    batch_size: int = ARTICLE_INSERT_BATCH_SIZE,
+) -> Tuple[List[str], List[Tuple[Dict[str, Optional[str]], str]]]:
+    """
+    Insert articles into raw_articles in batches, skipping existing fingerprints.
+
+    Each batch is a single statement inside a savepoint that claims the new
+    fingerprints in raw_article_fingerprints (``ON CONFLICT DO NOTHING``) and
+    inserts only those rows, returning their fingerprints. If a batch fails, it
+    is rolled back to the savepoint and replayed row by row so that one bad
+    article cannot take the rest of the batch down with it. The caller owns
+    the transaction and must commit.
+
+    Returns:
+        Tuple of (fingerprints that were newly inserted, list of
+        (article, error message) for rows that could not be inserted)
+    """
+    # Deduplicate within the input so the returned count is exact
+    unique_articles = list({article['fingerprint']: article for article in articles}.values())
+
+    saved_fingerprints: List[str] = []
+    failures: List[Tuple[Dict[str, Optional[str]], str]] = []
+
+    with conn.cursor() as cursor:
+        for start in range(0, len(unique_articles), batch_size):
+            batch = unique_articles[start:start + batch_size]
+            cursor.execute("SAVEPOINT article_batch")
+            try:
+                inserted = execute_values(
+                    cursor,
+                    ARTICLE_INSERT_SQL,
+                    [_article_row(article) for article in batch],
+                    template=ARTICLE_INSERT_TEMPLATE,
+                    page_size=len(batch),
+                    fetch=True,
+                )
+                saved_fingerprints.extend(row[0] for row in inserted)
+                cursor.execute("RELEASE SAVEPOINT article_batch")
+                continue
+            except psycopg2.Error:
+                cursor.execute("ROLLBACK TO SAVEPOINT article_batch")
+
+            # Replay the failed batch row by row to isolate the bad rows
+            for article in batch:
+                cursor.execute("SAVEPOINT article_row")
+                try:
+                    inserted = execute_values(
+                        cursor, ARTICLE_INSERT_SQL, [_article_row(article)], template=ARTICLE_INSERT_TEMPLATE, fetch=True
+                    )
+                    saved_fingerprints.extend(row[0] for row in inserted)
+                    cursor.execute("RELEASE SAVEPOINT article_row")
+                except psycopg2.Error as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT article_row")
+                    failures.append((article, str(e).strip()))
+
+    return saved_fingerprints, failures
+
+
+def save_article_batch(
+    articles: List[Dict[str, Optional[str]]],
+) -> Tuple[int, List[Tuple[Dict[str, Optional[str]], str]]]:
+    """
+    Insert and commit one batch of articles, updating the fingerprint index.
+
+    Returns:
+        Tuple of (number of new rows, list of (article, error message) failures)
+    """
+    with raw_db_connection() as conn:
+        saved_fingerprints, failures = bulk_insert_articles(conn, articles)
+        conn.commit()
+    get_fingerprint_index().add(saved_fingerprints)
+    return len(saved_fingerprints), failures
 
 
 @task(retries=2, retry_delay_seconds=5)
@@ -29,6 +271,10 @@ def save_articles_to_database_task(articles_list: List[List[Dict[str, Optional[s
     """
     Prefect task to save articles to the raw_db database.
 
+    Articles are written in batches of ARTICLE_INSERT_BATCH_SIZE rows with
+    one INSERT ... ON CONFLICT statement each; rows that fail are reported
+    individually without aborting the rest.
+
     Args:
         articles_list: List of article lists from different RSS feeds
 
@@ -48,49 +294,18 @@ def save_articles_to_database_task(articles_list: List[List[Dict[str, Optional[s
 
     logger.info(f"Saving {len(all_articles)} articles to database")
 
-    conn = get_db_connection()
-    if not conn:
-        raise Exception("Failed to connect to database")
-
-    saved_count = 0
-
     try:
-        with conn.cursor() as cursor:
-            for article in all_articles:
-                try:
-                    # Check if article already exists via fingerprint
-                    cursor.execute(
-                        "SELECT id FROM raw_articles WHERE fingerprint = %s",
-                        (article['fingerprint'],)
-                    )
+        saved_count, failures = save_article_batch(all_articles)
 
-                    if cursor.fetchone() is None:
-                        # Article doesn't exist, insert it
-                        cursor.execute("""
-                            INSERT INTO raw_articles (fingerprint, source_url, title, body_html, image_url, published_at)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                        """, (
-                            article['fingerprint'],
-                            article['source_url'],
-                            article['title'],
-                            article['body_html'],
-                            article['image_url'],
-                            article['published_at']
-                        ))
-                        saved_count += 1
-                except Exception as e:
-                    logger.warning(f"Error saving article '{article.get('title', 'Unknown')}': {e}")
-                    continue
-
-        conn.commit()
-        logger.info(f"Successfully saved {saved_count} new articles to database")
+        for article, error in failures:
+            logger.warning(f"Error saving article '{article.get('title', 'Unknown')}': {error}")
+        logger.info(
+            f"Successfully saved {saved_count} new articles to database"
+            + (f" ({len(failures)} failed)" if failures else "")
+        )
 
     except Exception as e:
         logger.error(f"Database save error: {e}")
-        conn.rollback()
         raise
 
-    finally:
-        conn.close()
-
     return saved_count
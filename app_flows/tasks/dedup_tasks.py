@@ -0,0 +1,123 @@
+"""
+Near-duplicate story detection tasks for raw_db.
+
+Articles get a SimHash signature at ingest (see database_tasks). Before AI
+processing, each unprocessed article is matched against already-processed
+articles through the banded signature indexes; syndicated copies are linked
+to the original via raw_articles.duplicate_of instead of costing another
+LLM call.
+"""
+import os
+from typing import Dict, List
+
+from psycopg2.extras import execute_values
+from prefect import task, get_run_logger
+
+from app_flows.utils.db_pool import raw_db_connection
+from app_flows.utils.simhash import SIMHASH_BANDS, hamming_distance
+
+
+# Signatures within this many bits are the same story. Must stay below
+# SIMHASH_BANDS for the banded index lookup to find every match.
+NEAR_DUPLICATE_MAX_DISTANCE = min(int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "3")), SIMHASH_BANDS - 1)
+
+
+@task(retries=1)
+def find_near_duplicates_task(raw_article_ids: List[int]) -> Dict[int, int]:
+    """
+    Find articles that are near-duplicates of another story.
+
+    An article is matched against already-processed originals first, then
+    against earlier articles in the same batch.
+
+    Args:
+        raw_article_ids: IDs of unprocessed raw articles
+
+    Returns:
+        Mapping of duplicate raw_article_id to the raw_article_id of its original
+    """
+    logger = get_run_logger()
+
+    if not raw_article_ids:
+        return {}
+
+    band_match = " OR ".join(f"o.simhash_band{band} = a.simhash_band{band}" for band in range(SIMHASH_BANDS))
+
+    try:
+        with raw_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT a.id, a.simhash, original.id
+                    FROM raw_articles a
+                    LEFT JOIN LATERAL (
+                        SELECT o.id
+                        FROM raw_articles o
+                        WHERE ({band_match})
+                          AND o.id <> a.id
+                          AND o.processed_at IS NOT NULL
+                          AND o.duplicate_of IS NULL
+                          AND bit_count((o.simhash # a.simhash)::bit(64)) <= %s
+                        ORDER BY bit_count((o.simhash # a.simhash)::bit(64)), o.created_at
+                        LIMIT 1
+                    ) original ON TRUE
+                    WHERE a.id = ANY(%s) AND a.simhash IS NOT NULL
+                    ORDER BY a.created_at, a.id
+                """, (NEAR_DUPLICATE_MAX_DISTANCE, list(raw_article_ids)))
+                rows = cursor.fetchall()
+    except Exception as e:
+        logger.warning(f"Near-duplicate lookup failed, processing all articles: {e}")
+        return {}
+
+    duplicates: Dict[int, int] = {}
+    batch_originals: List[tuple] = []
+    for raw_id, signature, original_id in rows:
+        if original_id is not None:
+            duplicates[raw_id] = original_id
+            continue
+        # Same story arriving twice in one batch: keep the first copy
+        for candidate_id, candidate_signature in batch_originals:
+            if hamming_distance(signature, candidate_signature) <= NEAR_DUPLICATE_MAX_DISTANCE:
+                duplicates[raw_id] = candidate_id
+                break
+        else:
+            batch_originals.append((raw_id, signature))
+
+    if duplicates:
+        logger.info(f"Found {len(duplicates)} near-duplicate articles in batch of {len(raw_article_ids)}")
+    return duplicates
+
+
+@task(retries=2, retry_delay_seconds=5)
+def link_duplicate_articles_task(duplicates: Dict[int, int]) -> int:
+    """
+    Link duplicates to their originals and mark them processed.
+
+    Args:
+        duplicates: Mapping of duplicate raw_article_id to original raw_article_id
+
+    Returns:
+        Number of articles linked
+    """
+    logger = get_run_logger()
+
+    if not duplicates:
+        return 0
+
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_values(
+                cursor,
+                """
+                UPDATE raw_articles AS ra
+                SET duplicate_of = v.original_id, processed_at = NOW(), updated_at = NOW(),
+                    lease_owner = NULL, lease_expires_at = NULL
+                FROM (VALUES %s) AS v(id, original_id)
+                WHERE ra.id = v.id
+                """,
+                list(duplicates.items()),
+            )
+            linked = cursor.rowcount
+        conn.commit()
+
+    logger.info(f"Linked {linked} near-duplicate articles to their originals")
+    return linked
@@ -0,0 +1,158 @@
+"""
+Feed registry tasks: which RSS feeds to poll and when.
+
+Each feed has a row in raw_db.feeds with its own polling interval. Feeds
+that keep producing new items are polled more often (down to
+FEED_MIN_POLL_SECONDS), quiet feeds are backed off (up to
+FEED_MAX_POLL_SECONDS), and the collection flow only fetches feeds that are
+due, so a run's work is proportional to the due feeds, not the whole list.
+"""
+import os
+from typing import Dict, List, Optional
+
+from psycopg2.extras import execute_values
+from prefect import task, get_run_logger
+
+from app_flows.utils.db_pool import raw_db_connection
+
+
+FEED_MIN_POLL_SECONDS = int(os.getenv("FEED_MIN_POLL_SECONDS", "300"))
+FEED_MAX_POLL_SECONDS = int(os.getenv("FEED_MAX_POLL_SECONDS", "21600"))
+# Feeds due within this many seconds are polled now instead of waiting a whole schedule tick
+FEED_POLL_SLACK_SECONDS = int(os.getenv("FEED_POLL_SLACK_SECONDS", "60"))
+FEED_POLL_BATCH_LIMIT = int(os.getenv("FEED_POLL_BATCH_LIMIT", "100"))
+# Weight of the newest poll in the new-items-per-poll moving average
+_RATE_ALPHA = 0.3
+
+
+def register_feeds(feeds: List[Dict[str, str]]) -> int:
+    """
+    Add feeds to the registry if they are not there yet.
+
+    Args:
+        feeds: List of {"url": ..., "name": ...} dicts
+
+    Returns:
+        Number of newly registered feeds
+    """
+    if not feeds:
+        return 0
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            inserted = execute_values(
+                cursor,
+                """
+                INSERT INTO feeds (url, name, poll_interval_seconds)
+                VALUES %s
+                ON CONFLICT (url) DO NOTHING
+                RETURNING id
+                """,
+                [(feed["url"], feed["name"], FEED_MIN_POLL_SECONDS) for feed in feeds],
+                fetch=True,
+            )
+        conn.commit()
+    return len(inserted)
+
+
+def next_poll_interval(current_seconds: int, new_items: int, failed: bool = False) -> int:
+    """
+    Compute a feed's next polling interval from its latest poll.
+
+    Halves the interval when the poll found new items, grows it by half when
+    it found nothing and doubles it after a failure, within
+    FEED_MIN_POLL_SECONDS..FEED_MAX_POLL_SECONDS.
+    """
+    if failed:
+        interval = current_seconds * 2
+    elif new_items > 0:
+        interval = current_seconds // 2
+    else:
+        interval = (current_seconds * 3) // 2
+    return max(FEED_MIN_POLL_SECONDS, min(FEED_MAX_POLL_SECONDS, interval))
+
+
+@task(retries=1)
+def get_due_feeds_task(
+    seed_feeds: Optional[List[Dict[str, str]]] = None,
+    limit: int = FEED_POLL_BATCH_LIMIT,
+) -> List[Dict[str, str]]:
+    """
+    Get the feeds whose next poll time has arrived.
+
+    Args:
+        seed_feeds: Feeds to register first if they are missing from the registry
+        limit: Maximum number of feeds to return (most overdue first)
+
+    Returns:
+        List of {"url": ..., "name": ...} dicts
+    """
+    logger = get_run_logger()
+
+    if seed_feeds:
+        registered = register_feeds(seed_feeds)
+        if registered:
+            logger.info(f"Registered {registered} new feeds")
+
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT url, name
+                FROM feeds
+                WHERE enabled
+                  AND next_poll_at <= NOW() + make_interval(secs => %s)
+                ORDER BY next_poll_at ASC
+                LIMIT %s
+            """, (FEED_POLL_SLACK_SECONDS, limit))
+            rows = cursor.fetchall()
+
+    logger.info(f"{len(rows)} feeds due for polling")
+    return [{"url": url, "name": name} for url, name in rows]
+
+
+@task(retries=2, retry_delay_seconds=5)
+def record_feed_polls_task(polls: List[Dict]) -> None:
+    """
+    Record poll outcomes and schedule each feed's next poll.
+
+    Args:
+        polls: List of {"url": ..., "new_items": int, "failed": bool} dicts
+    """
+    logger = get_run_logger()
+
+    if not polls:
+        return
+
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT url, poll_interval_seconds FROM feeds WHERE url = ANY(%s) FOR UPDATE",
+                ([poll["url"] for poll in polls],),
+            )
+            intervals = dict(cursor.fetchall())
+
+            for poll in polls:
+                current = intervals.get(poll["url"])
+                if current is None:
+                    continue
+                failed = bool(poll.get("failed"))
+                new_items = int(poll.get("new_items") or 0)
+                interval = next_poll_interval(current, new_items, failed)
+                cursor.execute("""
+                    UPDATE feeds SET
+                        new_item_rate = CASE WHEN %(failed)s THEN new_item_rate
+                                             ELSE %(alpha)s * %(new_items)s + (1 - %(alpha)s) * new_item_rate END,
+                        consecutive_failures = CASE WHEN %(failed)s THEN consecutive_failures + 1 ELSE 0 END,
+                        last_fetched_at = CASE WHEN %(failed)s THEN last_fetched_at ELSE NOW() END,
+                        poll_interval_seconds = %(interval)s,
+                        next_poll_at = NOW() + make_interval(secs => %(interval)s),
+                        updated_at = NOW()
+                    WHERE url = %(url)s
+                """, {
+                    "failed": failed,
+                    "alpha": _RATE_ALPHA,
+                    "new_items": new_items,
+                    "interval": interval,
+                    "url": poll["url"],
+                })
+                logger.info(f"Feed {poll['url']}: {new_items} new items, next poll in {interval // 60} min")
+        conn.commit()
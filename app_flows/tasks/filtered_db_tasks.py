@@ -2,173 +2,211 @@
 Database operations tasks for filtered_db (AI-processed articles).
 """
 import os
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
-import psycopg2
 from prefect import task, get_run_logger
 
+from psycopg2.extras import execute_values
 
-def get_filtered_db_connection():
-    """Create connection to filtered_db database"""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOST"),
-            port=os.getenv("POSTGRES_PORT"),
-            database="filtered_db",
-            user="filtered_db",  # Use the filtered_db user created by init script
-            password=os.getenv("POSTGRES_DEFAULT_USER_PASSWORD")
-        )
-        return conn
-    except Exception as e:
-        print(f"❌ Filtered DB connection error: {e}")
-        return None
+from app_flows.utils.article_leases import AI_MAX_ATTEMPTS, claim_articles, new_worker_id, release_leases
+from app_flows.utils.db_pool import filtered_db_connection, raw_db_connection
+from app_flows.utils.text_cleaning import clean_html
 
 
-def mark_raw_article_processed(raw_article_id: int) -> None:
-    """Update raw_articles to mark a row as processed."""
-    conn = None
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOST"),
-            port=os.getenv("POSTGRES_PORT"),
-            database="raw_db",
-            user="raw_db",
-            password=os.getenv("POSTGRES_DEFAULT_USER_PASSWORD"),
-        )
+FILTERED_WRITE_BATCH_SIZE = int(os.getenv("FILTERED_WRITE_BATCH_SIZE", "25"))
+
+FILTERED_ARTICLE_COLUMNS = (
+    "raw_article_id",
+    "title_translated",
+    "content_summary",
+    "content_translated",
+    "image_url",
+    "sentiment_score",
+    "categories",
+    "ai_model_used",
+    "categories_source",
+)
+
+
+def mark_raw_articles_processed(raw_article_ids: List[int]) -> int:
+    """Mark raw_articles rows as processed (and drop their leases) in one UPDATE."""
+    with raw_db_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(
-                "UPDATE raw_articles SET processed_at = NOW(), updated_at = NOW() WHERE id = %s",
-                (raw_article_id,),
-            )
+            cursor.execute("""
+                UPDATE raw_articles
+                SET processed_at = NOW(), updated_at = NOW(), lease_owner = NULL, lease_expires_at = NULL
+                WHERE id = ANY(%s)
+            """, (list(raw_article_ids),))
+            updated = cursor.rowcount
         conn.commit()
-    finally:
-        if conn:
-            conn.close()
+    return updated
 
 
 @task(retries=2, retry_delay_seconds=5)
-def save_filtered_article_task(
-    raw_article_id: int,
-    content_summary: Optional[str] = None,
-    title_translated: Optional[str] = None,
-    content_translated: Optional[str] = None,
-    image_url: Optional[str] = None,
-    sentiment_score: Optional[float] = None,
-    categories: Optional[List[str]] = None,
-    ai_model_used: Optional[str] = None
-) -> int:
+def save_filtered_articles_task(articles: List[Dict[str, Any]]) -> int:
     """
-    Save processed article data to filtered_db.
+    Save a batch of processed articles to filtered_db and mark them processed
+    in raw_db, with one transaction per database.
+
+    Rows are upserted on raw_article_id, so replaying a batch (a task retry,
+    or a run that crashed between the two commits) never creates duplicate
+    filtered_articles rows.
 
     Args:
-        raw_article_id: ID from raw_articles table
-        content_summary: AI-generated summary
-        title_translated: AI-translated title
-        content_translated: AI-translated full content
-        image_url: Article image/thumbnail URL
-        sentiment_score: Sentiment analysis score (-1 to 1)
-        categories: Article categories/tags
-        ai_model_used: Which AI model was used
+        articles: Dicts keyed by FILTERED_ARTICLE_COLUMNS (raw_article_id
+            required, other keys optional)
 
     Returns:
-        ID of the newly created filtered article record
+        Number of articles saved
     """
     logger = get_run_logger()
+    if not articles:
+        return 0
 
-    conn = get_filtered_db_connection()
-    if not conn:
-        raise Exception("Failed to connect to filtered_db")
+    # One row per raw article (the last one wins), as ON CONFLICT can't touch a row twice
+    by_raw_id = {article["raw_article_id"]: article for article in articles}
+    rows = [tuple(article.get(column) for column in FILTERED_ARTICLE_COLUMNS) for article in by_raw_id.values()]
 
     try:
-        with conn.cursor() as cursor:
-            # Insert the filtered article
-            cursor.execute("""
-                INSERT INTO filtered_articles (
-                    raw_article_id,
-                    title_translated,
-                    content_summary,
-                    content_translated,
-                    image_url,
-                    sentiment_score,
-                    categories,
-                    ai_model_used,
-                    processing_status
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'completed')
-                RETURNING id
-            """, (
-                raw_article_id,
-                title_translated,
-                content_summary,
-                content_translated,
-                image_url,
-                sentiment_score,
-                categories,  # PostgreSQL array type
-                ai_model_used
-            ))
-
-            filtered_id = cursor.fetchone()[0]
-
-        conn.commit()
-        mark_raw_article_processed(raw_article_id)
-        logger.info(f"Successfully saved filtered article id={filtered_id} for raw_article_id={raw_article_id}")
-        return filtered_id
+        with filtered_db_connection() as conn:
+            with conn.cursor() as cursor:
+                execute_values(cursor, f"""
+                    INSERT INTO filtered_articles ({", ".join(FILTERED_ARTICLE_COLUMNS)}, processing_status)
+                    VALUES %s
+                    ON CONFLICT (raw_article_id) DO UPDATE SET
+                        title_translated = EXCLUDED.title_translated,
+                        content_summary = EXCLUDED.content_summary,
+                        content_translated = EXCLUDED.content_translated,
+                        image_url = EXCLUDED.image_url,
+                        sentiment_score = EXCLUDED.sentiment_score,
+                        categories = EXCLUDED.categories,
+                        ai_model_used = EXCLUDED.ai_model_used,
+                        categories_source = EXCLUDED.categories_source,
+                        processing_status = EXCLUDED.processing_status,
+                        processed_at = NOW()
+                """, rows, template=f"({', '.join(['%s'] * len(FILTERED_ARTICLE_COLUMNS))}, 'completed')",
+                    page_size=len(rows))
+            conn.commit()
+
+        marked = mark_raw_articles_processed(list(by_raw_id))
+        logger.info(f"Saved {len(rows)} filtered articles and marked {marked} raw articles processed")
+        return len(rows)
 
     except Exception as e:
-        logger.error(f"Database save error for raw_article_id {raw_article_id}: {e}")
-        conn.rollback()
+        logger.error(f"Database save error for raw_article_ids {sorted(by_raw_id)}: {e}")
         raise
 
-    finally:
-        conn.close()
-
 
 @task(retries=1)
-def get_unprocessed_articles_task(limit: int = 50) -> List[tuple]:
+def reconcile_saved_articles_task(raw_article_ids: List[int]) -> List[int]:
     """
-    Get articles from raw_db that haven't been processed yet.
+    Mark articles processed that already have a completed filtered_articles row.
+
+    This repairs a save interrupted between the filtered_db and raw_db commits
+    without paying for the LLM calls again.
 
     Args:
-        limit: Maximum number of articles to return
+        raw_article_ids: Claimed raw_article ids
 
     Returns:
-        List of tuples (raw_article_id, title, body_html)
+        The ids that were already saved (and are now marked processed)
     """
     logger = get_run_logger()
-
-    # Connect to raw_db to get unprocessed articles
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOST"),
-            port=os.getenv("POSTGRES_PORT"),
-            database="raw_db",
-            user="raw_db",  # Use the raw_db user
-            password=os.getenv("POSTGRES_DEFAULT_USER_PASSWORD")
-        )
-    except Exception as e:
-        logger.error(f"Failed to connect to raw_db: {e}")
+    if not raw_article_ids:
         return []
 
-    try:
+    with filtered_db_connection() as conn:
         with conn.cursor() as cursor:
-            # For simplicity, get recent articles (last 24 hours) that might not be processed yet
-            # This is a simpler approach than cross-database queries
             cursor.execute("""
-                SELECT ra.id, ra.title, ra.body_html
-                FROM raw_articles ra
-                WHERE ra.processed_at IS NULL
-                ORDER BY ra.created_at ASC
-                LIMIT %s
-            """, (limit,))
+                SELECT raw_article_id FROM filtered_articles
+                WHERE raw_article_id = ANY(%s) AND processing_status = 'completed'
+            """, (list(raw_article_ids),))
+            saved = [row[0] for row in cursor.fetchall()]
+
+    if saved:
+        mark_raw_articles_processed(saved)
+        logger.warning(f"Marked {len(saved)} already-saved articles processed (interrupted earlier save)")
+    return saved
+
 
-            articles = cursor.fetchall()
+@task(retries=1)
+def get_unprocessed_articles_task(limit: int = 50, worker_id: Optional[str] = None) -> List[tuple]:
+    """
+    Claim articles from raw_db that haven't been processed yet.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED and leased to ``worker_id``
+    for AI_LEASE_SECONDS (see utils/article_leases.py), so concurrent AI
+    workers never get the same article. Leases left by crashed workers are
+    reclaimed once they expire.
+
+    Rows stored before clean_text existed are cleaned here once and written
+    back, so later runs (and retries) read the stored text.
+
+    Args:
+        limit: Maximum number of articles to return
+        worker_id: Lease owner (a new id is generated if omitted)
+
+    Returns:
+        List of tuples (raw_article_id, title, clean_text)
+    """
+    logger = get_run_logger()
+    worker_id = worker_id or new_worker_id()
 
-        logger.info(f"Found {len(articles)} unprocessed articles")
+    try:
+        with raw_db_connection() as conn:
+            with conn.cursor() as cursor:
+                claimed = claim_articles(cursor, limit, worker_id)
+
+                articles = []
+                backfill = []
+                reclaimed = 0
+                for raw_id, title, clean_text, body_html, was_leased in claimed:
+                    reclaimed += was_leased
+                    if clean_text is None:
+                        document = clean_html(body_html)
+                        clean_text = document.text
+                        backfill.append((raw_id, clean_text, document.word_count))
+                    articles.append((raw_id, title, clean_text))
+
+                if backfill:
+                    execute_values(cursor, """
+                        UPDATE raw_articles AS ra
+                        SET clean_text = v.clean_text, word_count = v.word_count
+                        FROM (VALUES %s) AS v(id, clean_text, word_count)
+                        WHERE ra.id = v.id
+                    """, backfill)
+            conn.commit()
+        if backfill:
+            logger.info(f"Stored clean text for {len(backfill)} older articles")
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} articles whose lease had expired")
+
+        logger.info(f"Claimed {len(articles)} unprocessed articles for worker {worker_id}")
         return articles
 
     except Exception as e:
         logger.error(f"Error fetching unprocessed articles: {e}")
         return []
 
-    finally:
-        conn.close()
+
+@task(retries=2, retry_delay_seconds=5)
+def release_article_leases_task(raw_ids: List[int], worker_id: str) -> int:
+    """
+    Release a worker's leases on articles it did not finish, so they don't
+    wait for the leases to expire. Each counts as a failed attempt and is
+    retried after a backoff, or parked after AI_MAX_ATTEMPTS.
+
+    Args:
+        raw_ids: Claimed raw_article ids
+        worker_id: Lease owner that claimed them
+
+    Returns:
+        Number of leases released
+    """
+    logger = get_run_logger()
+    released, parked = release_leases(raw_ids, worker_id)
+    if released:
+        logger.info(f"Released {released} unfinished articles for worker {worker_id} (retried after a backoff)")
+    if parked:
+        logger.warning(f"Parked {parked} articles after {AI_MAX_ATTEMPTS} failed attempts")
+    return released
@@ -0,0 +1,70 @@
+"""
+Per-flow-run reporting of LLM call metrics for Prefect workflows.
+"""
+from typing import Any, Dict
+
+from prefect import task, get_run_logger
+from prefect.artifacts import create_table_artifact
+from prefect.runtime import flow_run
+
+from app_flows.utils.llm_metrics import aggregate_llm_calls, get_llm_metrics
+
+
+@task
+def report_llm_call_metrics_task() -> Dict[str, Any]:
+    """
+    Flush buffered LLM call metrics and summarize the current flow run's calls.
+
+    Logs one line per model and prompt version plus run totals, and attaches
+    the same table to the flow run as a Prefect artifact. Records older than
+    LLM_METRICS_RETENTION_DAYS are pruned.
+
+    Returns:
+        Run totals (calls, successes, errors, cache hits, retries, tokens,
+        cost in USD)
+    """
+    logger = get_run_logger()
+    metrics = get_llm_metrics()
+    metrics.flush()
+
+    run_id = flow_run.id
+    try:
+        rows = aggregate_llm_calls(flow_run_id=run_id)
+    except Exception as e:
+        logger.warning(f"Could not summarize LLM calls for this run: {e}")
+        return {}
+
+    totals: Dict[str, Any] = {
+        key: sum(row[key] for row in rows)
+        for key in ("calls", "successes", "errors", "cache_hits", "retries", "prompt_tokens", "completion_tokens")
+    }
+    costs = [row["cost_usd"] for row in rows if row["cost_usd"] is not None]
+    totals["cost_usd"] = round(sum(costs), 6) if costs else None
+
+    for row in rows:
+        logger.info(
+            f"LLM calls {row['model']} / {row['prompt_version']}: {row['calls']} calls "
+            f"({row['errors']} errors, {row['cache_hits']} cache hits, {row['retries']} retries), "
+            f"latency p50 {row['latency_p50_ms']}ms p95 {row['latency_p95_ms']}ms, "
+            f"{row['prompt_tokens']} in / {row['completion_tokens']} out tokens, cost ${row['cost_usd']}"
+        )
+    logger.info(
+        f"LLM calls this run: {totals['calls']} ({totals['errors']} errors, {totals['cache_hits']} cache hits), "
+        f"{totals['prompt_tokens']} in / {totals['completion_tokens']} out tokens, cost ${totals['cost_usd']}"
+    )
+
+    if rows and run_id is not None:
+        try:
+            create_table_artifact(
+                key="llm-call-metrics",
+                table=rows,
+                description=f"LLM calls by model and prompt version for flow run {run_id}",
+            )
+        except Exception as e:
+            logger.warning(f"Could not create LLM metrics artifact: {e}")
+
+    metrics.prune()
+    metrics_stats = metrics.stats()
+    if metrics_stats["dropped"]:
+        logger.warning(f"LLM metrics: {metrics_stats['dropped']} records could not be written")
+    return totals
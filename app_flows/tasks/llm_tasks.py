@@ -1,11 +1,27 @@
 """
 AI/LLM processing tasks for Prefect workflows using OpenRouter.
 """
+import asyncio
+import contextvars
+import json
 import os
-from typing import Optional, List
-
-from openai import OpenAI
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, List, Tuple
+
+import openai
+from openai import AsyncOpenAI, OpenAI
 from prefect import task, get_run_logger
+from prefect.runtime import flow_run
+
+from app_flows.utils.llm_cache import cache_key, get_llm_cache
+from app_flows.utils.llm_metrics import LLMCall, call_cost, get_llm_metrics
+from app_flows.utils.fetch_scheduler import parse_retry_after
+from app_flows.utils.model_router import MODEL_ROUTER_COOLDOWN_SECONDS, ModelsUnavailableError, get_model_router
+from app_flows.utils.rate_limiter import get_rate_limiter
+from app_flows.utils.token_budget import estimate_tokens, plan_summary_input
 
 
 # Initialize OpenRouter client (OpenAI-compatible)
@@ -14,181 +30,540 @@ client = OpenAI(
     base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
 )
 
+# Bump these whenever a prompt template changes so cached responses are not reused
+SUMMARY_PROMPT_VERSION = "summary-v1"
+CATEGORY_PROMPT_VERSION = "categories-v1"
+COMBINED_PROMPT_VERSION = "summary-categories-v1"
+CHUNK_PROMPT_VERSION = "summary-chunk-v1"
+REDUCE_PROMPT_VERSION = "summary-reduce-v1"
+REDUCE_COMBINED_PROMPT_VERSION = "summary-categories-reduce-v1"
+
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+AVAILABLE_CATEGORIES = [
+    "Technology",
+    "Business",
+    "Politics",
+    "World",
+    "Science",
+    "Health",
+    "Sports",
+    "Entertainment",
+    "Finance",
+    "Climate",
+    "Environment",
+    "Culture",
+    "Geopolitics",
+    "Security",
+    "Education",
+    "Economy",
+    "Opinion"
+]
+
+
+@dataclass(frozen=True)
+class ChatRequest:
+    """A prompt plus the settings that identify its cached response"""
+    messages: List[Dict[str, str]]
+    temperature: float
+    max_tokens: int
+    prompt_version: str
+    cache_input: str  # Cleaned input text the prompt was built from
+    accept: Optional[Callable[[str], bool]] = None  # Check a response must pass before it is cached
+
+    def cache_key(self, model: str) -> str:
+        return cache_key(
+            self.cache_input, model, self.prompt_version,
+            {"temperature": self.temperature, "max_tokens": self.max_tokens},
+        )
 
-@task(retries=3, retry_delay_seconds=10)
-def summarize_article_task(body_html: str, target_lang: str = "en") -> Optional[str]:
+    def estimated_tokens(self) -> int:
+        """Rough prompt + completion token count for rate limiting"""
+        return sum(estimate_tokens(message["content"]) for message in self.messages) + self.max_tokens
+
+
+def _record_call(
+    request: ChatRequest,
+    model: str,
+    outcome: str,
+    started: Optional[float] = None,
+    raw=None,
+    response=None,
+    error: Optional[Exception] = None,
+) -> None:
+    """Record one completion attempt (see utils/llm_metrics.py)"""
+    usage = getattr(response, "usage", None)
+    get_llm_metrics().record(LLMCall(
+        flow_run_id=flow_run.id,
+        model=model,
+        prompt_version=request.prompt_version,
+        outcome=outcome,
+        latency_ms=round((time.monotonic() - started) * 1000) if started is not None else None,
+        prompt_tokens=getattr(usage, "prompt_tokens", None),
+        completion_tokens=getattr(usage, "completion_tokens", None),
+        retries=raw.retries_taken if raw is not None else None,
+        cost_usd=call_cost(model, usage),
+        error=str(error)[:1000] if error is not None else None,
+    ))
+
+
+class EmptyResponseError(ValueError):
+    """The model answered with no content"""
+
+
+# Errors caused by the request itself (bad input, moderation, context length):
+# every model would reject it, so it fails at once without failing over
+_REQUEST_ERRORS = (openai.BadRequestError, openai.PermissionDeniedError, openai.UnprocessableEntityError)
+# Errors that say the model is unhealthy and count against its circuit breaker
+_MODEL_ERRORS = (openai.InternalServerError, openai.APITimeoutError, openai.APIConnectionError, EmptyResponseError)
+
+
+def _record_failed_attempt(
+    router, request: ChatRequest, model: str, started: float, raw, response, error: Exception
+) -> bool:
     """
-    Summarize an article using OpenRouter AI models.
+    Record a failed attempt with the router and the call metrics.
+
+    Returns:
+        True to fail over to the next model, False if the error must be
+        raised straight away (the request itself was rejected)
+    """
+    _record_call(request, model, "error", started, raw, response, error)
+    if isinstance(error, _REQUEST_ERRORS):
+        return False
+    if isinstance(error, openai.RateLimitError):
+        router.record_rate_limited(model, parse_retry_after(error.response.headers.get("retry-after")))
+    elif isinstance(error, _MODEL_ERRORS):
+        router.record_failure(model)
+    return True
+
+
+def _rate_limit_wait(router, model: str) -> Optional[float]:
+    """
+    Seconds to wait before sending to a rate-limited model (0 if it isn't),
+    or None to skip it because its Retry-After is longer than a breaker cooldown.
+    """
+    wait = router.rate_limit_wait(model)
+    return None if wait > MODEL_ROUTER_COOLDOWN_SECONDS else wait
+
+
+def _chat_kwargs(request: ChatRequest, model: str) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "messages": request.messages,
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+        "timeout": 30,
+        # OpenRouter usage accounting: adds the call's cost to response.usage
+        "extra_body": {"usage": {"include": True}},
+    }
+
+
+def _cached_completion(request: ChatRequest, models: List[str]) -> Optional[Tuple[str, str]]:
+    """(response, model) from the LLM cache for the first model that has one"""
+    cache = get_llm_cache()
+    for model in models:
+        cached = cache.get(request.cache_key(model))
+        if cached is not None:
+            _record_call(request, model, "cache_hit")
+            return cached, model
+    return None
+
+
+def _chat_completion(request: ChatRequest, use_cache: bool = True) -> Tuple[str, str]:
+    """
+    Run a chat completion through the persistent LLM response cache and the
+    model router (fastest healthy model first, falling through the chain on
+    errors and empty responses). Errors caused by the request itself (400,
+    403, 422) are raised at once, since every model would reject it too.
 
     Args:
-        body_html: The raw HTML content of the article
-        target_lang: Target language for summary ('en' for English)
+        request: Prompt and sampling settings
+        use_cache: Look the response up in the LLM cache first. With False the
+            model is always called (fresh responses are still cached)
 
     Returns:
-        Summarized text in English, or None if summarization fails
+        Tuple of (stripped response text, model that produced it)
     """
-    logger = get_run_logger()
+    router = get_model_router()
+    cached = _cached_completion(request, router.models) if use_cache else None
+    if cached is not None:
+        return cached
+
+    last_error: Optional[Exception] = None
+    order = router.route()
+    for model in order:
+        # Rate-limited models come last in the order; by now the others have failed
+        wait = _rate_limit_wait(router, model)
+        if wait is None:
+            last_error = last_error or ModelsUnavailableError(f"{model} is rate limited")
+            continue
+        if wait:
+            time.sleep(wait)
+        get_rate_limiter().acquire(request.estimated_tokens())
+        started = time.monotonic()
+        raw = response = None
+        try:
+            # Fail over straight away; only the last model in the chain gets the client's own retries
+            chat_client = client if model == order[-1] else client.with_options(max_retries=0)
+            raw = chat_client.chat.completions.with_raw_response.create(**_chat_kwargs(request, model))
+            response = raw.parse()
+            content = (response.choices[0].message.content or "").strip()
+            if not content:
+                raise EmptyResponseError(f"{model} returned an empty response")
+        except Exception as e:
+            if not _record_failed_attempt(router, request, model, started, raw, response, e):
+                raise
+            last_error = e
+            continue
+        router.record_success(model, time.monotonic() - started)
+        _record_call(request, model, "success", started, raw, response)
+
+        if request.accept is None or request.accept(content):
+            get_llm_cache().put(request.cache_key(model), content, model, request.prompt_version)
+        return content, model
+
+    raise last_error
+
+
+def new_async_client() -> AsyncOpenAI:
+    """
+    Create an async OpenRouter client.
 
-    if not body_html or not body_html.strip():
-        logger.warning("Empty article content provided")
-        return None
+    Its connection pool is bound to the running event loop, so each
+    asyncio.run() (one per AI engine run) needs its own client.
+    """
+    return AsyncOpenAI(
+        api_key=os.getenv("OPENROUTER_API_KEY"),
+        base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+    )
 
-    # Clean up HTML by removing tags (basic cleanup)
-    import re
-    clean_text = re.sub(r'<[^>]+>', '', body_html).strip()
 
-    if len(clean_text) < 50:
-        logger.warning("Article content too short for meaningful summarization")
-        return None
+async def _chat_completion_async(
+    request: ChatRequest, async_client: AsyncOpenAI, use_cache: bool = True
+) -> Tuple[str, str]:
+    """Async variant of _chat_completion (same cache, router and rate limiter)"""
+    router = get_model_router()
+    cached = await asyncio.to_thread(_cached_completion, request, router.models) if use_cache else None
+    if cached is not None:
+        return cached
+
+    last_error: Optional[Exception] = None
+    order = router.route()
+    for model in order:
+        # Rate-limited models come last in the order; by now the others have failed
+        wait = _rate_limit_wait(router, model)
+        if wait is None:
+            last_error = last_error or ModelsUnavailableError(f"{model} is rate limited")
+            continue
+        if wait:
+            await asyncio.sleep(wait)
+        await get_rate_limiter().acquire_async(request.estimated_tokens())
+        started = time.monotonic()
+        raw = response = None
+        try:
+            chat_client = async_client if model == order[-1] else async_client.with_options(max_retries=0)
+            raw = await chat_client.chat.completions.with_raw_response.create(**_chat_kwargs(request, model))
+            response = raw.parse()
+            content = (response.choices[0].message.content or "").strip()
+            if not content:
+                raise EmptyResponseError(f"{model} returned an empty response")
+        except Exception as e:
+            if not _record_failed_attempt(router, request, model, started, raw, response, e):
+                raise
+            last_error = e
+            continue
+        router.record_success(model, time.monotonic() - started)
+        _record_call(request, model, "success", started, raw, response)
+
+        if request.accept is None or request.accept(content):
+            await asyncio.to_thread(
+                get_llm_cache().put, request.cache_key(model), content, model, request.prompt_version
+            )
+        return content, model
+
+    raise last_error
+
+
+def _parse_categories(raw_output: str) -> List[str]:
+    """Extract up to three valid categories from a model response"""
+    cleaned: List[str] = []
+
+    try:
+        parsed = json.loads(raw_output)
+        if isinstance(parsed, dict) and "categories" in parsed:
+            categories = parsed["categories"]
+        elif isinstance(parsed, list):
+            categories = parsed
+        else:
+            raise ValueError("Unexpected JSON structure")
+    except Exception:
+        # Attempt to extract categories using regex if JSON parsing fails
+        matches = re.findall(r"[A-Za-z][A-Za-z\s-]{2,20}", raw_output)
+        categories = matches
+
+    if not isinstance(categories, list):
+        return cleaned
 
-    model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.2-3b-instruct:free")
+    for item in categories:
+        if not isinstance(item, str):
+            continue
+        normalized = item.strip().title()
+        if normalized in AVAILABLE_CATEGORIES and normalized not in cleaned:
+            cleaned.append(normalized)
+        if len(cleaned) == 3:
+            break
 
-    # Adjust prompt based on content length
+    return cleaned
+
+
+def _summary_instructions(clean_text: str) -> str:
+    """Summary instructions, adjusted to the content length"""
     if len(clean_text) < 200:
-        prompt = f"""The following is a short news article or headline. Provide a brief 1-2 sentence summary in English, expanding on the key information if possible.
+        return (
+            "The following is a short news article or headline. Provide a brief 1-2 sentence "
+            "summary in English, expanding on the key information if possible."
+        )
+    return (
+        "Summarize the following news article in English in 3-5 sentences.\n"
+        "Be factual, neutral and comprehensive. Avoid opinions or extra context."
+    )
+
+
+def _summary_request(clean_text: str) -> ChatRequest:
+    prompt = f"""{_summary_instructions(clean_text)}
 
 Article content:
-{clean_text[:4000]}
+{clean_text}
 
 Summary:"""
-    else:
-        prompt = f"""Summarize the following news article in English in 3-5 sentences.
-Be factual, neutral and comprehensive. Avoid opinions or extra context.
+    return ChatRequest(
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a professional news editor. Always provide summaries in English."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        temperature=0.3,  # Low temperature for consistent, factual summaries
+        max_tokens=500,
+        prompt_version=SUMMARY_PROMPT_VERSION,
+        cache_input=clean_text,
+        accept=lambda text: len(text) > 20,
+    )
 
-Article content:
-{clean_text[:4000]}
+
+def _category_request(content: str) -> ChatRequest:
+    prompt = (
+        "Given the following news article summary, select up to three categories "
+        "from the provided list that best describe the article. Respond ONLY with a "
+        "valid JSON object in the following form: {\"categories\": [\"Category1\", \"Category2\"]}. "
+        "Use only categories from the list.\n\n"
+        f"Available categories: {', '.join(AVAILABLE_CATEGORIES)}\n\n"
+        f"Article summary:\n{content[:3000]}\n\nJSON response:"
+    )
+    return ChatRequest(
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are a classifier that tags news articles with professional, "
+                    "high-level categories. Only return valid JSON arrays."
+                ),
+            },
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.2,
+        max_tokens=150,
+        prompt_version=CATEGORY_PROMPT_VERSION,
+        cache_input=content[:3000],
+        accept=lambda text: bool(_parse_categories(text)),
+    )
+
+
+def _combined_request(clean_text: str) -> ChatRequest:
+    prompt = (
+        f"{_summary_instructions(clean_text)}\n{_CATEGORIES_JSON_INSTRUCTIONS}"
+        f"Available categories: {', '.join(AVAILABLE_CATEGORIES)}\n\n"
+        f"Article content:\n{clean_text}\n\nJSON response:"
+    )
+    return ChatRequest(
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "You are a professional news editor. Always write summaries in English "
+                    "and only return valid JSON."
+                ),
+            },
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.3,
+        max_tokens=600,
+        prompt_version=COMBINED_PROMPT_VERSION,
+        cache_input=clean_text,
+        accept=lambda text: _parse_combined(text) is not None,
+    )
+
+
+_CATEGORIES_JSON_INSTRUCTIONS = (
+    "Then select up to three categories from the provided list that best describe the article.\n"
+    "Respond ONLY with a valid JSON object in the following form: "
+    "{\"summary\": \"...\", \"categories\": [\"Category1\", \"Category2\"]}. "
+    "Use only categories from the list.\n\n"
+)
+
+
+def _chunk_request(chunk: str, index: int, total: int) -> ChatRequest:
+    prompt = f"""The following is part {index} of {total} of a long news article.
+Summarize this part in English in 2-3 factual, neutral sentences. Keep names, numbers and dates.
+
+Article part:
+{chunk}
 
 Summary:"""
+    return ChatRequest(
+        messages=[
+            {"role": "system", "content": "You are a professional news editor. Always provide summaries in English."},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.3,
+        max_tokens=200,
+        prompt_version=CHUNK_PROMPT_VERSION,
+        cache_input=chunk,
+        accept=lambda text: len(text) > 20,
+    )
 
-    try:
-        logger.info(f"Summarizing article with {model}")
 
-        response = client.chat.completions.create(
-            model=model,
+def _reduce_request(partials: List[str], combined: bool = False) -> ChatRequest:
+    """Merge per-chunk summaries into one summary (plus categories when combined)"""
+    joined = "\n".join(f"{i}. {partial}" for i, partial in enumerate(partials, 1))
+    instructions = (
+        "The following are summaries of consecutive parts of one long news article.\n"
+        "Combine them into a single summary of the whole article in English in 3-5 sentences.\n"
+        "Be factual, neutral and comprehensive. Avoid opinions or extra context."
+    )
+    if combined:
+        prompt = (
+            f"{instructions}\n{_CATEGORIES_JSON_INSTRUCTIONS}"
+            f"Available categories: {', '.join(AVAILABLE_CATEGORIES)}\n\n"
+            f"Part summaries:\n{joined}\n\nJSON response:"
+        )
+        return ChatRequest(
             messages=[
                 {
                     "role": "system",
-                    "content": "You are a professional news editor. Always provide summaries in English."
+                    "content": (
+                        "You are a professional news editor. Always write summaries in English "
+                        "and only return valid JSON."
+                    ),
                 },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
+                {"role": "user", "content": prompt},
             ],
-            temperature=0.3,  # Low temperature for consistent, factual summaries
-            max_tokens=500,
-            timeout=30
+            temperature=0.3,
+            max_tokens=600,
+            prompt_version=REDUCE_COMBINED_PROMPT_VERSION,
+            cache_input=joined,
+            accept=lambda text: _parse_combined(text) is not None,
         )
+    return ChatRequest(
+        messages=[
+            {"role": "system", "content": "You are a professional news editor. Always provide summaries in English."},
+            {"role": "user", "content": f"{instructions}\n\nPart summaries:\n{joined}\n\nSummary:"},
+        ],
+        temperature=0.3,
+        max_tokens=500,
+        prompt_version=REDUCE_PROMPT_VERSION,
+        cache_input=joined,
+        accept=lambda text: len(text) > 20,
+    )
+
 
-        summary = response.choices[0].message.content.strip()
+def _summarize_chunks(chunks: List[str]) -> List[str]:
+    """Map step: summarize every chunk in parallel (order preserved)"""
+    # Run each chunk in a copy of this context so its calls are attributed to the current flow run
+    contexts = [contextvars.copy_context() for _ in chunks]
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        return list(executor.map(
+            lambda context, item: context.run(_chat_completion, _chunk_request(item[1], item[0], len(chunks)))[0],
+            contexts,
+            enumerate(chunks, 1),
+        ))
+
+
+async def _summarize_chunks_async(
+    chunks: List[str], async_client: AsyncOpenAI, use_cache: bool = True
+) -> List[str]:
+    """Async map step for the concurrent AI engine"""
+    results = await asyncio.gather(*(
+        _chat_completion_async(_chunk_request(chunk, i, len(chunks)), async_client, use_cache)
+        for i, chunk in enumerate(chunks, 1)
+    ))
+    return [content for content, _ in results]
+
+
+def summarize_article(clean_text: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Summarize an article using OpenRouter AI models (see summarize_article_task).
+
+    Returns:
+        Tuple of (summary in English or None if the content is unusable,
+        model that wrote it)
+    """
+    logger = get_run_logger()
+
+    if not clean_text or not clean_text.strip():
+        logger.warning("Empty article content provided")
+        return None, None
+
+    if len(clean_text) < 50:
+        logger.warning("Article content too short for meaningful summarization")
+        return None, None
+
+    chunks = plan_summary_input(clean_text)
+
+    try:
+        if len(chunks) > 1:
+            # Long article: summarize chunks in parallel, then reduce
+            logger.info(f"Summarizing long article in {len(chunks)} chunks")
+            summary, model = _chat_completion(_reduce_request(_summarize_chunks(chunks)))
+        else:
+            logger.info("Summarizing article")
+            summary, model = _chat_completion(_summary_request(clean_text))
 
         if summary and len(summary) > 20:  # Basic validation
-            logger.info("Successfully generated summary")
-            return summary
+            logger.info(f"Successfully generated summary with {model}")
+            return summary, model
         else:
             logger.warning("Generated summary too short or empty")
-            return None
+            return None, None
 
     except Exception as e:
         logger.error(f"Failed to summarize article: {e}")
         raise
 
 
-@task(retries=2, retry_delay_seconds=10)
-def categorize_article_task(content: str) -> List[str]:
+def categorize_article(content: str) -> List[str]:
     """
-    Categorize an article into high-level topic tags using the summary/content.
-
-    Args:
-        content: Article summary or body text.
+    Categorize an article into high-level topic tags (see categorize_article_task).
 
     Returns:
-        List of 1-3 category labels (Title Case strings).
+        List of 0-3 category labels (Title Case strings).
     """
     logger = get_run_logger()
 
-    AVAILABLE_CATEGORIES = [
-        "Technology",
-        "Business",
-        "Politics",
-        "World",
-        "Science",
-        "Health",
-        "Sports",
-        "Entertainment",
-        "Finance",
-        "Climate",
-        "Environment",
-        "Culture",
-        "Geopolitics",
-        "Security",
-        "Education",
-        "Economy",
-        "Opinion"
-    ]
-
     if not content or len(content.strip()) < 40:
         logger.warning("Article content too short for categorization")
         return []
 
-    model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.2-3b-instruct:free")
-
-    prompt = (
-        "Given the following news article summary, select up to three categories "
-        "from the provided list that best describe the article. Respond ONLY with a "
-        "valid JSON object in the following form: {\"categories\": [\"Category1\", \"Category2\"]}. "
-        "Use only categories from the list.\n\n"
-        f"Available categories: {', '.join(AVAILABLE_CATEGORIES)}\n\n"
-        f"Article summary:\n{content[:3000]}\n\nJSON response:"
-    )
-
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a classifier that tags news articles with professional, "
-                        "high-level categories. Only return valid JSON arrays."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=150,
-            timeout=30,
-        )
-
-        raw_output = response.choices[0].message.content.strip()
-        logger.info(f"Category raw output: {raw_output}")
-
-        import json
-        import re
+        raw_output, model = _chat_completion(_category_request(content))
+        logger.info(f"Category raw output from {model}: {raw_output}")
 
-        cleaned: List[str] = []
-
-        try:
-            parsed = json.loads(raw_output)
-            if isinstance(parsed, dict) and "categories" in parsed:
-                categories = parsed["categories"]
-            elif isinstance(parsed, list):
-                categories = parsed
-            else:
-                raise ValueError("Unexpected JSON structure")
-        except Exception:
-            # Attempt to extract categories using regex if JSON parsing fails
-            matches = re.findall(r"[A-Za-z][A-Za-z\s-]{2,20}", raw_output)
-            categories = matches
-
-        for item in categories:
-            if not isinstance(item, str):
-                continue
-            normalized = item.strip().title()
-            if normalized in AVAILABLE_CATEGORIES and normalized not in cleaned:
-                cleaned.append(normalized)
-            if len(cleaned) == 3:
-                break
+        cleaned = _parse_categories(raw_output)
 
         if not cleaned:
             logger.warning("Categorization returned no valid categories")
@@ -202,6 +577,127 @@ def categorize_article_task(content: str) -> List[str]:
         return []
 
 
+def _parse_combined(raw_output: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    Parse a combined {"summary": ..., "categories": [...]} response.
+
+    Returns:
+        (summary, categories) when the summary is usable and at least one
+        category is in AVAILABLE_CATEGORIES, otherwise None
+    """
+    match = _JSON_OBJECT_RE.search(raw_output or "")
+    if not match:
+        return None
+    try:
+        parsed = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+
+    summary = parsed.get("summary")
+    if not isinstance(summary, str) or len(summary.strip()) <= 20:
+        return None
+
+    categories = _parse_categories(json.dumps({"categories": parsed.get("categories")}))
+    if not categories:
+        return None
+    return summary.strip(), categories
+
+
+def summarize_and_categorize(clean_text: str) -> Tuple[Optional[str], List[str], Optional[str]]:
+    """
+    Summarize and categorize an article in one structured-JSON request
+    (see summarize_and_categorize_task).
+
+    Returns:
+        (summary or None, list of 0-3 categories, model that wrote the summary)
+    """
+    logger = get_run_logger()
+
+    if not clean_text or not clean_text.strip():
+        logger.warning("Empty article content provided")
+        return None, [], None
+
+    if len(clean_text) < 50:
+        logger.warning("Article content too short for meaningful summarization")
+        return None, [], None
+
+    chunks = plan_summary_input(clean_text)
+
+    try:
+        if len(chunks) > 1:
+            logger.info(f"Summarizing and categorizing long article in {len(chunks)} chunks")
+            raw_output, model = _chat_completion(_reduce_request(_summarize_chunks(chunks), combined=True))
+        else:
+            logger.info("Summarizing and categorizing article")
+            raw_output, model = _chat_completion(_combined_request(clean_text))
+        parsed = _parse_combined(raw_output)
+    except Exception as e:
+        logger.warning(f"Combined request failed, falling back to separate calls: {e}")
+        parsed = None
+
+    if parsed is not None:
+        summary, categories = parsed
+        logger.info(f"Successfully generated summary with {model}, labels: {categories}")
+        return summary, categories, model
+
+    logger.warning("Combined response unusable, falling back to separate summarize/categorize calls")
+    summary, model = summarize_article(clean_text)
+    if not summary:
+        return None, [], None
+    return summary, categorize_article(summary), model
+
+
+@task(retries=3, retry_delay_seconds=10)
+def summarize_article_task(clean_text: str, target_lang: str = "en") -> Tuple[Optional[str], Optional[str]]:
+    """
+    Summarize an article using OpenRouter AI models.
+
+    Args:
+        clean_text: Cleaned article text (raw_articles.clean_text)
+        target_lang: Target language for summary ('en' for English)
+
+    Returns:
+        Tuple of (summary in English or None if summarization fails,
+        model that wrote it)
+    """
+    return summarize_article(clean_text)
+
+
+@task(retries=2, retry_delay_seconds=10)
+def categorize_article_task(content: str) -> List[str]:
+    """
+    Categorize an article into high-level topic tags using the summary/content.
+
+    Args:
+        content: Article summary or body text.
+
+    Returns:
+        List of 1-3 category labels (Title Case strings).
+    """
+    return categorize_article(content)
+
+
+@task(retries=3, retry_delay_seconds=10)
+def summarize_and_categorize_task(clean_text: str) -> Tuple[Optional[str], List[str], Optional[str]]:
+    """
+    Summarize and categorize an article with a single OpenRouter request.
+
+    The model returns one JSON object with both the summary and categories;
+    categories are validated against AVAILABLE_CATEGORIES. If the response
+    cannot be parsed, falls back to separate summarize and categorize calls.
+
+    Args:
+        clean_text: Cleaned article text (raw_articles.clean_text)
+
+    Returns:
+        Tuple of (English summary or None, list of 0-3 category labels,
+        model that wrote the summary)
+    """
+    return summarize_and_categorize(clean_text)
+
+
 @task(retries=1)
 def keep_original_title_task(title: str) -> Optional[str]:
     """
@@ -2,13 +2,67 @@
 RSS feed processing tasks for Prefect workflows.
 """
 import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 
 import feedparser
+import httpx
 from prefect import task, get_run_logger
 import trafilatura
 
+from app_flows.tasks.database_tasks import (
+    FingerprintIndex,
+    get_feed_state,
+    get_fingerprint_index,
+    save_article_batch,
+    save_feed_state,
+)
+from app_flows.utils.fetch_scheduler import get_fetch_scheduler, parse_retry_after
+from app_flows.utils.page_cache import get_page_cache
+from app_flows.utils.text_cleaning import clean_html
+
+
+# Full-text extraction tuning
+FULLTEXT_MAX_WORKERS = int(os.getenv("FULLTEXT_MAX_WORKERS", "16"))
+FULLTEXT_TIMEOUT_SECONDS = float(os.getenv("FULLTEXT_TIMEOUT_SECONDS", "20"))
+FEED_TIMEOUT_SECONDS = float(os.getenv("FEED_TIMEOUT_SECONDS", "30"))
+# Articles per database write in streaming collection
+STREAM_BATCH_SIZE = int(os.getenv("COLLECTION_STREAM_BATCH_SIZE", "10"))
+
+# Browser-like headers to avoid being blocked
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+FEED_ACCEPT_HEADER = "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.9, */*;q=0.8"
+
+# Process-wide HTTP client, shared by all feeds
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    """Return the shared keep-alive HTTP client used for article downloads"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                headers=REQUEST_HEADERS,
+                follow_redirects=True,
+                verify=False,
+                limits=httpx.Limits(max_connections=FULLTEXT_MAX_WORKERS),
+            )
+        return _http_client
+
 
 def fingerprint(source_url: str, title: str, summary: str) -> str:
     """Generate unique fingerprint for article deduplication"""
@@ -47,8 +101,13 @@ def extract_body_html(entry: Any) -> str:
     return content or ""
 
 
-def extract_image_url(entry: Any) -> Optional[str]:
-    """Extract image/thumbnail URL from RSS entry"""
+def extract_image_url(entry: Any, content_image_url: Optional[str] = None) -> Optional[str]:
+    """Extract image/thumbnail URL from RSS entry
+
+    ``content_image_url`` is the first inline image of the entry body when
+    the caller has already cleaned it (see clean_html); otherwise the body
+    is cleaned here.
+    """
     # Check for Media RSS thumbnail
     if hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
         if isinstance(entry.media_thumbnail, list):
@@ -71,13 +130,10 @@ def extract_image_url(entry: Any) -> Optional[str]:
                 return getattr(enclosure, 'href', None) or enclosure.get('href')
 
     # Check for inline images in content/summary
-    content = extract_body_html(entry)
-    if content:
-        import re
-        # Look for img src attributes
-        img_match = re.search(r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>', content, re.IGNORECASE)
-        if img_match:
-            return img_match.group(1)
+    if content_image_url is None:
+        content_image_url = clean_html(extract_body_html(entry)).image_url
+    if content_image_url:
+        return content_image_url
 
     # Check for itunes:image (podcast feeds)
     if hasattr(entry, 'itunes_image') and entry.itunes_image:
@@ -86,26 +142,79 @@ def extract_image_url(entry: Any) -> Optional[str]:
     return None
 
 
-def extract_full_text_from_url(url: str) -> Optional[str]:
+def download_html(url: str, timeout: float = FULLTEXT_TIMEOUT_SECONDS) -> Optional[bytes]:
+    """Download a page within a total time budget, under the per-host scheduler.
+
+    Returns the raw response body, or None when the host is backing off, the
+    request fails, returns a non-200 status or exceeds ``timeout`` seconds end
+    to end. Every outcome is reported to the fetch scheduler so it can adapt
+    the host's concurrency and delay.
+    """
+    scheduler = get_fetch_scheduler()
+    if not scheduler.acquire(url):
+        print(f"⏳ Host is backing off, skipping download: {url}")
+        return None
+
+    started = time.monotonic()
+    deadline = started + timeout
+    status: Optional[int] = None
+    retry_after: Optional[float] = None
+    error: Optional[str] = None
+    try:
+        with _get_http_client().stream("GET", url, timeout=timeout) as response:
+            status = response.status_code
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if status != 200:
+                print(f"⚠️  HTTP {status} downloading: {url}")
+                return None
+            chunks = []
+            for chunk in response.iter_bytes():
+                if time.monotonic() > deadline:
+                    error = "timeout"
+                    print(f"⚠️  Download exceeded {timeout:.0f}s budget: {url}")
+                    return None
+                chunks.append(chunk)
+            return b"".join(chunks)
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+        print(f"⚠️  {error} downloading {url}: {e}")
+        return None
+    finally:
+        scheduler.release(
+            url,
+            status=status,
+            latency=time.monotonic() - started,
+            retry_after=retry_after,
+            error=error,
+        )
+
+
+def fetch_page(url: str, timeout: float = FULLTEXT_TIMEOUT_SECONDS) -> Optional[bytes]:
+    """Return a page's HTML from the on-disk cache, downloading it on a miss.
+
+    Downloads go through the per-host fetch scheduler; cache hits don't.
+    """
+    cache = get_page_cache()
+    body = cache.get(url)
+    if body is not None:
+        return body
+
+    body = download_html(url, timeout=timeout)
+    if body:
+        cache.put(url, body)
+    return body
+
+
+def extract_full_text_from_url(url: str, timeout: float = FULLTEXT_TIMEOUT_SECONDS) -> Optional[str]:
     """Download and extract full article text from a URL using trafilatura.
 
     Returns plain text if extraction is successful and sufficiently long,
     otherwise returns None so callers can fallback to RSS content/summary.
     """
+    downloaded = fetch_page(url, timeout=timeout)
+    if not downloaded:
+        return None
     try:
-        # Add proper headers to avoid being blocked
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
-        
-        downloaded = trafilatura.fetch_url(url, no_ssl=True, headers=headers)
-        if not downloaded:
-            return None
         text = trafilatura.extract(
             downloaded,
             include_images=False,
@@ -113,18 +222,103 @@ def extract_full_text_from_url(url: str) -> Optional[str]:
             include_formatting=False,
             favor_recall=True,
         )
-        if text:
-            cleaned = text.strip()
-            if len(cleaned) > 200:
-                return cleaned
-    except Exception:
+    except Exception as e:
+        print(f"⚠️  trafilatura failed to extract {url}: {e}")
         return None
+    if text:
+        cleaned = text.strip()
+        if len(cleaned) > 200:
+            return cleaned
     return None
 
 
-def parse_rss_feed(feed_url: str) -> List[Dict[str, Optional[str]]]:
-    """Parse RSS feed and extract article data"""
-    parsed = feedparser.parse(feed_url)
+def _interleave_by_host(urls: List[str]) -> List[str]:
+    """Order URLs round-robin across hosts so one slow host can't hog the workers"""
+    by_host: Dict[str, List[str]] = {}
+    for url in urls:
+        by_host.setdefault(urlparse(url).netloc.lower(), []).append(url)
+    ordered: List[str] = []
+    queues = list(by_host.values())
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
+def iter_full_texts(urls: List[str]) -> Iterator[Tuple[str, Optional[str]]]:
+    """Extract full text for many URLs concurrently, yielding results as they finish.
+
+    Uses up to FULLTEXT_MAX_WORKERS threads and a FULLTEXT_TIMEOUT_SECONDS
+    budget per URL; per-host concurrency and pacing come from the fetch
+    scheduler.
+
+    Yields:
+        (url, extracted text or None where extraction failed), in completion order
+    """
+    unique_urls = list(dict.fromkeys(url for url in urls if url))
+    if not unique_urls:
+        return
+
+    workers = max(1, min(FULLTEXT_MAX_WORKERS, len(unique_urls)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fulltext") as pool:
+        futures = {
+            pool.submit(extract_full_text_from_url, url): url
+            for url in _interleave_by_host(unique_urls)
+        }
+        for future in as_completed(futures):
+            url = futures.pop(future)
+            try:
+                yield url, future.result()
+            except Exception as e:
+                print(f"❌ Full text extraction crashed for {url}: {e}")
+                yield url, None
+
+
+def extract_full_texts(urls: List[str]) -> Dict[str, Optional[str]]:
+    """Extract full text for many URLs concurrently.
+
+    Returns:
+        Mapping of URL to extracted text, or None where extraction failed
+    """
+    return dict(iter_full_texts(urls))
+
+
+def fetch_feed_document(
+    feed_url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> httpx.Response:
+    """Download a feed, sending conditional-GET headers when validators are known.
+
+    Returns the response, whose status is either 200 or 304 (not modified).
+    Raises httpx.HTTPError for network errors and other statuses.
+    """
+    headers = {"Accept": FEED_ACCEPT_HEADER}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response = _get_http_client().get(feed_url, headers=headers, timeout=FEED_TIMEOUT_SECONDS)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+def _parse_feed_entries(
+    feed_url: str,
+    content: Optional[bytes] = None,
+    content_type: Optional[str] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """Parse feed entries into article dicts carrying the RSS body only"""
+    if content is not None:
+        response_headers = {"content-location": feed_url}
+        if content_type:
+            response_headers["content-type"] = content_type
+        parsed = feedparser.parse(content, response_headers=response_headers)
+    else:
+        parsed = feedparser.parse(feed_url)
     articles: List[Dict[str, Optional[str]]] = []
 
     for entry in parsed.entries:
@@ -132,17 +326,9 @@ def parse_rss_feed(feed_url: str) -> List[Dict[str, Optional[str]]]:
         title = getattr(entry, "title", "") or entry.get("title", "") or ""
         summary = getattr(entry, "summary", "") or entry.get("summary", "") or ""
         body_html = extract_body_html(entry)
-        image_url = extract_image_url(entry)
-
-        # Try to replace RSS body with full-text extraction when possible
-        if source_url:
-            full_text = extract_full_text_from_url(source_url)
-            if full_text:
-                # Store as body_html even though it's plain text; downstream tasks strip HTML anyway
-                body_html = full_text
-                print(f"✅ Extracted full text ({len(full_text)} chars) from: {source_url}")
-            else:
-                print(f"⚠️  Full text extraction failed, using RSS content for: {source_url}")
+        # One pass over the body gives the clean text and the first inline image
+        document = clean_html(body_html)
+        image_url = extract_image_url(entry, document.image_url)
 
         # published can be in different fields; prefer published_parsed then updated_parsed
         published_struct = getattr(entry, "published_parsed", None) or entry.get("published_parsed")
@@ -158,6 +344,8 @@ def parse_rss_feed(feed_url: str) -> List[Dict[str, Optional[str]]]:
                 "source_url": source_url,
                 "title": title,
                 "body_html": body_html,
+                "clean_text": document.text,
+                "word_count": document.word_count,
                 "image_url": image_url,
                 "published_at": published_at,
             }
@@ -166,32 +354,231 @@ def parse_rss_feed(feed_url: str) -> List[Dict[str, Optional[str]]]:
     return articles
 
 
+def iter_rss_feed(
+    feed_url: str,
+    content: Optional[bytes] = None,
+    content_type: Optional[str] = None,
+    fingerprint_index: Optional[FingerprintIndex] = None,
+) -> Iterator[Dict[str, Optional[str]]]:
+    """Parse RSS feed and yield article data as each full-text download finishes.
+
+    When ``content`` is given it is parsed directly instead of downloading
+    ``feed_url`` again; the URL is still used to resolve relative links.
+    When ``fingerprint_index`` is given, entries that are already stored in
+    raw_articles are dropped before any full-text download.
+    """
+    articles = _parse_feed_entries(feed_url, content, content_type)
+
+    if fingerprint_index is not None and articles:
+        new_fingerprints = fingerprint_index.filter_new(article["fingerprint"] for article in articles)
+        new_articles = [article for article in articles if article["fingerprint"] in new_fingerprints]
+        # Count entries, not fingerprints: an entry listed twice is still new (the save deduplicates it)
+        skipped = len(articles) - len(new_articles)
+        articles = new_articles
+        if skipped:
+            print(f"⏭️  Skipping {skipped} already-stored articles from: {feed_url}")
+
+    # Articles without a link keep their RSS body and are ready immediately
+    pending: Dict[str, List[Dict[str, Optional[str]]]] = {}
+    for article in articles:
+        if article["source_url"]:
+            pending.setdefault(article["source_url"], []).append(article)
+        else:
+            yield article
+    del articles
+
+    # Try to replace RSS bodies with full-text extraction, downloading concurrently
+    for source_url, full_text in iter_full_texts(list(pending)):
+        for article in pending.pop(source_url):
+            if full_text:
+                # Store as body_html even though it's plain text
+                document = clean_html(full_text, plain_text=True)
+                article["body_html"] = full_text
+                article["clean_text"] = document.text
+                article["word_count"] = document.word_count
+                print(f"✅ Extracted full text ({len(full_text)} chars) from: {source_url}")
+            else:
+                print(f"⚠️  Full text extraction failed, using RSS content for: {source_url}")
+            yield article
+
+
+def parse_rss_feed(
+    feed_url: str,
+    content: Optional[bytes] = None,
+    content_type: Optional[str] = None,
+    fingerprint_index: Optional[FingerprintIndex] = None,
+) -> List[Dict[str, Optional[str]]]:
+    """Parse RSS feed and extract article data (see iter_rss_feed)"""
+    return list(iter_rss_feed(feed_url, content, content_type, fingerprint_index))
+
+
+def _fetch_changed_feed(
+    logger: Any,
+    feed_url: str,
+    feed_name: str,
+) -> Optional[Tuple[httpx.Response, Dict[str, Optional[str]]]]:
+    """Conditionally fetch a feed.
+
+    Returns None (after recording the poll) when the feed is unchanged,
+    otherwise the response plus the feed state to record once its articles
+    have been handled.
+    """
+    # A missing feed-state store only costs us the conditional GET, never the run
+    state: Dict[str, Optional[str]] = {}
+    try:
+        state = get_feed_state(feed_url) or {}
+    except Exception as e:
+        logger.warning(f"Could not load feed state for {feed_name}, fetching unconditionally: {e}")
+
+    response = fetch_feed_document(feed_url, state.get("etag"), state.get("last_modified"))
+    new_state = {
+        "etag": response.headers.get("etag") or state.get("etag"),
+        "last_modified": response.headers.get("last-modified") or state.get("last_modified"),
+        "content_hash": state.get("content_hash"),
+    }
+
+    if response.status_code == 304:
+        logger.info(f"Feed not modified since last poll: {feed_name}")
+        record_feed_state(logger, feed_url, new_state, changed=False)
+        return None
+
+    new_state["content_hash"] = hashlib.sha256(response.content).hexdigest()
+    if new_state["content_hash"] == state.get("content_hash"):
+        logger.info(f"Feed content unchanged since last poll: {feed_name}")
+        record_feed_state(logger, feed_url, new_state, changed=False)
+        return None
+
+    return response, new_state
+
+
+def record_feed_state(logger: Any, feed_url: str, state: Dict[str, Optional[str]], changed: bool) -> None:
+    """Save a feed's conditional-GET state; a failure is logged, not raised"""
+    try:
+        save_feed_state(
+            feed_url,
+            state.get("etag"),
+            state.get("last_modified"),
+            state.get("content_hash"),
+            changed=changed,
+        )
+    except Exception as e:
+        logger.warning(f"Could not save feed state for {feed_url}: {e}")
+
+
 @task(retries=3, retry_delay_seconds=10)
-def fetch_rss_feed_task(feed_url: str, feed_name: str = "Unknown") -> List[Dict[str, Optional[str]]]:
+def fetch_rss_feed_task(
+    feed_url: str,
+    feed_name: str = "Unknown",
+) -> Tuple[List[Dict[str, Optional[str]]], Optional[Dict[str, Optional[str]]]]:
     """
     Prefect task to fetch and parse articles from an RSS feed.
 
+    The new feed state is returned rather than recorded: the caller records
+    it with ``record_feed_state()`` only after the articles are saved, so a
+    failed save makes the next poll fetch the feed again.
+
     Args:
         feed_url: URL of the RSS feed to fetch
         feed_name: Human-readable name of the feed for logging
 
     Returns:
-        List of article dictionaries with metadata
+        Tuple of (list of article dictionaries with metadata, feed state to
+        record after saving, or None if the feed was unchanged)
     """
     logger = get_run_logger()
 
     logger.info(f"Fetching RSS feed: {feed_name} ({feed_url})")
 
     try:
-        articles = parse_rss_feed(feed_url)
+        fetched = _fetch_changed_feed(logger, feed_url, feed_name)
+        if fetched is None:
+            return [], None
+        response, feed_state = fetched
+
+        articles = parse_rss_feed(
+            feed_url,
+            content=response.content,
+            content_type=response.headers.get("content-type"),
+            fingerprint_index=get_fingerprint_index(),
+        )
 
         if not articles:
-            logger.warning(f"No articles found in feed: {feed_name}")
-            return []
+            logger.info(f"No new articles in feed: {feed_name}")
+            return [], feed_state
 
-        logger.info(f"Successfully fetched {len(articles)} articles from {feed_name}")
-        return articles
+        logger.info(f"Successfully fetched {len(articles)} new articles from {feed_name}")
+        return articles, feed_state
 
     except Exception as e:
         logger.error(f"Failed to fetch RSS feed {feed_name}: {e}")
         raise
+
+
+@task(retries=3, retry_delay_seconds=10)
+def collect_rss_feed_task(
+    feed_url: str,
+    feed_name: str = "Unknown",
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> int:
+    """
+    Prefect task to fetch an RSS feed and stream its articles into raw_db.
+
+    Articles are written in batches of ``batch_size`` as their full-text
+    downloads finish, so memory stays flat regardless of feed size and the
+    first rows land before the slowest download completes. The feed state is
+    only recorded after every batch is written, so a failed run is re-fetched.
+
+    Args:
+        feed_url: URL of the RSS feed to fetch
+        feed_name: Human-readable name of the feed for logging
+        batch_size: Number of articles per database write
+
+    Returns:
+        Number of new articles saved
+    """
+    logger = get_run_logger()
+
+    logger.info(f"Collecting RSS feed: {feed_name} ({feed_url})")
+
+    try:
+        fetched = _fetch_changed_feed(logger, feed_url, feed_name)
+        if fetched is None:
+            return 0
+        response, feed_state = fetched
+
+        saved_count = 0
+        failed_count = 0
+        batch: List[Dict[str, Optional[str]]] = []
+
+        def flush() -> None:
+            nonlocal saved_count, failed_count
+            saved, failures = save_article_batch(batch)
+            saved_count += saved
+            failed_count += len(failures)
+            for article, error in failures:
+                logger.warning(f"Error saving article '{article.get('title', 'Unknown')}': {error}")
+            batch.clear()
+
+        for article in iter_rss_feed(
+            feed_url,
+            content=response.content,
+            content_type=response.headers.get("content-type"),
+            fingerprint_index=get_fingerprint_index(),
+        ):
+            batch.append(article)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        record_feed_state(logger, feed_url, feed_state, changed=True)
+
+        logger.info(
+            f"Saved {saved_count} new articles from {feed_name}"
+            + (f" ({failed_count} failed)" if failed_count else "")
+        )
+        return saved_count
+
+    except Exception as e:
+        logger.error(f"Failed to collect RSS feed {feed_name}: {e}")
+        raise
@@ -0,0 +1,116 @@
+"""
+Storage tiering tasks for raw_db.
+
+raw_articles is partitioned by month of created_at (see docker/init-schema.sql).
+These tasks keep partitions created ahead of time and move the bodies of old,
+processed articles into the compressed raw_article_archive table, so the hot
+partitions and their indexes stay small enough to remain in cache.
+"""
+import os
+from typing import Dict
+
+from psycopg2.extras import execute_values
+from prefect import task, get_run_logger
+
+from app_flows.utils.body_archive import compress_body
+from app_flows.utils.db_pool import raw_db_connection
+
+
+# Monthly partitions to keep created beyond the current month
+RAW_PARTITION_MONTHS_AHEAD = int(os.getenv("RAW_PARTITION_MONTHS_AHEAD", "3"))
+# Bodies of processed articles older than this move to the archive
+RAW_BODY_RETENTION_DAYS = int(os.getenv("RAW_BODY_RETENTION_DAYS", "30"))
+# Articles archived per transaction, and at most this many transactions per run
+RAW_ARCHIVE_BATCH_SIZE = int(os.getenv("RAW_ARCHIVE_BATCH_SIZE", "500"))
+RAW_ARCHIVE_MAX_BATCHES = int(os.getenv("RAW_ARCHIVE_MAX_BATCHES", "20"))
+
+
+@task(retries=2, retry_delay_seconds=5)
+def ensure_raw_partitions_task(months_ahead: int = RAW_PARTITION_MONTHS_AHEAD) -> int:
+    """
+    Create the raw_articles partitions for the current month and the next
+    ``months_ahead`` months, so new rows never land in the default partition.
+
+    Returns:
+        Number of partitions created
+    """
+    logger = get_run_logger()
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT ensure_raw_articles_partitions(NOW(), %s)", (months_ahead,))
+            created = cursor.fetchone()[0]
+        conn.commit()
+    if created:
+        logger.info(f"Created {created} raw_articles partitions")
+    return created
+
+
+@task(retries=1)
+def archive_raw_bodies_task(
+    retention_days: int = RAW_BODY_RETENTION_DAYS,
+    batch_size: int = RAW_ARCHIVE_BATCH_SIZE,
+    max_batches: int = RAW_ARCHIVE_MAX_BATCHES,
+) -> Dict[str, int]:
+    """
+    Move body_html of processed articles older than ``retention_days`` into
+    raw_article_archive (zlib-compressed) and clear it in raw_articles.
+
+    Each batch is one transaction: the archive insert and the body clearing
+    commit together, and rows are locked with SKIP LOCKED so concurrent runs
+    split the work. Unprocessed articles are never archived.
+
+    Returns:
+        Counts of archived articles and original/compressed bytes
+    """
+    logger = get_run_logger()
+    totals = {"articles": 0, "original_bytes": 0, "compressed_bytes": 0}
+
+    for _ in range(max_batches):
+        with raw_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, created_at, body_html
+                    FROM raw_articles
+                    WHERE processed_at IS NOT NULL
+                      AND body_html IS NOT NULL
+                      AND created_at < NOW() - make_interval(days => %s)
+                    ORDER BY created_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                """, (retention_days, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                archived = []
+                for raw_id, created_at, body_html in rows:
+                    original = body_html.encode("utf-8")
+                    compressed = compress_body(body_html)
+                    archived.append((raw_id, created_at, compressed, len(original)))
+                    totals["original_bytes"] += len(original)
+                    totals["compressed_bytes"] += len(compressed)
+
+                execute_values(cursor, """
+                    INSERT INTO raw_article_archive (raw_article_id, article_created_at, body_html_zlib, original_bytes)
+                    VALUES %s
+                    ON CONFLICT (raw_article_id) DO NOTHING
+                """, archived, page_size=len(archived))
+                execute_values(cursor, """
+                    UPDATE raw_articles AS ra
+                    SET body_html = NULL
+                    FROM (VALUES %s) AS v(id, created_at)
+                    WHERE ra.id = v.id AND ra.created_at = v.created_at
+                """, [(raw_id, created_at) for raw_id, created_at, _, _ in archived], page_size=len(archived))
+            conn.commit()
+        totals["articles"] += len(rows)
+
+        if len(rows) < batch_size:
+            break
+
+    if totals["articles"]:
+        ratio = totals["compressed_bytes"] / max(totals["original_bytes"], 1)
+        logger.info(
+            f"Archived {totals['articles']} article bodies older than {retention_days} days: "
+            f"{totals['original_bytes']} -> {totals['compressed_bytes']} bytes ({ratio:.0%})"
+        )
+    return totals
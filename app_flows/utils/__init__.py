@@ -0,0 +1 @@
+# Shared helpers for News AI pipeline
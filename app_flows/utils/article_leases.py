@@ -0,0 +1,178 @@
+"""
+Lease-based claiming of raw articles for AI processing.
+
+Each AI run claims its batch with SELECT ... FOR UPDATE SKIP LOCKED and
+stamps the rows with its worker id and a lease expiry, so concurrent runs
+(on one node or many) never pick the same article. A heartbeat thread keeps
+the leases alive while the run works; if the worker crashes, its leases
+expire after AI_LEASE_SECONDS and the articles are claimed again by the
+next run. Processed articles drop their lease, and anything left
+unprocessed is released at the end of the run.
+
+A released article counts as a failed attempt: it is not claimable again
+for AI_RETRY_BACKOFF_SECONDS (doubling with each attempt, capped at
+AI_RETRY_MAX_BACKOFF_SECONDS), and after AI_MAX_ATTEMPTS it is parked, so
+articles that keep failing never block the newer ones behind them.
+"""
+import os
+import socket
+import threading
+import uuid
+from typing import List, Optional, Sequence, Tuple
+
+from app_flows.utils.db_pool import raw_db_connection
+
+
+AI_LEASE_SECONDS = int(os.getenv("AI_LEASE_SECONDS", "600"))
+# Failed attempts after which an article is parked (no longer claimed)
+AI_MAX_ATTEMPTS = int(os.getenv("AI_MAX_ATTEMPTS", "5"))
+AI_RETRY_BACKOFF_SECONDS = int(os.getenv("AI_RETRY_BACKOFF_SECONDS", "300"))
+AI_RETRY_MAX_BACKOFF_SECONDS = int(os.getenv("AI_RETRY_MAX_BACKOFF_SECONDS", "21600"))
+
+# Unprocessed, not leased, not backing off after a failure and not parked
+CLAIMABLE_PREDICATE = """
+    processed_at IS NULL
+    AND (lease_expires_at IS NULL OR lease_expires_at < NOW())
+    AND (next_attempt_at IS NULL OR next_attempt_at <= NOW())
+    AND ai_attempts < %(max_attempts)s
+"""
+
+CLAIM_ARTICLES_SQL = f"""
+    WITH claimable AS (
+        SELECT id, created_at, lease_expires_at IS NOT NULL AS reclaimed
+        FROM raw_articles
+        WHERE {CLAIMABLE_PREDICATE}
+        ORDER BY created_at ASC
+        LIMIT %(limit)s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE raw_articles AS ra
+    SET lease_owner = %(worker_id)s, lease_expires_at = NOW() + make_interval(secs => %(lease_seconds)s)
+    FROM claimable
+    WHERE ra.id = claimable.id AND ra.created_at = claimable.created_at
+    RETURNING ra.id, ra.title, ra.clean_text,
+              CASE WHEN ra.clean_text IS NULL THEN ra.body_html END,
+              claimable.reclaimed, ra.created_at
+"""
+
+
+def new_worker_id() -> str:
+    """Lease owner id for one AI run: host, process and a random suffix"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def claim_articles(cursor, limit: int, worker_id: str, lease_seconds: int = AI_LEASE_SECONDS) -> List[Tuple]:
+    """
+    Claim up to ``limit`` unprocessed articles (oldest first), skipping rows
+    that are leased or locked by another worker, backing off after a failed
+    attempt, or parked. Expired leases are claimed like free rows. The caller
+    commits.
+
+    Returns:
+        (id, title, clean_text, body_html if clean_text is NULL, reclaimed)
+        tuples in created_at order
+    """
+    cursor.execute(CLAIM_ARTICLES_SQL, {
+        "max_attempts": AI_MAX_ATTEMPTS,
+        "limit": limit,
+        "worker_id": worker_id,
+        "lease_seconds": lease_seconds,
+    })
+    rows = sorted(cursor.fetchall(), key=lambda row: (row[5], row[0]))
+    return [row[:5] for row in rows]
+
+
+def count_claimable_articles() -> int:
+    """Unprocessed articles the next claim can get (not leased, backing off or parked)"""
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM raw_articles WHERE {CLAIMABLE_PREDICATE}",
+                {"max_attempts": AI_MAX_ATTEMPTS},
+            )
+            return cursor.fetchone()[0]
+
+
+def count_leased_articles() -> int:
+    """Unprocessed articles currently held by a live lease (AI work in progress somewhere)"""
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT COUNT(*) FROM raw_articles
+                WHERE processed_at IS NULL AND lease_expires_at >= NOW()
+            """)
+            return cursor.fetchone()[0]
+
+
+def renew_leases(raw_ids: Sequence[int], worker_id: str, lease_seconds: int = AI_LEASE_SECONDS) -> int:
+    """Extend this worker's leases on still-unprocessed articles; returns how many were renewed"""
+    if not raw_ids:
+        return 0
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE raw_articles
+                SET lease_expires_at = NOW() + make_interval(secs => %s)
+                WHERE id = ANY(%s) AND lease_owner = %s AND processed_at IS NULL
+            """, (lease_seconds, list(raw_ids), worker_id))
+            renewed = cursor.rowcount
+        conn.commit()
+    return renewed
+
+
+def release_leases(raw_ids: Sequence[int], worker_id: str) -> Tuple[int, int]:
+    """
+    Give up this worker's leases on articles it did not finish, recording a
+    failed attempt: each is claimable again after an exponential backoff, or
+    parked once it reaches AI_MAX_ATTEMPTS.
+
+    Returns:
+        Tuple of (leases released, articles parked by this release)
+    """
+    if not raw_ids:
+        return 0, 0
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE raw_articles
+                SET lease_owner = NULL,
+                    lease_expires_at = NULL,
+                    ai_attempts = ai_attempts + 1,
+                    next_attempt_at = NOW() + make_interval(secs => LEAST(%s * power(2, ai_attempts), %s))
+                WHERE id = ANY(%s) AND lease_owner = %s AND processed_at IS NULL
+                RETURNING ai_attempts >= %s
+            """, (AI_RETRY_BACKOFF_SECONDS, AI_RETRY_MAX_BACKOFF_SECONDS, list(raw_ids), worker_id, AI_MAX_ATTEMPTS))
+            outcomes = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+    return len(outcomes), sum(outcomes)
+
+
+class LeaseHeartbeat:
+    """
+    Renew a batch's leases in a background thread every third of the lease
+    period, so long runs never lose their articles to another worker.
+    """
+
+    def __init__(self, raw_ids: Sequence[int], worker_id: str, lease_seconds: int = AI_LEASE_SECONDS):
+        self.raw_ids = list(raw_ids)
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(max(1.0, self.lease_seconds / 3)):
+            try:
+                renew_leases(self.raw_ids, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"⚠️  Could not renew article leases for {self.worker_id}: {e}")
+
+    def start(self) -> "LeaseHeartbeat":
+        self._thread = threading.Thread(target=self._run, name="article-lease-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
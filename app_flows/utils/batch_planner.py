@@ -0,0 +1,90 @@
+"""
+Backlog- and time-budget-aware sizing of AI processing batches.
+
+A scheduled AI stage gets a wall-clock budget (AI_RUN_BUDGET_SECONDS) and
+spends it on the real backlog rather than on whatever the last collection
+pass happened to store. Each batch is sized from the claimable backlog, the
+time left and the measured seconds per article, so the stage keeps draining
+old and previously failed articles while never overrunning the next tick.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+AI_RUN_BUDGET_SECONDS = float(os.getenv("AI_RUN_BUDGET_SECONDS", "240"))
+AI_BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", "200"))
+# Seconds per article assumed before this process has measured a batch
+AI_SECONDS_PER_ARTICLE_ESTIMATE = float(os.getenv("AI_SECONDS_PER_ARTICLE_ESTIMATE", "3"))
+# Weight of the latest batch in the seconds-per-article average
+AI_THROUGHPUT_EWMA_ALPHA = float(os.getenv("AI_THROUGHPUT_EWMA_ALPHA", "0.5"))
+
+
+def plan_batch_size(
+    backlog: int,
+    remaining_seconds: float,
+    seconds_per_article: float,
+    max_size: int = AI_BATCH_MAX_SIZE,
+) -> int:
+    """
+    Articles to claim for the next batch: as many as fit in the remaining
+    budget at the current throughput, capped by the backlog and ``max_size``.
+
+    Returns:
+        Batch size (0 when the backlog is empty or not even one article fits)
+    """
+    if backlog <= 0 or remaining_seconds <= 0:
+        return 0
+    fits = int(remaining_seconds / max(seconds_per_article, 0.001))
+    return max(0, min(backlog, max_size, fits))
+
+
+class ThroughputEstimator:
+    """
+    EWMA of wall-clock seconds per processed article, measured over whole
+    batches (claiming, LLM calls, saves and per-run overhead included).
+    Thread-safe.
+    """
+
+    def __init__(self, initial_seconds: float = AI_SECONDS_PER_ARTICLE_ESTIMATE, alpha: float = AI_THROUGHPUT_EWMA_ALPHA):
+        self.alpha = alpha
+        self._seconds_per_article = initial_seconds
+        self._batches = 0
+        self._lock = threading.Lock()
+
+    @property
+    def seconds_per_article(self) -> float:
+        with self._lock:
+            return self._seconds_per_article
+
+    def record_batch(self, articles: int, elapsed_seconds: float) -> None:
+        """Fold one batch into the estimate (batches that processed nothing are ignored)"""
+        if articles <= 0:
+            return
+        sample = elapsed_seconds / articles
+        with self._lock:
+            if self._batches == 0:
+                self._seconds_per_article = sample
+            else:
+                self._seconds_per_article = self.alpha * sample + (1 - self.alpha) * self._seconds_per_article
+            self._batches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "seconds_per_article": round(self._seconds_per_article, 3),
+            }
+
+
+_estimator: Optional[ThroughputEstimator] = None
+_estimator_lock = threading.Lock()
+
+
+def get_throughput_estimator() -> ThroughputEstimator:
+    """Return the process-wide throughput estimator, creating it on first use"""
+    global _estimator
+    with _estimator_lock:
+        if _estimator is None:
+            _estimator = ThroughputEstimator()
+        return _estimator
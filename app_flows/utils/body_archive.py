@@ -0,0 +1,35 @@
+"""
+Compressed cold storage for raw article bodies.
+
+Old, processed articles keep their metadata and clean_text in raw_articles,
+but their body_html moves to raw_article_archive as zlib-compressed bytes,
+so the hot partitions stay small. Bodies are only read back for the rare
+reprocessing of an article that has no clean_text.
+"""
+import os
+import zlib
+from typing import Dict, Sequence
+
+
+RAW_ARCHIVE_COMPRESSION_LEVEL = int(os.getenv("RAW_ARCHIVE_COMPRESSION_LEVEL", "9"))
+
+
+def compress_body(body_html: str, level: int = RAW_ARCHIVE_COMPRESSION_LEVEL) -> bytes:
+    """zlib-compress a body for raw_article_archive.body_html_zlib"""
+    return zlib.compress(body_html.encode("utf-8"), level)
+
+
+def decompress_body(data: bytes) -> str:
+    """Inverse of compress_body (accepts the memoryview psycopg2 returns for BYTEA)"""
+    return zlib.decompress(bytes(data)).decode("utf-8")
+
+
+def load_archived_bodies(cursor, raw_article_ids: Sequence[int]) -> Dict[int, str]:
+    """Archived body_html by raw_article id (ids without an archived body are left out)"""
+    if not raw_article_ids:
+        return {}
+    cursor.execute(
+        "SELECT raw_article_id, body_html_zlib FROM raw_article_archive WHERE raw_article_id = ANY(%s)",
+        (list(raw_article_ids),),
+    )
+    return {raw_id: decompress_body(data) for raw_id, data in cursor.fetchall()}
@@ -0,0 +1,265 @@
+"""
+Local category classifier for article summaries.
+
+A TF-IDF bag-of-words model with one logistic regression per category
+(one-vs-rest), trained offline from the labels already stored in
+filtered_db.filtered_articles.categories. Confident predictions replace the
+categorization LLM call; low-confidence summaries are still sent to the LLM.
+
+The model is plain Python (no numpy/sklearn) and is saved as gzipped JSON
+at CATEGORY_MODEL_PATH. get_category_classifier() reloads it whenever the
+file changes, so a retrained model is picked up without a restart.
+"""
+import gzip
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+_project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORY_MODEL_PATH = os.getenv(
+    "CATEGORY_MODEL_PATH", os.path.join(_project_root, ".cache", "category_model.json.gz")
+)
+CATEGORY_CLASSIFIER_ENABLED = os.getenv("CATEGORY_CLASSIFIER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Summaries whose top category scores below this go to the LLM instead
+CATEGORY_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("CATEGORY_CLASSIFIER_MIN_CONFIDENCE", "0.7"))
+# Extra labels are kept when their probability reaches this
+CATEGORY_CLASSIFIER_LABEL_THRESHOLD = float(os.getenv("CATEGORY_CLASSIFIER_LABEL_THRESHOLD", "0.5"))
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9']+")
+_STOPWORDS = frozenset(
+    "a about after all also an and any are as at be been before but by can could did do does for from had has "
+    "have he her his how if in into is it its it's more most new not of on one or other our out over said says "
+    "she so some than that the their them then there these they this to up was we were what when which while "
+    "who will with would you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    return [token for token in _TOKEN_RE.findall((text or "").lower()) if token not in _STOPWORDS]
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class CategoryClassifier:
+    """
+    TF-IDF + one-vs-rest logistic regression over a fixed label set.
+
+    ``predict(text)`` returns up to three labels, or None when the model is
+    not confident enough and the caller should ask the LLM instead.
+    """
+
+    def __init__(
+        self,
+        labels: List[str],
+        vocabulary: Dict[str, int],
+        idf: List[float],
+        weights: List[List[float]],
+        biases: List[float],
+        metadata: Optional[Dict] = None,
+    ):
+        self.labels = labels
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.weights = weights
+        self.biases = biases
+        self.metadata = metadata or {}
+
+    def _vectorize(self, text: str) -> Dict[int, float]:
+        """L2-normalised TF-IDF vector as {feature index: weight}"""
+        counts = Counter(token for token in tokenize(text) if token in self.vocabulary)
+        vector = {
+            self.vocabulary[token]: (1.0 + math.log(count)) * self.idf[self.vocabulary[token]]
+            for token, count in counts.items()
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm:
+            vector = {index: value / norm for index, value in vector.items()}
+        return vector
+
+    def _probabilities(self, vector: Dict[int, float]) -> Dict[str, float]:
+        return {
+            label: _sigmoid(self.biases[k] + sum(self.weights[k][i] * x for i, x in vector.items()))
+            for k, label in enumerate(self.labels)
+        }
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Independent probability for every label"""
+        return self._probabilities(self._vectorize(text))
+
+    def predict(
+        self,
+        text: str,
+        min_confidence: float = CATEGORY_CLASSIFIER_MIN_CONFIDENCE,
+        label_threshold: float = CATEGORY_CLASSIFIER_LABEL_THRESHOLD,
+    ) -> Optional[List[str]]:
+        """
+        Up to three labels, best first, or None when the top label's
+        probability is below ``min_confidence`` (or nothing is recognised).
+        """
+        vector = self._vectorize(text)
+        if not vector:
+            return None
+        ranked = sorted(self._probabilities(vector).items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < min_confidence:
+            return None
+        return [ranked[0][0]] + [label for label, p in ranked[1:3] if p >= label_threshold]
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Optional[List[str]]]:
+        """predict() for each text"""
+        return [self.predict(text) for text in texts]
+
+    @classmethod
+    def train(
+        cls,
+        documents: Sequence[Tuple[str, Sequence[str]]],
+        labels: Sequence[str],
+        min_df: int = 2,
+        max_features: int = 20000,
+        epochs: int = 8,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        seed: int = 13,
+    ) -> "CategoryClassifier":
+        """
+        Fit the model on (text, categories) pairs. Categories outside
+        ``labels`` are ignored.
+        """
+        labels = list(labels)
+        label_index = {label: k for k, label in enumerate(labels)}
+
+        tokenized = [set(tokenize(text)) for text, _ in documents]
+        df = Counter(token for tokens in tokenized for token in tokens)
+        kept = sorted(
+            (token for token, count in df.items() if count >= min_df),
+            key=lambda token: (-df[token], token),
+        )[:max_features]
+        vocabulary = {token: i for i, token in enumerate(sorted(kept))}
+        n_docs = max(1, len(documents))
+        idf = [0.0] * len(vocabulary)
+        for token, i in vocabulary.items():
+            idf[i] = math.log((1 + n_docs) / (1 + df[token])) + 1.0
+
+        model = cls(labels, vocabulary, idf, [[0.0] * len(vocabulary) for _ in labels], [0.0] * len(labels))
+
+        examples = []
+        for text, categories in documents:
+            vector = model._vectorize(text)
+            if vector:
+                targets = {label_index[c] for c in categories if c in label_index}
+                examples.append((vector, targets))
+
+        # Start each bias at the label's log-odds so rare labels begin near their base rate
+        for k in range(len(labels)):
+            positives = sum(1 for _, targets in examples if k in targets)
+            rate = (positives + 0.5) / (len(examples) + 1.0)
+            model.biases[k] = math.log(rate / (1.0 - rate))
+
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(examples)
+            step = learning_rate / (1.0 + epoch)
+            for vector, targets in examples:
+                for k in range(len(labels)):
+                    weights = model.weights[k]
+                    z = model.biases[k] + sum(weights[i] * x for i, x in vector.items())
+                    gradient = _sigmoid(z) - (1.0 if k in targets else 0.0)
+                    model.biases[k] -= step * gradient
+                    for i, x in vector.items():
+                        weights[i] -= step * (gradient * x + l2 * weights[i])
+
+        model.metadata = {"trained_at": time.time(), "training_rows": len(examples)}
+        return model
+
+    def evaluate(self, documents: Sequence[Tuple[str, Sequence[str]]]) -> Dict[str, float]:
+        """Coverage (share answered locally) and precision of those answers on held-out data"""
+        answered = correct = 0
+        for text, categories in documents:
+            predicted = self.predict(text)
+            if predicted is None:
+                continue
+            answered += 1
+            if predicted[0] in categories:
+                correct += 1
+        return {
+            "rows": len(documents),
+            "coverage": answered / len(documents) if documents else 0.0,
+            "top_label_precision": correct / answered if answered else 0.0,
+        }
+
+    def save(self, path: str = CATEGORY_MODEL_PATH) -> None:
+        """Atomically write the model as gzipped JSON"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = {
+            "labels": self.labels,
+            "vocabulary": self.vocabulary,
+            "idf": self.idf,
+            "weights": [[round(w, 6) for w in row] for row in self.weights],
+            "biases": self.biases,
+            "metadata": self.metadata,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                f.write(json.dumps(payload).encode("utf-8"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str = CATEGORY_MODEL_PATH) -> "CategoryClassifier":
+        with gzip.open(path, "rb") as f:
+            payload = json.loads(f.read().decode("utf-8"))
+        return cls(
+            payload["labels"],
+            payload["vocabulary"],
+            payload["idf"],
+            payload["weights"],
+            payload["biases"],
+            payload.get("metadata"),
+        )
+
+
+_classifier: Optional[CategoryClassifier] = None
+_classifier_mtime: Optional[float] = None
+_classifier_lock = threading.Lock()
+
+
+def get_category_classifier() -> Optional[CategoryClassifier]:
+    """
+    Return the trained classifier, or None if it is disabled or has not
+    been trained yet. Reloads the model when the file on disk changes.
+    """
+    global _classifier, _classifier_mtime
+    if not CATEGORY_CLASSIFIER_ENABLED:
+        return None
+    with _classifier_lock:
+        try:
+            mtime = os.path.getmtime(CATEGORY_MODEL_PATH)
+        except OSError:
+            return _classifier
+        if mtime != _classifier_mtime:
+            try:
+                _classifier = CategoryClassifier.load(CATEGORY_MODEL_PATH)
+                _classifier_mtime = mtime
+                print(f"✅ Loaded category classifier ({_classifier.metadata.get('training_rows', '?')} training rows)")
+            except Exception as e:
+                print(f"⚠️ Could not load category classifier from {CATEGORY_MODEL_PATH}: {e}")
+                _classifier_mtime = mtime
+        return _classifier
@@ -0,0 +1,236 @@
+"""
+Process-wide PostgreSQL connection pools for raw_db and filtered_db.
+
+Shared by the Prefect tasks/flows and the FastAPI app so that each query
+reuses an open connection instead of paying a TCP + auth handshake.
+
+Usage:
+    from app_flows.utils.db_pool import raw_db_connection
+
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.commit()
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+
+RAW_DB = "raw_db"
+FILTERED_DB = "filtered_db"
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# How long a checkout may wait for a free connection before failing
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+# Connections idle for longer than this are pinged before being handed out
+DB_POOL_PING_AFTER_SECONDS = float(os.getenv("DB_POOL_PING_AFTER_SECONDS", "30"))
+
+
+def connection_params(database: str) -> Dict[str, Any]:
+    """psycopg2.connect() arguments for one of the application databases"""
+    return {
+        "host": os.getenv("POSTGRES_HOST"),
+        "port": os.getenv("POSTGRES_PORT"),
+        "database": database,
+        "user": database,  # Each database has a same-named user created by the init script
+        "password": os.getenv("POSTGRES_DEFAULT_USER_PASSWORD"),
+    }
+
+
+def dedicated_connection(database: str):
+    """
+    Open a connection outside the pools, for session state that must not
+    leak into pooled connections (e.g. LISTEN). The caller closes it.
+    """
+    return psycopg2.connect(**connection_params(database))
+
+
+@contextmanager
+def advisory_lock(name: str, database: str = RAW_DB) -> Iterator[bool]:
+    """
+    Try to take a session-level advisory lock named ``name`` without waiting.
+
+    Yields True if this process holds the lock for the duration of the block,
+    False if another session holds it. The lock lives on a dedicated
+    connection, so it is released when the block exits or the process dies.
+    """
+    conn = dedicated_connection(database)
+    try:
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (name,))
+            acquired = cursor.fetchone()[0]
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (name,))
+    finally:
+        conn.close()
+
+
+class PooledDatabase:
+    """
+    Thread-safe, lazily created connection pool for one database.
+
+    Checkouts block (up to DB_POOL_TIMEOUT_SECONDS) when all connections are
+    in use, connections are health-checked before reuse, and any transaction
+    left open by the caller is rolled back when the connection is returned.
+    """
+
+    def __init__(self, database: str, min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE):
+        self.database = database
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool: pool.ThreadedConnectionPool = None
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+        self._stats = {
+            "checkouts": 0,
+            "wait_seconds_total": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+        }
+
+    def _get_pool(self) -> pool.ThreadedConnectionPool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = pool.ThreadedConnectionPool(self.min_size, self.max_size, **connection_params(self.database))
+            return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < DB_POOL_PING_AFTER_SECONDS:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Check out a healthy connection; prefer the connection() context manager."""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT_SECONDS):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise pool.PoolError(
+                f"Timed out after {DB_POOL_TIMEOUT_SECONDS}s waiting for a {self.database} connection"
+            )
+
+        try:
+            db_pool = self._get_pool()
+            conn = db_pool.getconn()
+            if not self._is_healthy(conn):
+                with self._lock:
+                    self._stats["health_check_failures"] += 1
+                self._last_used.pop(id(conn), None)
+                db_pool.putconn(conn, close=True)
+                conn = db_pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+            self._stats["wait_seconds_total"] += time.monotonic() - started
+        return conn
+
+    def putconn(self, conn) -> None:
+        """Return a connection to the pool, discarding it if it is broken."""
+        try:
+            discard = bool(conn.closed)
+            if not discard and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            if discard:
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+            self._get_pool().putconn(conn, close=discard)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Context manager yielding a pooled connection; the caller commits."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage statistics for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            db_pool = self._pool
+        stats.update({
+            "database": self.database,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "in_use": len(db_pool._used) if db_pool else 0,
+            "idle": len(db_pool._pool) if db_pool else 0,
+        })
+        checkouts = stats["checkouts"]
+        stats["avg_wait_ms"] = round(stats.pop("wait_seconds_total") / checkouts * 1000, 2) if checkouts else 0.0
+        return stats
+
+    def close(self) -> None:
+        """Close every connection held by the pool."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+
+_databases: Dict[str, PooledDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(database: str) -> PooledDatabase:
+    """Return the process-wide pool for a database, creating it on first use"""
+    with _databases_lock:
+        if database not in _databases:
+            _databases[database] = PooledDatabase(database)
+        return _databases[database]
+
+
+def raw_db_connection():
+    """Context manager yielding a pooled raw_db connection"""
+    return get_database(RAW_DB).connection()
+
+
+def filtered_db_connection():
+    """Context manager yielding a pooled filtered_db connection"""
+    return get_database(FILTERED_DB).connection()
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Usage statistics for every pool created in this process"""
+    with _databases_lock:
+        databases = list(_databases.values())
+    return {db.database: db.stats() for db in databases}
+
+
+def close_all_pools() -> None:
+    """Close all pools (e.g. on application shutdown)"""
+    with _databases_lock:
+        databases = list(_databases.values())
+    for db in databases:
+        db.close()
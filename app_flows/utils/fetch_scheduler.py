@@ -0,0 +1,202 @@
+"""
+Per-host politeness scheduler for article downloads.
+
+Tracks latency and 429/5xx/error rates for every host and adapts each
+host's concurrency and inter-request delay (additive increase on success,
+multiplicative decrease on throttling), honours Retry-After, and produces
+per-host statistics for the end-of-run report.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+
+FETCH_MAX_PER_HOST = int(os.getenv("FULLTEXT_MAX_PER_HOST", "4"))
+FETCH_MIN_DELAY_SECONDS = float(os.getenv("FETCH_MIN_DELAY_SECONDS", "0"))
+FETCH_MAX_DELAY_SECONDS = float(os.getenv("FETCH_MAX_DELAY_SECONDS", "30"))
+# Give up on a URL (fall back to RSS content) rather than wait longer than this for its host
+FETCH_MAX_WAIT_SECONDS = float(os.getenv("FETCH_MAX_WAIT_SECONDS", "60"))
+
+# Delay applied after the first throttling response when no Retry-After is sent
+_BACKOFF_BASE_SECONDS = 1.0
+# Weight of the newest sample in the latency moving average
+_LATENCY_ALPHA = 0.2
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class HostState:
+    """Adaptive limits and counters for one host"""
+    concurrency: float
+    delay: float = 0.0
+    in_flight: int = 0
+    next_allowed_at: float = 0.0
+    latency_ewma: Optional[float] = None
+    requests: int = 0
+    successes: int = 0
+    throttled: int = 0
+    server_errors: int = 0
+    other_errors: int = 0
+    skipped: int = 0
+
+
+class FetchScheduler:
+    """
+    Thread-safe gate in front of every article download.
+
+    Call ``acquire(url)`` before a request and ``release(url, ...)`` with its
+    outcome afterwards. Healthy hosts ramp up to FULLTEXT_MAX_PER_HOST
+    concurrent requests with no delay; hosts that answer 429/5xx have their
+    concurrency halved and their delay doubled, and are paused for as long
+    as their Retry-After header asks.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = FETCH_MAX_PER_HOST,
+        min_delay: float = FETCH_MIN_DELAY_SECONDS,
+        max_delay: float = FETCH_MAX_DELAY_SECONDS,
+        max_wait: float = FETCH_MAX_WAIT_SECONDS,
+    ):
+        self.max_per_host = max(1, max_per_host)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self._hosts: Dict[str, HostState] = {}
+        self._condition = threading.Condition()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = HostState(concurrency=float(self.max_per_host), delay=self.min_delay)
+            self._hosts[host] = state
+        return state
+
+    def acquire(self, url: str) -> bool:
+        """
+        Wait for a request slot on the URL's host.
+
+        Returns False without waiting when the host is paused for longer than
+        FETCH_MAX_WAIT_SECONDS, or after waiting that long without a slot.
+        """
+        host = self.host_of(url)
+        deadline = time.monotonic() + self.max_wait
+        with self._condition:
+            state = self._state(host)
+            while True:
+                now = time.monotonic()
+                if state.next_allowed_at > deadline:
+                    state.skipped += 1
+                    return False
+                if state.in_flight < int(state.concurrency) and now >= state.next_allowed_at:
+                    state.in_flight += 1
+                    state.requests += 1
+                    state.next_allowed_at = now + state.delay
+                    return True
+                if now >= deadline:
+                    state.skipped += 1
+                    return False
+                wait_for = deadline - now
+                if state.in_flight < int(state.concurrency):
+                    wait_for = min(wait_for, state.next_allowed_at - now)
+                self._condition.wait(timeout=max(0.01, wait_for))
+
+    def release(
+        self,
+        url: str,
+        status: Optional[int] = None,
+        latency: Optional[float] = None,
+        retry_after: Optional[float] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Record a finished request and adapt the host's limits."""
+        host = self.host_of(url)
+        with self._condition:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            now = time.monotonic()
+
+            if latency is not None:
+                state.latency_ewma = latency if state.latency_ewma is None else (
+                    _LATENCY_ALPHA * latency + (1 - _LATENCY_ALPHA) * state.latency_ewma
+                )
+
+            if status == 429 or status == 503:
+                state.throttled += 1
+                self._back_off(state, factor=2.0)
+            elif status is not None and status >= 500:
+                state.server_errors += 1
+                self._back_off(state, factor=1.5)
+            elif error is not None:
+                state.other_errors += 1
+                state.delay = min(self.max_delay, max(state.delay * 1.5, self.min_delay))
+            else:
+                # Any completed response (including 4xx like 403/404) means the host is keeping up
+                state.successes += 1
+                state.concurrency = min(float(self.max_per_host), state.concurrency + 1.0 / state.concurrency)
+                state.delay = max(self.min_delay, state.delay * 0.8)
+
+            if retry_after is not None:
+                state.next_allowed_at = max(state.next_allowed_at, now + retry_after)
+
+            self._condition.notify_all()
+
+    def _back_off(self, state: HostState, factor: float) -> None:
+        state.concurrency = max(1.0, state.concurrency / 2)
+        state.delay = min(self.max_delay, max(state.delay * factor, _BACKOFF_BASE_SECONDS))
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host statistics for the end-of-run report."""
+        with self._condition:
+            hosts = dict(self._hosts)
+            return {
+                host: {
+                    "requests": state.requests,
+                    "successes": state.successes,
+                    "throttled": state.throttled,
+                    "server_errors": state.server_errors,
+                    "other_errors": state.other_errors,
+                    "skipped": state.skipped,
+                    "concurrency": int(state.concurrency),
+                    "delay_seconds": round(state.delay, 2),
+                    "avg_latency_ms": round(state.latency_ewma * 1000) if state.latency_ewma is not None else None,
+                }
+                for host, state in sorted(hosts.items())
+            }
+
+
+_fetch_scheduler: Optional[FetchScheduler] = None
+_fetch_scheduler_lock = threading.Lock()
+
+
+def get_fetch_scheduler() -> FetchScheduler:
+    """Return the process-wide fetch scheduler"""
+    global _fetch_scheduler
+    with _fetch_scheduler_lock:
+        if _fetch_scheduler is None:
+            _fetch_scheduler = FetchScheduler()
+        return _fetch_scheduler
@@ -0,0 +1,198 @@
+"""
+Persistent cache for LLM responses.
+
+Responses are keyed by a hash of the cleaned input text, model name, prompt
+template version and sampling parameters, and stored in
+filtered_db.llm_response_cache so retries, reprocessing runs and identical
+bodies from different URLs cost no tokens. An in-process LRU sits in front
+of the table for repeated lookups within a run. Entries expire (in both
+layers) LLM_CACHE_TTL_SECONDS after they were stored, and the least
+recently hit entries are pruned once the table holds more than
+LLM_CACHE_MAX_ENTRIES rows.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app_flows.utils.db_pool import filtered_db_connection
+
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1000"))
+# Run TTL/size pruning after this many stores
+LLM_CACHE_PRUNE_EVERY = int(os.getenv("LLM_CACHE_PRUNE_EVERY", "100"))
+
+
+def cache_key(input_text: str, model: str, prompt_version: str, params: Dict[str, Any]) -> str:
+    """Hash everything that determines an LLM response into a cache key"""
+    payload = json.dumps(
+        {"input": input_text, "model": model, "prompt_version": prompt_version, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-level (memory + filtered_db) LLM response cache.
+
+    Database errors are logged and treated as misses, so an unavailable cache
+    never blocks processing. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.enabled = enabled
+        # key -> (created_at as a Unix timestamp, response)
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stores_since_prune = 0
+        self._stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _remember(self, key: str, response: str, created_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (created_at, response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached response, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if time.time() - created_at < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return response
+                # Expired: drop it and check the table, which may hold a newer response
+                del self._memory[key]
+
+        try:
+            with filtered_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE llm_response_cache
+                        SET hit_count = hit_count + 1, last_hit_at = NOW()
+                        WHERE cache_key = %s
+                          AND created_at >= NOW() - make_interval(secs => %s)
+                        RETURNING response, EXTRACT(EPOCH FROM created_at)
+                    """, (key, self.ttl_seconds))
+                    row = cursor.fetchone()
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️  LLM cache lookup failed: {e}")
+            self._count("errors")
+            self._count("misses")
+            return None
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        self._count("db_hits")
+        self._remember(key, row[0], float(row[1]))
+        return row[0]
+
+    def put(self, key: str, response: str, model: str, prompt_version: str) -> None:
+        """Store a response, pruning expired and excess entries periodically."""
+        if not self.enabled:
+            return
+
+        self._remember(key, response, time.time())
+        try:
+            with filtered_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        INSERT INTO llm_response_cache (cache_key, response, model, prompt_version)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (cache_key) DO UPDATE SET
+                            response = EXCLUDED.response,
+                            created_at = NOW(),
+                            last_hit_at = NOW()
+                    """, (key, response, model, prompt_version))
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️  LLM cache store failed: {e}")
+            self._count("errors")
+            return
+
+        with self._lock:
+            self._stats["stores"] += 1
+            self._stores_since_prune += 1
+            should_prune = self._stores_since_prune >= LLM_CACHE_PRUNE_EVERY
+            if should_prune:
+                self._stores_since_prune = 0
+        if should_prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete expired entries and the least recently hit ones beyond max_entries."""
+        try:
+            with filtered_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "DELETE FROM llm_response_cache WHERE created_at < NOW() - make_interval(secs => %s)",
+                        (self.ttl_seconds,),
+                    )
+                    deleted = cursor.rowcount
+                    cursor.execute("""
+                        DELETE FROM llm_response_cache
+                        WHERE cache_key IN (
+                            SELECT cache_key FROM llm_response_cache
+                            ORDER BY last_hit_at DESC
+                            OFFSET %s
+                        )
+                    """, (self.max_entries,))
+                    deleted += cursor.rowcount
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️  LLM cache prune failed: {e}")
+            self._count("errors")
+            return 0
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit rate for monitoring."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        hits = stats["memory_hits"] + stats["db_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide LLM response cache"""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache()
+        return _llm_cache
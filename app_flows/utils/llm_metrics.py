@@ -0,0 +1,197 @@
+"""
+Per-call instrumentation for OpenRouter chat completions.
+
+Every completion attempt (and every response served from the LLM cache) is
+recorded with its model, prompt version, outcome, latency, token usage,
+client retries and cost, tagged with the Prefect flow run that made it.
+Records are buffered in memory and written to filtered_db.llm_call_metrics
+in batches; like the response cache, a failed write is logged and never
+blocks processing. aggregate_llm_calls() backs the per-run summary of
+ai_processing_flow and the API's GET /stats/llm.
+"""
+import json
+import os
+import threading
+from dataclasses import astuple, dataclass
+from typing import Any, Dict, List, Optional
+
+from psycopg2.extras import execute_values
+
+from app_flows.utils.db_pool import filtered_db_connection
+
+
+LLM_METRICS_ENABLED = os.getenv("LLM_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Buffered records are written once this many have piled up (and at the end of each AI run)
+LLM_METRICS_FLUSH_EVERY = int(os.getenv("LLM_METRICS_FLUSH_EVERY", "50"))
+LLM_METRICS_RETENTION_DAYS = int(os.getenv("LLM_METRICS_RETENTION_DAYS", "90"))
+# Prices for models OpenRouter does not report a cost for, in USD per million tokens:
+# {"model": [input_price, output_price]}
+LLM_MODEL_PRICES: Dict[str, List[float]] = json.loads(os.getenv("LLM_MODEL_PRICES") or "{}")
+
+
+@dataclass
+class LLMCall:
+    """One chat completion attempt (field order matches the INSERT)"""
+    flow_run_id: Optional[str]
+    model: str
+    prompt_version: str
+    outcome: str  # success, error or cache_hit
+    latency_ms: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    retries: Optional[int] = None
+    cost_usd: Optional[float] = None
+    error: Optional[str] = None
+
+
+def call_cost(model: str, usage: Any) -> Optional[float]:
+    """
+    Cost of a call in USD: OpenRouter's reported cost (usage accounting),
+    else LLM_MODEL_PRICES, else 0 for ``:free`` models (None when unknown).
+    """
+    if usage is None:
+        return None
+    reported = getattr(usage, "cost", None)
+    if reported is not None:
+        return float(reported)
+    prices = LLM_MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0 if model.endswith(":free") else None
+    return ((usage.prompt_tokens or 0) * prices[0] + (usage.completion_tokens or 0) * prices[1]) / 1_000_000
+
+
+class LLMMetrics:
+    """Thread-safe buffer of LLMCall records, written to filtered_db in batches"""
+
+    def __init__(self, enabled: bool = LLM_METRICS_ENABLED, flush_every: int = LLM_METRICS_FLUSH_EVERY):
+        self.enabled = enabled
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._buffer: List[LLMCall] = []
+        self._written = 0
+        self._dropped = 0
+
+    def record(self, call: LLMCall) -> None:
+        """Buffer a call, writing the buffer out once it is full"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._buffer.append(call)
+            full = len(self._buffer) >= self.flush_every
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered records; returns how many were written"""
+        with self._lock:
+            calls, self._buffer = self._buffer, []
+        if not calls:
+            return 0
+
+        try:
+            with filtered_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    execute_values(cursor, """
+                        INSERT INTO llm_call_metrics (
+                            flow_run_id, model, prompt_version, outcome, latency_ms,
+                            prompt_tokens, completion_tokens, retries, cost_usd, error
+                        ) VALUES %s
+                    """, [astuple(call) for call in calls])
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️  LLM metrics write failed, dropping {len(calls)} records: {e}")
+            with self._lock:
+                self._dropped += len(calls)
+            return 0
+
+        with self._lock:
+            self._written += len(calls)
+        return len(calls)
+
+    def prune(self, retention_days: int = LLM_METRICS_RETENTION_DAYS) -> int:
+        """Delete records older than the retention period"""
+        try:
+            with filtered_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        "DELETE FROM llm_call_metrics WHERE created_at < NOW() - make_interval(days => %s)",
+                        (retention_days,),
+                    )
+                    deleted = cursor.rowcount
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️  LLM metrics prune failed: {e}")
+            return 0
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"buffered": len(self._buffer), "written": self._written, "dropped": self._dropped}
+
+
+def aggregate_llm_calls(flow_run_id: Optional[str] = None, hours: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Per model and prompt version: calls, outcomes, client retries, latency
+    percentiles of successful calls, tokens and cost.
+
+    Args:
+        flow_run_id: Only calls made by this Prefect flow run
+        hours: Only calls from the last ``hours`` hours
+    """
+    conditions = []
+    params: List[Any] = []
+    if flow_run_id is not None:
+        conditions.append("flow_run_id = %s")
+        params.append(flow_run_id)
+    if hours is not None:
+        conditions.append("created_at >= NOW() - make_interval(secs => %s)")
+        params.append(hours * 3600)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    with filtered_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT
+                    model,
+                    prompt_version,
+                    COUNT(*) AS calls,
+                    COUNT(*) FILTER (WHERE outcome = 'success') AS successes,
+                    COUNT(*) FILTER (WHERE outcome = 'error') AS errors,
+                    COUNT(*) FILTER (WHERE outcome = 'cache_hit') AS cache_hits,
+                    COALESCE(SUM(retries), 0) AS retries,
+                    percentile_cont(0.5) WITHIN GROUP (ORDER BY latency_ms)
+                        FILTER (WHERE outcome = 'success') AS latency_p50_ms,
+                    percentile_cont(0.95) WITHIN GROUP (ORDER BY latency_ms)
+                        FILTER (WHERE outcome = 'success') AS latency_p95_ms,
+                    COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+                    COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+                    SUM(cost_usd) AS cost_usd
+                FROM llm_call_metrics
+                {where}
+                GROUP BY model, prompt_version
+                ORDER BY calls DESC
+            """, params)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+
+    aggregates = []
+    for row in rows:
+        aggregate = dict(zip(columns, row))
+        for key in ("latency_p50_ms", "latency_p95_ms", "cost_usd"):
+            if aggregate[key] is not None:
+                aggregate[key] = round(float(aggregate[key]), 6 if key == "cost_usd" else 1)
+        aggregates.append(aggregate)
+    return aggregates
+
+
+_llm_metrics: Optional[LLMMetrics] = None
+_llm_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Return the process-wide LLM call recorder"""
+    global _llm_metrics
+    with _llm_metrics_lock:
+        if _llm_metrics is None:
+            _llm_metrics = LLMMetrics()
+        return _llm_metrics
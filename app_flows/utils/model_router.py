@@ -0,0 +1,216 @@
+"""
+Latency-aware routing over an ordered list of OpenRouter models.
+
+OPENROUTER_MODELS lists the models the pipeline may use (falling back to
+the single OPENROUTER_MODEL). For every model the router keeps a rolling
+(exponentially weighted) latency and error rate. Requests go to the fastest
+healthy model first and fall through the rest of the chain on errors.
+
+A model that fails MODEL_ROUTER_FAILURE_THRESHOLD times in a row, or whose
+error rate passes MODEL_ROUTER_ERROR_RATE_THRESHOLD, trips its circuit
+breaker: it is skipped for MODEL_ROUTER_COOLDOWN_SECONDS, then a single
+probe request decides whether it is closed again or stays open. When every
+breaker is open, requests fail fast instead of burning retries on models
+that are known to be down.
+
+Only errors that say something about the model count against its health:
+server errors, timeouts, connection failures and empty responses. A model
+that answers 429 is moved to the back of the chain until its Retry-After
+has passed, without touching its breaker.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_MODEL = "meta-llama/llama-3.2-3b-instruct:free"
+# Weight of the newest sample in the rolling latency and error rate
+MODEL_ROUTER_EWMA_ALPHA = float(os.getenv("MODEL_ROUTER_EWMA_ALPHA", "0.3"))
+MODEL_ROUTER_FAILURE_THRESHOLD = int(os.getenv("MODEL_ROUTER_FAILURE_THRESHOLD", "3"))
+MODEL_ROUTER_ERROR_RATE_THRESHOLD = float(os.getenv("MODEL_ROUTER_ERROR_RATE_THRESHOLD", "0.5"))
+# Calls before the error rate alone can trip a breaker
+MODEL_ROUTER_MIN_CALLS = int(os.getenv("MODEL_ROUTER_MIN_CALLS", "5"))
+MODEL_ROUTER_COOLDOWN_SECONDS = float(os.getenv("MODEL_ROUTER_COOLDOWN_SECONDS", "60"))
+# Back-off for a rate-limited model whose 429 carried no Retry-After
+MODEL_ROUTER_RATE_LIMIT_SECONDS = float(os.getenv("MODEL_ROUTER_RATE_LIMIT_SECONDS", "10"))
+
+
+def configured_models() -> List[str]:
+    """OPENROUTER_MODELS (comma-separated, in order of preference) or OPENROUTER_MODEL"""
+    models = [m.strip() for m in os.getenv("OPENROUTER_MODELS", "").split(",") if m.strip()]
+    if not models:
+        models = [os.getenv("OPENROUTER_MODEL", DEFAULT_MODEL)]
+    return list(dict.fromkeys(models))
+
+
+class ModelsUnavailableError(RuntimeError):
+    """Every model's circuit breaker is open"""
+
+
+@dataclass
+class ModelHealth:
+    """Rolling health of one model"""
+    latency_seconds: Optional[float] = None
+    error_rate: float = 0.0
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    opened_at: Optional[float] = None  # Breaker open since (None = closed)
+    probe_started_at: Optional[float] = None  # Half-open probe in flight since
+    rate_limited: int = 0
+    rate_limited_until: Optional[float] = None  # Retry-After of the last 429
+
+
+class ModelRouter:
+    """
+    Thread-safe model chooser with per-model circuit breakers.
+
+    Callers ask ``route()`` for the order to try models in, then report
+    each attempt with ``record_success(model, latency)``,
+    ``record_failure(model)`` or ``record_rate_limited(model, retry_after)``.
+    Models without a latency sample yet are tried first so every model in
+    the chain gets measured.
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[str]] = None,
+        alpha: float = MODEL_ROUTER_EWMA_ALPHA,
+        failure_threshold: int = MODEL_ROUTER_FAILURE_THRESHOLD,
+        error_rate_threshold: float = MODEL_ROUTER_ERROR_RATE_THRESHOLD,
+        min_calls: int = MODEL_ROUTER_MIN_CALLS,
+        cooldown_seconds: float = MODEL_ROUTER_COOLDOWN_SECONDS,
+    ):
+        self.models = list(models) if models else configured_models()
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._health: Dict[str, ModelHealth] = {model: ModelHealth() for model in self.models}
+
+    def route(self) -> List[str]:
+        """
+        Models to try for one request, best first.
+
+        A model whose cooldown has elapsed is put first as the half-open
+        probe (one request at a time); healthy models follow, fastest first,
+        with rate-limited ones at the back.
+
+        Raises:
+            ModelsUnavailableError: All breakers are open and cooling down
+        """
+        with self._lock:
+            now = time.monotonic()
+            probes = []
+            healthy = []
+            for model in self.models:
+                health = self._health[model]
+                if health.opened_at is None:
+                    healthy.append(model)
+                elif now - health.opened_at >= self.cooldown_seconds and (
+                    health.probe_started_at is None or now - health.probe_started_at >= self.cooldown_seconds
+                ):
+                    health.probe_started_at = now
+                    probes.append(model)
+
+            healthy.sort(key=lambda model: (
+                (self._health[model].rate_limited_until or 0.0) > now,
+                self._health[model].latency_seconds or 0.0,
+            ))
+            order = probes[:1] + healthy
+            for model in probes[1:]:
+                self._health[model].probe_started_at = None
+            if not order:
+                raise ModelsUnavailableError(
+                    f"All models are unavailable (circuit breakers open): {', '.join(self.models)}"
+                )
+            return order
+
+    def _update(self, model: str, failed: bool) -> ModelHealth:
+        health = self._health.setdefault(model, ModelHealth())
+        health.calls += 1
+        health.error_rate += self.alpha * ((1.0 if failed else 0.0) - health.error_rate)
+        health.probe_started_at = None
+        return health
+
+    def record_success(self, model: str, latency_seconds: float) -> None:
+        """Record a usable response and close the model's breaker"""
+        with self._lock:
+            health = self._update(model, failed=False)
+            if health.latency_seconds is None:
+                health.latency_seconds = latency_seconds
+            else:
+                health.latency_seconds += self.alpha * (latency_seconds - health.latency_seconds)
+            health.consecutive_failures = 0
+            if health.opened_at is not None:
+                # Start the recovered model with a clean record, so one more failure doesn't re-open it
+                health.opened_at = None
+                health.error_rate = 0.0
+                print(f"✅ Model {model} recovered, circuit breaker closed")
+
+    def record_failure(self, model: str) -> None:
+        """Record a failed call and trip the breaker if the model looks degraded"""
+        with self._lock:
+            health = self._update(model, failed=True)
+            health.failures += 1
+            health.consecutive_failures += 1
+            degraded = health.consecutive_failures >= self.failure_threshold or (
+                health.calls >= self.min_calls and health.error_rate >= self.error_rate_threshold
+            )
+            if health.opened_at is not None or degraded:
+                if health.opened_at is None:
+                    print(
+                        f"⚠️ Model {model} degraded ({health.consecutive_failures} consecutive failures, "
+                        f"error rate {health.error_rate:.0%}), circuit breaker open for {self.cooldown_seconds:.0f}s"
+                    )
+                # A failed probe restarts the cooldown
+                health.opened_at = time.monotonic()
+
+    def record_rate_limited(self, model: str, retry_after: Optional[float] = None) -> None:
+        """Record a 429: deprioritize the model until Retry-After has passed (its health is unaffected)"""
+        with self._lock:
+            health = self._health.setdefault(model, ModelHealth())
+            health.rate_limited += 1
+            health.probe_started_at = None
+            delay = retry_after if retry_after is not None else MODEL_ROUTER_RATE_LIMIT_SECONDS
+            health.rate_limited_until = time.monotonic() + delay
+
+    def rate_limit_wait(self, model: str) -> float:
+        """Seconds until the model's last Retry-After has passed (0 if it isn't rate limited)"""
+        with self._lock:
+            health = self._health.get(model)
+            if health is None or health.rate_limited_until is None:
+                return 0.0
+            return max(0.0, health.rate_limited_until - time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model latency, error rate and breaker state"""
+        with self._lock:
+            return {
+                model: {
+                    "latency_seconds": round(health.latency_seconds, 3) if health.latency_seconds is not None else None,
+                    "error_rate": round(health.error_rate, 3),
+                    "calls": health.calls,
+                    "failures": health.failures,
+                    "rate_limited": health.rate_limited,
+                    "circuit": "closed" if health.opened_at is None else "open",
+                }
+                for model, health in self._health.items()
+            }
+
+
+_model_router: Optional[ModelRouter] = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router"""
+    global _model_router
+    with _model_router_lock:
+        if _model_router is None:
+            _model_router = ModelRouter()
+        return _model_router
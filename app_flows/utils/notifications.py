@@ -0,0 +1,85 @@
+"""
+Postgres LISTEN/NOTIFY helpers.
+
+A statement-level trigger on raw_articles (see docker/init-schema.sql) sends
+one NOTIFY on RAW_ARTICLES_CHANNEL per INSERT statement, with the number of
+inserted rows as payload. NotificationListener holds a dedicated autocommit
+connection that LISTENs on a channel, so a long-running worker can react to
+new articles within seconds instead of waiting for the next scheduled run.
+"""
+import select
+from typing import Optional
+
+from psycopg2 import extensions
+
+from app_flows.utils.db_pool import RAW_DB, dedicated_connection
+
+
+RAW_ARTICLES_CHANNEL = "raw_articles_inserted"
+
+
+class NotificationListener:
+    """
+    LISTEN on one channel over a connection of its own (not pooled: the
+    LISTEN must outlive any single checkout). Not thread-safe; use it from
+    the worker's main loop.
+    """
+
+    def __init__(self, channel: str = RAW_ARTICLES_CHANNEL, database: str = RAW_DB):
+        self.channel = channel
+        self.database = database
+        self._conn = None
+
+    def connect(self) -> None:
+        """(Re)open the connection and start listening"""
+        self.close()
+        self._conn = dedicated_connection(self.database)
+        self._conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+
+    def wait(self, timeout: float) -> int:
+        """
+        Block until notifications arrive or ``timeout`` seconds pass.
+
+        Returns:
+            Number of rows announced by the notifications received
+            (0 on timeout)
+
+        Raises:
+            psycopg2.OperationalError: The connection was lost (call connect() again)
+        """
+        if self._conn is None:
+            self.connect()
+        if not self._conn.notifies:
+            readable, _, _ = select.select([self._conn], [], [], timeout)
+            if readable:
+                self._conn.poll()
+        return self.drain()
+
+    def drain(self) -> int:
+        """Consume already-received notifications without blocking"""
+        if self._conn is None:
+            return 0
+        self._conn.poll()
+        rows = 0
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            rows += _row_count(notify.payload)
+        return rows
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+def _row_count(payload: Optional[str]) -> int:
+    """Rows announced by a notification (at least 1, whatever the payload)"""
+    try:
+        return max(1, int(payload or 0))
+    except ValueError:
+        return 1
@@ -0,0 +1,192 @@
+"""
+On-disk cache for downloaded article HTML.
+
+Pages are stored gzip-compressed under PAGE_CACHE_DIR, one file per URL
+(named by the SHA256 of the URL). Entries expire after PAGE_CACHE_TTL_SECONDS
+and the least recently used entries are evicted once the cache grows past
+PAGE_CACHE_MAX_BYTES, so task retries and re-extractions after trafilatura
+settings changes cost no network.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+_project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join(_project_root, ".cache", "pages"))
+PAGE_CACHE_TTL_SECONDS = float(os.getenv("PAGE_CACHE_TTL_SECONDS", str(24 * 3600)))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Eviction trims the cache down to this fraction of the maximum size
+_EVICT_TO_FRACTION = 0.9
+# Temp files younger than this may still be written by a concurrent put()
+_TMP_GRACE_SECONDS = 60
+
+
+class PageCache:
+    """
+    Size-bounded, TTL-expiring LRU cache of compressed page bodies keyed by URL.
+
+    The file mtime records when a page was stored (for the TTL) and the atime
+    is bumped explicitly on every hit (for LRU ordering), so it also works on
+    filesystems mounted with noatime. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        directory: str = PAGE_CACHE_DIR,
+        ttl_seconds: float = PAGE_CACHE_TTL_SECONDS,
+        max_bytes: int = PAGE_CACHE_MAX_BYTES,
+    ):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size_bytes: Optional[int] = None
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.html.gz")
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, url: str) -> Optional[bytes]:
+        """Return the cached body for a URL, or None on a miss or expired entry."""
+        path = self._path(url)
+        try:
+            stat = os.stat(path)
+            now = time.time()
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._remove(path, stat.st_size)
+                self._count("expired")
+                self._count("misses")
+                return None
+            with gzip.open(path, "rb") as handle:
+                body = handle.read()
+            os.utime(path, (now, stat.st_mtime))
+        except (OSError, EOFError):
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return body
+
+    def put(self, url: str, body: bytes) -> None:
+        """Store a page body, evicting least recently used entries if needed."""
+        path = self._path(url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                previous_size = os.stat(path).st_size
+            except OSError:
+                previous_size = 0
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as handle:
+                handle.write(body)
+            os.replace(tmp_path, path)
+            stored_size = os.stat(path).st_size
+        except OSError as e:
+            print(f"⚠️  Could not write page cache entry for {url}: {e}")
+            return
+
+        self._count("stores")
+        with self._lock:
+            if self._size_bytes is not None:
+                self._size_bytes += stored_size - previous_size
+            needs_eviction = self._size_bytes is None or self._size_bytes > self.max_bytes
+        if needs_eviction:
+            self.evict()
+
+    def _remove(self, path: str, size: int) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size_bytes is not None:
+                self._size_bytes -= size
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        entries: List[Tuple[float, int, str]] = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+        return entries
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under the size bound."""
+        entries = self._scan()
+        now = time.time()
+        evicted = 0
+        live: List[Tuple[float, int, str]] = []
+        for atime, size, path in entries:
+            try:
+                age = now - os.stat(path).st_mtime
+            except OSError:
+                continue
+            if path.endswith(".tmp"):
+                # Leftovers of a crashed put(); leave the ones still being written alone
+                if age > _TMP_GRACE_SECONDS:
+                    self._remove_untracked(path)
+                    evicted += 1
+            elif age > self.ttl_seconds:
+                self._remove_untracked(path)
+                evicted += 1
+            else:
+                live.append((atime, size, path))
+
+        total = sum(size for _atime, size, _path in live)
+        if total > self.max_bytes:
+            target = self.max_bytes * _EVICT_TO_FRACTION
+            for _atime, size, path in sorted(live):
+                if total <= target:
+                    break
+                self._remove_untracked(path)
+                total -= size
+                evicted += 1
+
+        with self._lock:
+            self._size_bytes = total
+            self._stats["evictions"] += evicted
+        return evicted
+
+    def _remove_untracked(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size for monitoring."""
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+            stats["size_bytes"] = self._size_bytes if self._size_bytes is not None else -1
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Return the process-wide page cache"""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+        return _page_cache
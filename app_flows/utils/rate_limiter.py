@@ -0,0 +1,115 @@
+"""
+Token-bucket rate limiter for OpenRouter requests.
+
+Two buckets are tracked together: requests per minute and tokens per
+minute (prompt estimate + max_tokens). Callers reserve capacity up front
+and are told how long to wait, so the limiter works the same from worker
+threads and from any asyncio event loop, and one process-wide instance
+keeps every concurrent run inside the provider's limits.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+OPENROUTER_RPM = float(os.getenv("OPENROUTER_RPM", "20"))
+OPENROUTER_TPM = float(os.getenv("OPENROUTER_TPM", "100000"))
+
+
+class TokenBucketLimiter:
+    """
+    Thread-safe requests-per-minute / tokens-per-minute limiter.
+
+    ``reserve(tokens)`` takes one request and ``tokens`` tokens from the
+    buckets immediately (letting them go negative) and returns how long the
+    caller must wait before sending; later callers queue up behind it. A
+    limit of 0 disables that bucket. Buckets start full, so a burst of up to
+    one minute's allowance goes out immediately.
+    """
+
+    def __init__(self, requests_per_minute: float = OPENROUTER_RPM, tokens_per_minute: float = OPENROUTER_TPM):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._request_level = requests_per_minute
+        self._token_level = tokens_per_minute
+        self._updated_at = time.monotonic()
+        self._reserved = 0
+        self._waited_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._request_level = min(
+            self.requests_per_minute, self._request_level + elapsed * self.requests_per_minute / 60
+        )
+        self._token_level = min(
+            self.tokens_per_minute, self._token_level + elapsed * self.tokens_per_minute / 60
+        )
+
+    def set_limits(self, requests_per_minute: float, tokens_per_minute: float) -> None:
+        """Change the limits in place (e.g. to run a backfill on a share of the provider's quota)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            self._request_level = min(self._request_level, requests_per_minute)
+            self._token_level = min(self._token_level, tokens_per_minute)
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve one request and ``tokens`` tokens; return seconds to wait before sending"""
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0
+            if self.requests_per_minute > 0:
+                self._request_level -= 1
+                if self._request_level < 0:
+                    wait = max(wait, -self._request_level * 60 / self.requests_per_minute)
+            if self.tokens_per_minute > 0:
+                # A single request larger than the whole bucket would otherwise never fit
+                self._token_level -= min(tokens, self.tokens_per_minute)
+                if self._token_level < 0:
+                    wait = max(wait, -self._token_level * 60 / self.tokens_per_minute)
+            self._reserved += 1
+            self._waited_seconds += wait
+            return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block the calling thread until the request may be sent"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Wait (without blocking the event loop) until the request may be sent"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Limits, current bucket levels and time spent waiting"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "request_level": round(self._request_level, 2),
+                "token_level": round(self._token_level),
+                "reserved": self._reserved,
+                "waited_seconds": round(self._waited_seconds, 2),
+            }
+
+
+_rate_limiter: Optional[TokenBucketLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucketLimiter:
+    """Return the process-wide OpenRouter rate limiter"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = TokenBucketLimiter()
+        return _rate_limiter
@@ -0,0 +1,77 @@
+"""
+SimHash signatures for near-duplicate article detection.
+
+A 64-bit SimHash is computed over word shingles of the cleaned article
+text; syndicated copies of the same story end up within a few bits of each
+other. The signature is split into SIMHASH_BANDS 16-bit bands so that, by
+the pigeonhole principle, any two signatures within SIMHASH_BANDS - 1 bits
+share at least one identical band. That turns lookups into a handful of
+indexed equality matches instead of a scan over the whole corpus.
+"""
+import hashlib
+import re
+from collections import Counter
+from typing import List, Optional
+
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+# Texts shorter than this many words give unreliable signatures
+MIN_WORDS = 40
+SHINGLE_SIZE = 3
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> Optional[int]:
+    """
+    Compute the 64-bit SimHash of a text (HTML tags are ignored).
+
+    Returns:
+        Unsigned 64-bit signature, or None if the text has fewer than MIN_WORDS words
+    """
+    words = _WORD_RE.findall(_TAG_RE.sub(" ", text or "").lower())
+    if len(words) < MIN_WORDS:
+        return None
+
+    shingles = Counter(
+        " ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)
+    )
+    weights = [0] * SIMHASH_BITS
+    for shingle, count in shingles.items():
+        feature = _feature_hash(shingle)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += count if feature >> bit & 1 else -count
+
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            signature |= 1 << bit
+    return signature
+
+
+def simhash_bands(signature: int) -> List[int]:
+    """Split an unsigned signature into SIMHASH_BANDS band values"""
+    return [(signature >> (band * _BAND_BITS)) & _BAND_MASK for band in range(SIMHASH_BANDS)]
+
+
+def to_signed64(signature: int) -> int:
+    """Convert an unsigned 64-bit signature to the signed value stored in a BIGINT column"""
+    return signature - (1 << 64) if signature >= 1 << 63 else signature
+
+
+def to_unsigned64(value: int) -> int:
+    """Convert a BIGINT column value back to an unsigned 64-bit signature"""
+    return value + (1 << 64) if value < 0 else value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two signatures"""
+    return bin(to_unsigned64(a) ^ to_unsigned64(b)).count("1")
@@ -0,0 +1,107 @@
+"""
+HTML-to-text normalization for article bodies.
+
+clean_html() walks a document once with precompiled patterns and returns
+the readable text (tags removed, script/style content dropped, block
+elements turned into line breaks, entities unescaped, whitespace collapsed)
+together with the first inline image and the text's length and word count.
+The collection flow stores the result in raw_articles.clean_text so the AI
+stage never cleans the same body again.
+"""
+import re
+from dataclasses import dataclass
+from html import unescape
+from typing import Optional
+
+
+# A comment, or an opening/closing tag: (slash, name, attributes)
+_TOKEN_RE = re.compile(r"<!--.*?-->|<(/?)([a-zA-Z][\w:-]*)([^>]*)>", re.DOTALL)
+_SRC_RE = re.compile(r"""\bsrc\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+_HORIZONTAL_SPACE_RE = re.compile(r"[^\S\n]+")
+_SPACE_AROUND_NEWLINE_RE = re.compile(r" ?\n ?")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Elements whose content is never visible text
+_SKIPPED_TAGS = frozenset({"script", "style", "noscript", "template", "svg"})
+# Elements that start a new line of text
+_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "ol", "p", "pre",
+    "section", "table", "td", "th", "tr", "ul",
+})
+
+
+@dataclass
+class CleanedDocument:
+    """Readable text of an HTML (or plain-text) body plus what we derive from it"""
+    text: str
+    image_url: Optional[str]
+    char_count: int
+    word_count: int
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces, trim lines and keep at most one blank line"""
+    text = _HORIZONTAL_SPACE_RE.sub(" ", text)
+    text = _SPACE_AROUND_NEWLINE_RE.sub("\n", text)
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def clean_html(html: Optional[str], plain_text: bool = False) -> CleanedDocument:
+    """
+    Convert an article body to clean text in a single pass.
+
+    Pass ``plain_text=True`` for bodies that are already text (e.g.
+    trafilatura output): they only get entity unescaping and whitespace
+    normalization, keeping their line breaks. Without it, anything that
+    looks like a tag is stripped, so a comparison such as "a<b and c>d" in
+    plain text would lose "b and c".
+    """
+    html = html or ""
+    if plain_text:
+        return _document(normalize_whitespace(unescape(html)), None)
+
+    parts = []
+    image_url: Optional[str] = None
+    skipping: Optional[str] = None
+    position = 0
+
+    for match in _TOKEN_RE.finditer(html):
+        if skipping is None:
+            parts.append(html[position:match.start()])
+        position = match.end()
+
+        closing, name, attributes = match.groups()
+        if name is None:  # comment
+            continue
+        name = name.lower()
+
+        if skipping is not None:
+            if closing and name == skipping:
+                skipping = None
+            continue
+        if not closing and name in _SKIPPED_TAGS and not attributes.rstrip().endswith("/"):
+            skipping = name
+            continue
+
+        if name == "img" and image_url is None:
+            src = _SRC_RE.search(attributes)
+            if src:
+                image_url = unescape(next(group for group in src.groups() if group is not None)) or None
+        if name in _BLOCK_TAGS:
+            parts.append("\n")
+
+    if skipping is None:
+        parts.append(html[position:])
+
+    return _document(normalize_whitespace(unescape("".join(parts))), image_url)
+
+
+def _document(text: str, image_url: Optional[str]) -> CleanedDocument:
+    return CleanedDocument(
+        text=text,
+        image_url=image_url,
+        char_count=len(text),
+        word_count=len(_WORD_RE.findall(text)),
+    )
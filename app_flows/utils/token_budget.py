@@ -0,0 +1,104 @@
+"""
+Token estimates and input planning for LLM prompts.
+
+Tokens are estimated at ~4 characters each (close enough for English text
+across the OpenRouter models we use, and free to compute). Articles that fit
+SUMMARY_INPUT_TOKEN_BUDGET are sent whole; longer ones are split on
+paragraph and sentence boundaries into the fewest chunks of at most
+SUMMARY_CHUNK_TOKENS (never more than the budget), evenly sized and capped
+at SUMMARY_MAX_CHUNKS, so input tokens per article stay predictable.
+"""
+import math
+import os
+import re
+from typing import List
+
+
+CHARS_PER_TOKEN = 4
+SUMMARY_INPUT_TOKEN_BUDGET = int(os.getenv("SUMMARY_INPUT_TOKEN_BUDGET", "1000"))
+# Chunks are never larger than SUMMARY_INPUT_TOKEN_BUDGET, whatever this says
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1000"))
+SUMMARY_MAX_CHUNKS = int(os.getenv("SUMMARY_MAX_CHUNKS", "6"))
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n|\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text"""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def _pieces(text: str, max_chars: int) -> List[str]:
+    """Paragraphs, with oversized ones broken into sentences and then hard-cut"""
+    pieces = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_RE.split(paragraph):
+            while len(sentence) > max_chars:
+                pieces.append(sentence[:max_chars])
+                sentence = sentence[max_chars:]
+            if sentence:
+                pieces.append(sentence)
+    return pieces
+
+
+def split_into_chunks(text: str, max_tokens: int = SUMMARY_CHUNK_TOKENS) -> List[str]:
+    """Greedily pack paragraphs/sentences into chunks of at most ``max_tokens``"""
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for piece in _pieces(text, max_chars):
+        if current and current_len + 1 + len(piece) > max_chars:
+            chunks.append("\n".join(current))
+            current, current_len = [], 0
+        current.append(piece)
+        current_len += len(piece) + (1 if current_len else 0)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def plan_summary_input(
+    text: str,
+    budget: int = SUMMARY_INPUT_TOKEN_BUDGET,
+    chunk_tokens: int = SUMMARY_CHUNK_TOKENS,
+    max_chunks: int = SUMMARY_MAX_CHUNKS,
+) -> List[str]:
+    """
+    Plan the input for summarizing ``text``.
+
+    Longer text is split into ceil(tokens / chunk size) chunks of about the
+    same size, where the chunk size is ``chunk_tokens`` capped at ``budget``
+    (a chunk is a single prompt too). A 1600-token article becomes two
+    800-token chunks rather than 1500 + 100.
+
+    Returns:
+        ``[text]`` when it fits the single-prompt budget, otherwise up to
+        ``max_chunks`` chunks to summarize separately and then reduce
+        (anything beyond the last chunk is dropped, and logged)
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= budget:
+        return [text]
+
+    max_chunk_tokens = max(1, min(chunk_tokens, budget))
+    target = math.ceil(tokens / math.ceil(tokens / max_chunk_tokens))
+    # A little slack so paragraph boundaries don't spill a small extra chunk
+    chunks = split_into_chunks(text, min(max_chunk_tokens, math.ceil(target * 1.1)))
+
+    max_chunks = max(1, max_chunks)
+    if len(chunks) > max_chunks:
+        dropped = sum(estimate_tokens(chunk) for chunk in chunks[max_chunks:])
+        print(
+            f"⚠️  Article of ~{tokens} tokens exceeds {max_chunks} chunks, "
+            f"summarizing without its last ~{dropped} tokens"
+        )
+        chunks = chunks[:max_chunks]
+    return chunks
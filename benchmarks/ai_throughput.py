@@ -0,0 +1,220 @@
+"""
+End-to-end AI processing throughput benchmark.
+
+Seeds raw_db with N synthetic articles, runs ai_processing_flow against the
+local OpenRouter mock (benchmarks/mock_openrouter.py) and reports
+articles/sec, per-article time-to-saved percentiles and LLM calls per
+article. No tokens are spent, so every concurrency, batching or caching
+change can be measured the same way:
+
+    python -m benchmarks.ai_throughput --articles 200 --concurrency 16 --latency-median-ms 800
+
+Use a scratch database: the benchmark refuses to run while raw_db holds
+unprocessed articles other than its own (they would be processed too) unless
+--force is given. Seeded rows are deleted afterwards unless --keep is given.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+# Make the project importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_openrouter import (
+    BackgroundServer,
+    add_mock_arguments,
+    config_from_args,
+    create_app,
+    percentile,
+    summarize_stats,
+)
+
+BENCH_URL_PREFIX = "https://bench.invalid/"
+
+_WORDS = (
+    "government market minister company report city council energy climate election court police "
+    "school hospital research university budget prices workers union contract trade border security "
+    "technology software network data privacy football league season coach player museum festival "
+    "film music storm flood drought harvest bank inflation interest rates investors shares profit "
+    "talks agreement ceasefire protest vote parliament senate policy reform law regulators airline "
+    "airport railway transport housing rent families children doctors patients vaccine study scientists"
+).split()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark ai_processing_flow against a local OpenRouter mock")
+    parser.add_argument("--articles", type=int, default=100, help="Number of raw articles to seed")
+    parser.add_argument("--concurrency", type=int, default=None, help="ai_processing_flow concurrency (1 = sequential)")
+    parser.add_argument("--separate-calls", action="store_true", help="Disable combined summarize+categorize mode")
+    parser.add_argument("--long-fraction", type=float, default=0.1, help="Share of articles long enough to be chunked")
+    parser.add_argument("--rpm", type=float, default=0, help="OPENROUTER_RPM for the run (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=0, help="OPENROUTER_TPM for the run (0 = unlimited)")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the LLM response cache enabled")
+    parser.add_argument("--models", default=None, help="OPENROUTER_MODELS for the run (comma-separated fallback chain)")
+    parser.add_argument("--base-url", default=None, help="Use an already running mock instead of starting one")
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--keep", action="store_true", help="Keep seeded rows after the run")
+    parser.add_argument("--force", action="store_true", help="Run even if raw_db has other unprocessed articles")
+    parser.add_argument("--output", default=None, help="Also write the report as JSON to this file")
+    add_mock_arguments(parser)
+    return parser.parse_args()
+
+
+def _synthetic_articles(count: int, long_fraction: float, run_id: str, rng: random.Random) -> List[Dict[str, Any]]:
+    articles = []
+    for i in range(count):
+        words = 3000 if rng.random() < long_fraction else rng.randint(150, 600)
+        paragraphs = [
+            " ".join(rng.choice(_WORDS) for _ in range(60)).capitalize() + "."
+            for _ in range(max(1, words // 60))
+        ]
+        body = "\n\n".join(paragraphs)
+        articles.append({
+            "fingerprint": hashlib.sha256(f"bench-{run_id}-{i}".encode()).hexdigest(),
+            "source_url": f"{BENCH_URL_PREFIX}{run_id}/{i}",
+            "title": f"Benchmark article {i}",
+            "body_html": body,
+            "image_url": None,
+            "published_at": None,
+        })
+    return articles
+
+
+def main() -> int:
+    args = _parse_args()
+
+    mock_app = None
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        mock_app = create_app(config_from_args(args))
+        server = BackgroundServer(mock_app, port=args.mock_port)
+        base_url = server.base_url
+
+    # Configure the pipeline before its modules read the environment
+    os.environ["OPENROUTER_BASE_URL"] = base_url
+    os.environ.setdefault("OPENROUTER_API_KEY", "mock")
+    os.environ["OPENROUTER_RPM"] = str(args.rpm)
+    os.environ["OPENROUTER_TPM"] = str(args.tpm)
+    if not args.with_cache:
+        os.environ["LLM_CACHE_ENABLED"] = "false"
+    if args.models:
+        os.environ["OPENROUTER_MODELS"] = args.models
+
+    from app_flows.flows.ai_processing_flow import AI_COMBINED_MODE
+    from app_flows.tasks.ai_engine_tasks import AI_MAX_CONCURRENCY
+    from app_flows.tasks.database_tasks import bulk_insert_articles
+    from app_flows.utils.db_pool import close_all_pools, filtered_db_connection, raw_db_connection
+
+    concurrency = args.concurrency if args.concurrency is not None else AI_MAX_CONCURRENCY
+    combined = AI_COMBINED_MODE and not args.separate_calls
+
+    with raw_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM raw_articles WHERE processed_at IS NULL AND source_url NOT LIKE %s",
+                (BENCH_URL_PREFIX + "%",),
+            )
+            foreign_backlog = cursor.fetchone()[0]
+    if foreign_backlog and not args.force:
+        print(f"❌ raw_db has {foreign_backlog} unprocessed non-benchmark articles; use a scratch database or --force")
+        return 1
+
+    run_id = uuid.uuid4().hex[:12]
+    articles = _synthetic_articles(args.articles, args.long_fraction, run_id, random.Random(args.seed))
+    with raw_db_connection() as conn:
+        saved, failures = bulk_insert_articles(conn, articles)
+        conn.commit()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT id FROM raw_articles WHERE source_url LIKE %s", (f"{BENCH_URL_PREFIX}{run_id}/%",))
+            raw_ids = [row[0] for row in cursor.fetchall()]
+    print(f"✅ Seeded {len(saved)} benchmark articles ({len(failures)} failed)")
+
+    try:
+        mock_context = server if server is not None else contextlib.nullcontext()
+        with mock_context:
+            report = _measure(args, base_url, mock_app, raw_ids, combined, concurrency)
+    finally:
+        if not args.keep:
+            with filtered_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("DELETE FROM filtered_articles WHERE raw_article_id = ANY(%s)", (raw_ids,))
+                conn.commit()
+            with raw_db_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("DELETE FROM raw_articles WHERE id = ANY(%s)", (raw_ids,))
+                    cursor.execute(
+                        "DELETE FROM raw_article_fingerprints WHERE fingerprint = ANY(%s)",
+                        ([article["fingerprint"] for article in articles],),
+                    )
+                conn.commit()
+        close_all_pools()
+
+    print(json.dumps(report, indent=2, default=str))
+    print(
+        f"📊 {report['processed']}/{report['articles']} articles in {report['elapsed_seconds']}s: "
+        f"{report['articles_per_second']} articles/s, time-to-saved p50 {report['time_to_saved_p50_seconds']}s "
+        f"p99 {report['time_to_saved_p99_seconds']}s, {report['llm_calls_per_article']} LLM calls/article"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    return 0
+
+
+def _measure(args, base_url, mock_app, raw_ids, combined, concurrency) -> Dict[str, Any]:
+    """Run the flow over the seeded articles and collect the report"""
+    import httpx
+    from app_flows.flows.ai_processing_flow import ai_processing_flow
+    from app_flows.utils.db_pool import filtered_db_connection
+    from app_flows.utils.model_router import get_model_router
+
+    if mock_app is None:
+        httpx.post(base_url.rsplit("/v1", 1)[0] + "/stats/reset", timeout=10)
+
+    with filtered_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT clock_timestamp()")
+            started_at = cursor.fetchone()[0]
+    started = time.monotonic()
+    processed = ai_processing_flow(limit=len(raw_ids), combined=combined, concurrency=concurrency)
+    elapsed = time.monotonic() - started
+
+    with filtered_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXTRACT(EPOCH FROM processed_at - %s) FROM filtered_articles WHERE raw_article_id = ANY(%s)",
+                (started_at, raw_ids),
+            )
+            time_to_saved = [float(row[0]) for row in cursor.fetchall()]
+
+    if mock_app is not None:
+        mock_stats = summarize_stats(mock_app.state.stats)
+    else:
+        mock_stats = httpx.get(base_url.rsplit("/v1", 1)[0] + "/stats", timeout=10).json()
+
+    return {
+        "articles": len(raw_ids),
+        "processed": processed,
+        "concurrency": concurrency,
+        "combined": combined,
+        "llm_cache": args.with_cache,
+        "models": get_model_router().stats(),
+        "elapsed_seconds": round(elapsed, 2),
+        "articles_per_second": round(processed / elapsed, 3) if elapsed > 0 else None,
+        "time_to_saved_p50_seconds": percentile(time_to_saved, 0.5),
+        "time_to_saved_p99_seconds": percentile(time_to_saved, 0.99),
+        "llm_calls_per_article": round(mock_stats["requests"] / processed, 2) if processed else None,
+        "mock": mock_stats,
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main())
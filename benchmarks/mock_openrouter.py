@@ -0,0 +1,237 @@
+"""
+Local OpenAI-compatible stand-in for OpenRouter.
+
+Serves POST /v1/chat/completions with canned responses shaped like the ones
+the pipeline's prompts ask for (plain summaries, {"categories": [...]} and
+combined {"summary": ..., "categories": [...]} JSON). Latency follows a
+log-normal distribution, a share of requests can be answered with 429
+(with Retry-After) or 500 and chosen models can be marked as degraded
+(always 500), so throughput, retries, failover and caching can be measured
+without spending tokens.
+
+Run standalone:
+    python -m benchmarks.mock_openrouter --port 8900 --latency-median-ms 800 --rate-limit-rate 0.05
+
+and point the pipeline at it with OPENROUTER_BASE_URL=http://localhost:8900/v1.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class MockConfig:
+    latency_median_ms: float = float(os.getenv("MOCK_LATENCY_MEDIAN_MS", "800"))
+    # Log-normal shape: 0 gives constant latency, 0.5 gives p99 ~3.2x the median
+    latency_sigma: float = float(os.getenv("MOCK_LATENCY_SIGMA", "0.5"))
+    error_rate: float = float(os.getenv("MOCK_ERROR_RATE", "0"))
+    rate_limit_rate: float = float(os.getenv("MOCK_RATE_LIMIT_RATE", "0"))
+    retry_after_seconds: float = float(os.getenv("MOCK_RETRY_AFTER_SECONDS", "1"))
+    seed: Optional[int] = int(os.environ["MOCK_SEED"]) if os.getenv("MOCK_SEED") else None
+    # Models always answered with 500 (exercises the model router's failover)
+    degraded_models: List[str] = field(
+        default_factory=lambda: [m.strip() for m in os.getenv("MOCK_DEGRADED_MODELS", "").split(",") if m.strip()]
+    )
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    completions: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    by_kind: Dict[str, int] = field(default_factory=dict)
+    latencies_ms: List[float] = field(default_factory=list)
+
+
+_CANNED_SUMMARY = (
+    "Officials confirmed the developments described in the report on Tuesday. "
+    "The article outlines the main events, the people involved and the immediate consequences. "
+    "Analysts expect further updates as the situation evolves."
+)
+_CATEGORY_LIST_RE = re.compile(r"Available categories:\s*([^\n]+)")
+
+
+def _request_kind(prompt: str) -> str:
+    if '"summary"' in prompt:
+        return "combined"
+    if '"categories"' in prompt:
+        return "categories"
+    if "part " in prompt and " of a long news article" in prompt:
+        return "chunk"
+    return "summary"
+
+
+def _canned_response(kind: str, prompt: str, rng: random.Random) -> str:
+    match = _CATEGORY_LIST_RE.search(prompt)
+    available = [c.strip() for c in match.group(1).split(",")] if match else ["World"]
+    categories = rng.sample(available, k=min(len(available), rng.randint(1, 3)))
+    if kind == "combined":
+        return json.dumps({"summary": _CANNED_SUMMARY, "categories": categories})
+    if kind == "categories":
+        return json.dumps({"categories": categories})
+    return _CANNED_SUMMARY
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    """Build the mock server app (config and stats are kept on app.state)"""
+    config = config or MockConfig()
+    app = FastAPI(title="Mock OpenRouter")
+    app.state.config = config
+    app.state.stats = MockStats()
+    rng = random.Random(config.seed)
+    lock = threading.Lock()
+
+    def _sample_latency() -> float:
+        with lock:
+            return config.latency_median_ms * math.exp(rng.gauss(0, config.latency_sigma)) / 1000
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        prompt = messages[-1].get("content", "") if messages else ""
+        stats: MockStats = app.state.stats
+
+        started = time.monotonic()
+        await asyncio.sleep(_sample_latency())
+
+        with lock:
+            stats.requests += 1
+            roll = rng.random()
+            kind = _request_kind(prompt)
+            if roll < config.rate_limit_rate:
+                stats.rate_limited += 1
+                return JSONResponse(
+                    {"error": {"message": "Rate limit exceeded (mock)", "code": 429}},
+                    status_code=429,
+                    headers={"Retry-After": str(config.retry_after_seconds)},
+                )
+            if roll < config.rate_limit_rate + config.error_rate or body.get("model") in config.degraded_models:
+                stats.errors += 1
+                return JSONResponse({"error": {"message": "Upstream error (mock)", "code": 500}}, status_code=500)
+
+            content = _canned_response(kind, prompt, rng)
+            stats.completions += 1
+            stats.by_kind[kind] = stats.by_kind.get(kind, 0) + 1
+            stats.latencies_ms.append((time.monotonic() - started) * 1000)
+
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"mock-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.get("/stats")
+    def stats() -> Dict[str, Any]:
+        return summarize_stats(app.state.stats)
+
+    @app.post("/stats/reset")
+    def reset_stats() -> Dict[str, str]:
+        app.state.stats = MockStats()
+        return {"status": "ok"}
+
+    return app
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no values)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def summarize_stats(stats: MockStats) -> Dict[str, Any]:
+    return {
+        "requests": stats.requests,
+        "completions": stats.completions,
+        "rate_limited": stats.rate_limited,
+        "errors": stats.errors,
+        "by_kind": dict(stats.by_kind),
+        "latency_p50_ms": percentile(stats.latencies_ms, 0.5),
+        "latency_p99_ms": percentile(stats.latencies_ms, 0.99),
+    }
+
+
+class BackgroundServer:
+    """Run the mock in a background thread (used by the benchmark harness)"""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1", port: int = 8900):
+        self.app = app
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.base_url = f"http://{host}:{port}/v1"
+
+    def __enter__(self) -> "BackgroundServer":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Mock OpenRouter server failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = MockConfig()
+    parser.add_argument("--latency-median-ms", type=float, default=defaults.latency_median_ms)
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Share of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate, help="Share of requests answered with 429")
+    parser.add_argument("--retry-after-seconds", type=float, default=defaults.retry_after_seconds)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--degraded-models", default=",".join(defaults.degraded_models),
+        help="Comma-separated models always answered with 500",
+    )
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        latency_median_ms=args.latency_median_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_seconds=args.retry_after_seconds,
+        seed=args.seed,
+        degraded_models=[m.strip() for m in args.degraded_models.split(",") if m.strip()],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock of OpenRouter")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port)
@@ -9,18 +9,189 @@ ALTER SCHEMA public OWNER TO raw_db;
 GRANT ALL PRIVILEGES ON SCHEMA public TO raw_db;
 SET ROLE raw_db;
 
--- Raw articles table (unprocessed news from RSS feeds)
+-- raw_articles used to be a single unpartitioned table. Set an existing one aside (with its
+-- sequence, and minus the indexes whose names the partitioned table reuses); its rows are
+-- copied into the partitioned table further down
+DO $$
+DECLARE
+    old_index RECORD;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_class
+        WHERE relname = 'raw_articles' AND relkind = 'r' AND relnamespace = 'public'::regnamespace
+    ) THEN
+        ALTER TABLE raw_articles RENAME TO raw_articles_unpartitioned;
+        ALTER SEQUENCE IF EXISTS raw_articles_id_seq RENAME TO raw_articles_unpartitioned_id_seq;
+        ALTER TABLE raw_articles_unpartitioned DROP CONSTRAINT IF EXISTS raw_articles_pkey;
+        ALTER TABLE raw_articles_unpartitioned DROP CONSTRAINT IF EXISTS raw_articles_fingerprint_key;
+        FOR old_index IN
+            SELECT indexname FROM pg_indexes
+            WHERE schemaname = 'public' AND tablename = 'raw_articles_unpartitioned'
+        LOOP
+            EXECUTE format('DROP INDEX IF EXISTS %I', old_index.indexname);
+        END LOOP;
+    END IF;
+END $$;
+
+-- Raw articles table (unprocessed news from RSS feeds), partitioned by month of created_at
+-- so recent partitions and their indexes stay cache-resident as history grows
 CREATE TABLE IF NOT EXISTS raw_articles (
-    id SERIAL PRIMARY KEY,
-    fingerprint VARCHAR(64) UNIQUE NOT NULL,  -- SHA256 hash for duplicate detection
+    id SERIAL,
+    fingerprint VARCHAR(64) NOT NULL,         -- SHA256 hash for duplicate detection (unique via raw_article_fingerprints)
     source_url TEXT NOT NULL,                 -- Original article URL
     title TEXT,                               -- Article title
-    body_html TEXT,                           -- Full article content in HTML
+    body_html TEXT,                           -- Full article content in HTML (NULL once archived)
     image_url TEXT,                           -- Article image/thumbnail URL
     published_at TIMESTAMP WITH TIME ZONE,    -- When article was published
     processed_at TIMESTAMP WITH TIME ZONE,    -- When article was processed by AI
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,  -- When we fetched it
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP   -- Last modification
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- When we fetched it (partition key)
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,  -- Last modification
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Near-duplicate detection: 64-bit SimHash of the article text, split into four
+-- 16-bit bands for indexed lookups, and a link to the article it duplicates
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS simhash BIGINT;
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS simhash_band0 INTEGER;
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS simhash_band1 INTEGER;
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS simhash_band2 INTEGER;
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS simhash_band3 INTEGER;
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS duplicate_of INTEGER;  -- raw_articles.id of the original story
+
+-- Article text cleaned once at ingest (tags/scripts removed, entities unescaped) for the AI stage
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS clean_text TEXT;
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS word_count INTEGER;
+
+-- AI work queue: the worker that claimed an unprocessed article and when its lease runs out
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS lease_owner VARCHAR(100);
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+-- Failed AI attempts (released unfinished) and when the article may be claimed again; parked after AI_MAX_ATTEMPTS
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS ai_attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE raw_articles ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE;
+
+-- Fingerprint uniqueness for raw_articles (a partitioned table can only enforce keys that
+-- include created_at). New articles claim their fingerprint here in the same statement
+CREATE TABLE IF NOT EXISTS raw_article_fingerprints (
+    fingerprint VARCHAR(64) PRIMARY KEY,      -- raw_articles.fingerprint
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Cold tier: zlib-compressed bodies of old, processed articles (raw_articles.body_html is cleared)
+CREATE TABLE IF NOT EXISTS raw_article_archive (
+    raw_article_id INTEGER PRIMARY KEY,       -- raw_articles.id
+    article_created_at TIMESTAMP WITH TIME ZONE NOT NULL,  -- raw_articles.created_at
+    body_html_zlib BYTEA NOT NULL,            -- zlib-compressed body_html (UTF-8)
+    original_bytes INTEGER NOT NULL,          -- Uncompressed size
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+-- Already compressed: store out of line without a second TOAST compression pass
+ALTER TABLE raw_article_archive ALTER COLUMN body_html_zlib SET STORAGE EXTERNAL;
+
+-- Catch-all partition, so an insert never fails for lack of a monthly partition
+CREATE TABLE IF NOT EXISTS raw_articles_default PARTITION OF raw_articles DEFAULT;
+
+-- Create the monthly raw_articles partitions (UTC months) from from_time's month up to
+-- months_ahead months from now. Rows that landed in the default partition for a new month
+-- are moved into it. Returns the number of partitions created
+CREATE OR REPLACE FUNCTION ensure_raw_articles_partitions(from_time TIMESTAMP WITH TIME ZONE, months_ahead INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', from_time AT TIME ZONE 'UTC');
+    last_month TIMESTAMP := date_trunc('month', CURRENT_TIMESTAMP AT TIME ZONE 'UTC') + make_interval(months => months_ahead);
+    lower_bound TIMESTAMP WITH TIME ZONE;
+    upper_bound TIMESTAMP WITH TIME ZONE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := 'raw_articles_' || to_char(month_start, 'YYYY_MM');
+        lower_bound := month_start AT TIME ZONE 'UTC';
+        upper_bound := (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC';
+        IF to_regclass(partition_name) IS NULL THEN
+            IF EXISTS (SELECT 1 FROM raw_articles_default WHERE created_at >= lower_bound AND created_at < upper_bound) THEN
+                EXECUTE format('CREATE TABLE %I (LIKE raw_articles INCLUDING DEFAULTS)', partition_name);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM raw_articles_default WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    lower_bound, upper_bound, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE raw_articles ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, lower_bound, upper_bound
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF raw_articles FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, lower_bound, upper_bound
+                );
+            END IF;
+            created := created + 1;
+        END IF;
+        month_start := month_start + INTERVAL '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ language 'plpgsql';
+
+SELECT ensure_raw_articles_partitions(CURRENT_TIMESTAMP, 3);
+
+-- Copy a set-aside unpartitioned raw_articles (see the top of this file) into the partitioned
+-- table, register its fingerprints and continue its id sequence
+DO $$
+DECLARE
+    shared_columns TEXT;
+BEGIN
+    IF to_regclass('raw_articles_unpartitioned') IS NOT NULL THEN
+        UPDATE raw_articles_unpartitioned
+        SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+        WHERE created_at IS NULL;
+        PERFORM ensure_raw_articles_partitions(
+            COALESCE((SELECT MIN(created_at) FROM raw_articles_unpartitioned), CURRENT_TIMESTAMP), 3
+        );
+
+        SELECT string_agg(quote_ident(old.column_name), ', ' ORDER BY old.ordinal_position)
+        INTO shared_columns
+        FROM information_schema.columns old
+        JOIN information_schema.columns new
+          ON new.table_schema = 'public' AND new.table_name = 'raw_articles' AND new.column_name = old.column_name
+        WHERE old.table_schema = 'public' AND old.table_name = 'raw_articles_unpartitioned';
+        EXECUTE format('INSERT INTO raw_articles (%s) SELECT %s FROM raw_articles_unpartitioned', shared_columns, shared_columns);
+
+        INSERT INTO raw_article_fingerprints (fingerprint, created_at)
+        SELECT fingerprint, created_at FROM raw_articles_unpartitioned
+        ON CONFLICT (fingerprint) DO NOTHING;
+
+        PERFORM setval(
+            pg_get_serial_sequence('raw_articles', 'id'),
+            GREATEST((SELECT MAX(id) FROM raw_articles), 1)
+        );
+        DROP TABLE raw_articles_unpartitioned;
+    END IF;
+END $$;
+
+-- Conditional-GET state per RSS feed (lets unchanged feeds be skipped early)
+CREATE TABLE IF NOT EXISTS feed_state (
+    feed_url TEXT PRIMARY KEY,                -- RSS feed URL
+    etag TEXT,                                -- Last ETag returned by the feed
+    last_modified TEXT,                       -- Last Last-Modified header returned by the feed
+    content_hash VARCHAR(64),                 -- SHA256 of the last downloaded feed body
+    last_checked_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,  -- Last poll
+    last_changed_at TIMESTAMP WITH TIME ZONE  -- Last poll that returned new content
+);
+
+-- Feed registry: one row per RSS feed with its adaptive polling schedule
+CREATE TABLE IF NOT EXISTS feeds (
+    id SERIAL PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,                 -- RSS feed URL
+    name TEXT NOT NULL,                       -- Human-readable feed name
+    enabled BOOLEAN NOT NULL DEFAULT TRUE,    -- Disabled feeds are never polled
+    poll_interval_seconds INTEGER NOT NULL DEFAULT 900,  -- Current adaptive polling interval
+    new_item_rate DOUBLE PRECISION NOT NULL DEFAULT 0,   -- Moving average of new items per poll
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,     -- Failed polls in a row
+    last_fetched_at TIMESTAMP WITH TIME ZONE,            -- Last successful poll
+    next_poll_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- When the feed is due
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 RESET ROLE;
@@ -29,9 +200,20 @@ RESET ROLE;
 -- NOTE: filtered_articles lives in filtered_db. See section below after switching connection.
 
 -- Indexes for performance
-CREATE INDEX IF NOT EXISTS idx_raw_fingerprint ON raw_articles(fingerprint);
+-- Fingerprint lookups go to raw_article_fingerprints (its primary key)
+DROP INDEX IF EXISTS idx_raw_fingerprint;
 CREATE INDEX IF NOT EXISTS idx_raw_published_at ON raw_articles(published_at DESC);
 CREATE INDEX IF NOT EXISTS idx_raw_created_at ON raw_articles(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_raw_simhash_band0 ON raw_articles(simhash_band0);
+CREATE INDEX IF NOT EXISTS idx_raw_simhash_band1 ON raw_articles(simhash_band1);
+CREATE INDEX IF NOT EXISTS idx_raw_simhash_band2 ON raw_articles(simhash_band2);
+CREATE INDEX IF NOT EXISTS idx_raw_simhash_band3 ON raw_articles(simhash_band3);
+-- AI work queue (processed_at IS NULL ORDER BY created_at): only unprocessed rows are indexed
+CREATE INDEX IF NOT EXISTS idx_raw_unprocessed ON raw_articles(created_at) WHERE processed_at IS NULL;
+-- Body archive candidates: processed rows whose body is still inline
+CREATE INDEX IF NOT EXISTS idx_raw_archivable ON raw_articles(created_at) WHERE processed_at IS NOT NULL AND body_html IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_raw_fingerprints_created_at ON raw_article_fingerprints(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_feeds_next_poll ON feeds(next_poll_at) WHERE enabled;
 
 -- filtered_db indexes are created in the section below after switching connection.
 
@@ -44,10 +226,29 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
-CREATE TRIGGER update_raw_articles_updated_at
+CREATE OR REPLACE TRIGGER update_raw_articles_updated_at
     BEFORE UPDATE ON raw_articles
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Wake streaming AI workers: one NOTIFY per INSERT statement, with the number of new rows as payload
+CREATE OR REPLACE FUNCTION notify_raw_articles_inserted()
+RETURNS TRIGGER AS $$
+DECLARE
+    inserted_count BIGINT;
+BEGIN
+    SELECT COUNT(*) INTO inserted_count FROM inserted_rows;
+    IF inserted_count > 0 THEN
+        PERFORM pg_notify('raw_articles_inserted', inserted_count::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE TRIGGER notify_raw_articles_inserted
+    AFTER INSERT ON raw_articles
+    REFERENCING NEW TABLE AS inserted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_raw_articles_inserted();
+
 -- Switch to filtered_db and create filtered tables there
 \connect filtered_db
 
@@ -71,9 +272,79 @@ CREATE TABLE IF NOT EXISTS filtered_articles (
     processing_status VARCHAR(20) DEFAULT 'pending'  -- pending, processing, completed, failed
 );
 
+-- Who assigned the categories: 'llm' or the 'local' classifier (only LLM labels are used for training)
+ALTER TABLE filtered_articles ADD COLUMN IF NOT EXISTS categories_source VARCHAR(20);
+
+-- Persistent LLM response cache keyed by input text, model, prompt version and sampling params
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key VARCHAR(64) PRIMARY KEY,       -- SHA256 of input text + model + prompt version + params
+    response TEXT NOT NULL,                  -- Raw model response
+    model VARCHAR(100),                      -- Model that produced the response
+    prompt_version VARCHAR(50),              -- Prompt template version
+    hit_count INTEGER NOT NULL DEFAULT 0,    -- Number of times the entry was reused
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_hit_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- One row per OpenRouter chat completion attempt (or LLM cache hit), for throughput and cost tuning
+CREATE TABLE IF NOT EXISTS llm_call_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    flow_run_id UUID,                        -- Prefect flow run that made the call
+    model VARCHAR(100),                      -- Model that was called
+    prompt_version VARCHAR(50),              -- Prompt template version
+    outcome VARCHAR(20) NOT NULL,            -- success, error, cache_hit
+    latency_ms INTEGER,                      -- Request latency including client retries (not rate limiter waits)
+    prompt_tokens INTEGER,                   -- From response.usage
+    completion_tokens INTEGER,               -- From response.usage
+    retries INTEGER,                         -- Retries taken by the OpenAI client (NULL when unknown)
+    cost_usd NUMERIC(14, 8),                 -- Reported by OpenRouter, or priced from LLM_MODEL_PRICES
+    error TEXT,                              -- Error message for failed calls
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Earlier versions of filtered_articles rows, saved when a backfill rewrites their AI output
+CREATE TABLE IF NOT EXISTS filtered_article_versions (
+    id BIGSERIAL PRIMARY KEY,
+    raw_article_id INTEGER NOT NULL,         -- filtered_articles.raw_article_id
+    title_translated TEXT,
+    content_summary TEXT,
+    content_translated TEXT,
+    image_url TEXT,
+    sentiment_score DECIMAL(3,2),
+    categories TEXT[],
+    ai_model_used VARCHAR(100),
+    categories_source VARCHAR(20),
+    processed_at TIMESTAMP WITH TIME ZONE,   -- When this version was written
+    backfill_name VARCHAR(100),              -- Backfill that replaced it
+    replaced_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Resumable backfills: selection parameters and progress (keyset position over raw_article_id)
+CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+    name VARCHAR(100) PRIMARY KEY,           -- Backfill name (rerunning the same name resumes it)
+    params JSONB NOT NULL,                   -- Selection: since/until (raw created_at), categories
+    last_raw_article_id INTEGER NOT NULL DEFAULT 0,  -- Everything up to this id has been handled
+    articles_done INTEGER NOT NULL DEFAULT 0,
+    articles_failed INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',  -- running, completed
+    started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
 RESET ROLE;
 
 -- Indexes for performance in filtered_db
-CREATE INDEX IF NOT EXISTS idx_filtered_raw_id ON filtered_articles(raw_article_id);
+-- One filtered row per raw article (saves are upserts on raw_article_id): keep the latest of any duplicates
+DELETE FROM filtered_articles fa
+USING filtered_articles newer
+WHERE fa.raw_article_id = newer.raw_article_id
+  AND fa.id < newer.id;
+DROP INDEX IF EXISTS idx_filtered_raw_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_filtered_raw_id_unique ON filtered_articles(raw_article_id);
 CREATE INDEX IF NOT EXISTS idx_filtered_status ON filtered_articles(processing_status);
 CREATE INDEX IF NOT EXISTS idx_filtered_processed_at ON filtered_articles(processed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_response_cache(last_hit_at);
+CREATE INDEX IF NOT EXISTS idx_llm_metrics_created_at ON llm_call_metrics(created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_metrics_flow_run ON llm_call_metrics(flow_run_id);
+CREATE INDEX IF NOT EXISTS idx_filtered_versions_raw_id ON filtered_article_versions(raw_article_id);